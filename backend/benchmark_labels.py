@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark label PDF generation: serial vs. the QR process pool.
+
+Usage:
+    python benchmark_labels.py [--workers N] [--counts 50 500 5000] [--repeat 3]
+
+Renders synthetic labels (name, category, weight and expiration lines
+shown) and prints the best time of each run. The pool is started and
+warmed up before timing, as it would be in a long-running gunicorn worker.
+"""
+import argparse
+import os
+import time
+
+import labels
+
+
+def synthetic_labels(count):
+    """Labels shaped like the ones print_labels builds"""
+    return [
+        {
+            'qr_code': f'BEN{i % 1000:03d}',
+            'qr_data': f'https://thefreezer.xyz/item/B{i:05d}',
+            'name': f'Benchmark item {i}',
+            'category': 'Beef',
+            'weight': '1.5 lb',
+            'expiration': 'Exp: 01/01/2027',
+        }
+        for i in range(count)
+    ]
+
+
+def best_time(label_list, workers, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        labels.render_labels_pdf(label_list, workers=workers)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--counts', type=int, nargs='+', default=[50, 500, 5000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"CPUs: {os.cpu_count()}, pool workers: {args.workers}, "
+          f"parallel threshold: {labels.PARALLEL_LABEL_THRESHOLD} labels")
+
+    if args.workers > 1:
+        # Warm up the pool so worker start-up isn't counted
+        labels.compute_qr_matrices([f'warmup {i}' for i in range(labels.PARALLEL_LABEL_THRESHOLD)],
+                                   workers=args.workers)
+
+    print(f"{'labels':>8} {'serial':>10} {'parallel':>10} {'speedup':>8}")
+    for count in args.counts:
+        label_list = synthetic_labels(count)
+        repeat = args.repeat if count <= 500 else 1
+        serial = best_time(label_list, 0, repeat)
+        parallel = best_time(label_list, args.workers, repeat)
+        print(f"{count:>8} {serial:>9.2f}s {parallel:>9.2f}s {serial / parallel:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
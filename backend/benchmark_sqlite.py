@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark mixed read/write SQLite throughput: default settings vs. the tuned profile.
+
+Usage:
+    python benchmark_sqlite.py [--processes 4] [--seconds 5] [--write-ratio 0.2] [--rows 20000]
+
+Each process stands in for a gunicorn worker, running item-list reads and
+small write transactions (an insert plus a status update) against a shared
+database file for a fixed time. Runs once with SQLite's defaults (rollback
+journal, synchronous=FULL; Python's sqlite3 already waits 5s for locks) and
+once with the PRAGMAs from sqlite_db.py, and prints operations per second,
+"database is locked" failures and read latency.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import sqlite_db
+
+SCHEMA = """
+CREATE TABLE items (
+    id INTEGER PRIMARY KEY,
+    qr_code TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    expiration_date TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX ix_items_status_expiration ON items (status, expiration_date);
+"""
+
+READ = "SELECT id, qr_code, name, expiration_date FROM items WHERE status = 'in_freezer' ORDER BY expiration_date LIMIT 50"
+
+
+def create_database(path, rows):
+    with sqlite3.connect(path) as connection:
+        connection.executescript(SCHEMA)
+        connection.executemany(
+            "INSERT INTO items (qr_code, name, status, expiration_date, updated_at) VALUES (?, ?, 'in_freezer', ?, datetime('now'))",
+            ((f'SEED{i:06d}', f'Item {i}', f'2027-{i % 12 + 1:02d}-{i % 28 + 1:02d}') for i in range(rows))
+        )
+
+
+def worker(path, pragmas, seconds, write_ratio, seed, results):
+    connection = sqlite3.connect(path)
+    for statement in pragmas:
+        connection.execute(statement)
+
+    rng = random.Random(seed)
+    reads = writes = locked = 0
+    read_times = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        try:
+            if rng.random() < write_ratio:
+                with connection:
+                    cursor = connection.execute(
+                        "INSERT INTO items (qr_code, name, status, updated_at) VALUES (?, 'New item', 'in_freezer', datetime('now'))",
+                        (f'W{seed}-{writes}-{rng.random()}',)
+                    )
+                    connection.execute(
+                        "UPDATE items SET status = 'consumed', updated_at = datetime('now') WHERE id = ?",
+                        (rng.randint(1, cursor.lastrowid),)
+                    )
+                writes += 1
+            else:
+                start = time.perf_counter()
+                connection.execute(READ).fetchall()
+                read_times.append(time.perf_counter() - start)
+                reads += 1
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            locked += 1
+
+    connection.close()
+    results.put((reads, writes, locked, read_times))
+
+
+def run(pragmas, args):
+    directory = tempfile.mkdtemp(prefix='sqlite-bench-')
+    path = os.path.join(directory, 'bench.db')
+    create_database(path, args.rows)
+
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(path, pragmas, args.seconds, args.write_ratio, seed, results))
+        for seed in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    totals = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+
+    reads = sum(t[0] for t in totals)
+    writes = sum(t[1] for t in totals)
+    locked = sum(t[2] for t in totals)
+    read_times = sorted(time for t in totals for time in t[3]) or [0]
+    p95 = read_times[int(len(read_times) * 0.95)]
+    return reads / args.seconds, writes / args.seconds, locked, p95 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"SQLite {sqlite3.sqlite_version}, {args.processes} processes, {args.seconds:g}s, "
+          f"{args.write_ratio:.0%} writes, {args.rows} rows")
+    print(f"{'profile':>8} {'reads/s':>10} {'writes/s':>10} {'locked':>8} {'p95 read':>10}")
+    for profile, pragmas in (('default', []), ('tuned', sqlite_db.sqlite_pragmas())):
+        reads, writes, locked, p95 = run(pragmas, args)
+        print(f"{profile:>8} {reads:>10.0f} {writes:>10.0f} {locked:>8} {p95:>8.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Per-worker caches of rarely changing tables, invalidated across workers.
+
+Each cached table has a row in cache_versions whose counter is bumped in
+the same transaction as any change to it. A worker drops its cached
+values when it sees a new version. The version itself is re-read at most
+once every CACHE_VERSION_CHECK_INTERVAL seconds, so hot endpoints don't
+pay a round trip per request. Other workers therefore see a change within
+that interval, and the worker that made the change sees it immediately.
+
+Usage:
+    value = get_cache('settings').get(key, lambda: load_from_db(key))
+
+    ...change the table...
+    bump_cache_version('settings')
+    db.session.commit()
+    get_cache('settings').invalidate()
+"""
+import os
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from models import db, CacheVersion
+
+# Seconds a worker trusts its cached version before checking the database
+CACHE_VERSION_CHECK_INTERVAL = float(os.environ.get('CACHE_VERSION_CHECK_INTERVAL', '1'))
+
+
+def get_cache_version(name):
+    """Current version counter for a cached table (0 if never bumped)"""
+    version = db.session.execute(
+        db.select(CacheVersion.version).where(CacheVersion.name == name)
+    ).scalar()
+    return version or 0
+
+
+def bump_cache_version(name):
+    """Increment a version counter as part of the current transaction"""
+    result = db.session.execute(
+        db.update(CacheVersion).where(CacheVersion.name == name).values(version=CacheVersion.version + 1)
+    )
+    if result.rowcount:
+        return
+
+    try:
+        with db.session.begin_nested():
+            db.session.add(CacheVersion(name=name, version=1))
+    except IntegrityError:
+        # Another worker created the row first
+        bump_cache_version(name)
+
+
+class VersionedCache:
+    """Values loaded from the database, kept until the named version changes.
+
+    Args:
+        name: Name of the cache_versions counter guarding these values
+        check_interval: Seconds between version checks (default
+            CACHE_VERSION_CHECK_INTERVAL)
+    """
+
+    def __init__(self, name, check_interval=None):
+        self.name = name
+        self.check_interval = CACHE_VERSION_CHECK_INTERVAL if check_interval is None else check_interval
+        self.version = None
+        self._values = {}
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def sync(self):
+        """Drop cached values if the version has changed since the last check"""
+        now = time.monotonic()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.check_interval:
+                return
+
+        version = get_cache_version(self.name)
+        with self._lock:
+            if version != self.version:
+                self._values.clear()
+                self.version = version
+            self._checked_at = now
+
+    def get(self, key, loader):
+        """Get a cached value, calling loader() to fetch it on a miss"""
+        self.sync()
+        with self._lock:
+            if key in self._values:
+                return self._values[key]
+            version = self.version
+
+        value = loader()
+        with self._lock:
+            # Don't store a value loaded under a version that has since been dropped
+            if self.version == version:
+                self._values[key] = value
+        return value
+
+    def invalidate(self):
+        """Drop all cached values and re-check the version on next use"""
+        with self._lock:
+            self._values.clear()
+            self.version = None
+            self._checked_at = None
+
+
+def get_cache(name):
+    """Get the current app's cache for a version counter, creating it on first use"""
+    caches = current_app.extensions.setdefault('versioned_caches', {})
+    cache = caches.get(name)
+    if cache is None:
+        cache = caches.setdefault(name, VersionedCache(name))
+    return cache
+
+
+def read_cache_versions():
+    """Every version counter, by name"""
+    return dict(db.session.execute(db.select(CacheVersion.name, CacheVersion.version)).all())
+
+
+def invalidate_all_caches(previous_versions):
+    """Invalidate every cache after the whole database has been replaced.
+
+    The replacement (e.g. a restored backup) brings its own, older
+    cache_versions rows, which other workers may already have seen. Every
+    counter - not only those of caches this worker has created - is
+    therefore moved past both its value before the replacement and its
+    restored value, and committed, so every worker drops its copies.
+
+    Args:
+        previous_versions: read_cache_versions() from before the database
+            was replaced
+    """
+    restored_versions = read_cache_versions()
+    caches = current_app.extensions.get('versioned_caches', {})
+
+    for name in set(previous_versions) | set(restored_versions) | set(caches):
+        version = max(previous_versions.get(name, 0), restored_versions.get(name, 0)) + 1
+        db.session.merge(CacheVersion(name=name, version=version))
+    db.session.commit()
+
+    for cache in caches.values():
+        cache.invalidate()
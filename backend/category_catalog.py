@@ -0,0 +1,56 @@
+"""
+Per-worker catalog of all categories.
+
+Categories are read by nearly every page (the category list, and the
+category name on every serialized item) but rarely change, so each worker
+keeps the whole table in a VersionedCache guarded by the 'categories'
+version counter. Anything that creates, renames or deletes a category
+must call mark_categories_changed() before committing and
+invalidate_category_catalog() after.
+"""
+import hashlib
+import json
+
+from cache_versions import get_cache, bump_cache_version
+from models import Category
+
+CATEGORIES_CACHE = 'categories'
+
+
+class CategoryCatalog:
+    """Snapshot of the categories table.
+
+    Attributes:
+        categories: Category.to_dict() for every category, sorted by name
+        by_id: The same dicts keyed by category id
+        etag: Hash of the serialized list, for conditional GETs
+    """
+
+    def __init__(self, categories):
+        self.categories = [category.to_dict() for category in categories]
+        self.by_id = {category['id']: category for category in self.categories}
+        payload = json.dumps(self.categories, sort_keys=True).encode('utf-8')
+        self.etag = hashlib.sha1(payload).hexdigest()
+
+    def name(self, category_id):
+        """Name of a category, or None if it doesn't exist"""
+        category = self.by_id.get(category_id)
+        return category['name'] if category else None
+
+
+def get_category_catalog():
+    """Get this worker's current category catalog"""
+    return get_cache(CATEGORIES_CACHE).get(
+        'catalog',
+        lambda: CategoryCatalog(Category.query.order_by(Category.name).all())
+    )
+
+
+def mark_categories_changed():
+    """Bump the categories version as part of the current transaction"""
+    bump_cache_version(CATEGORIES_CACHE)
+
+
+def invalidate_category_catalog():
+    """Drop this worker's cached catalog"""
+    get_cache(CATEGORIES_CACHE).invalidate()
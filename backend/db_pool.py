@@ -0,0 +1,122 @@
+"""
+Connection pool settings for PostgreSQL, and per-worker pool statistics.
+
+Each gunicorn worker has its own pool. A worker needs a connection for
+each of its --threads that is handling a request, plus one for the item
+event poller and one per running import job. Size the pool
+(SQLALCHEMY_POOL_SIZE + SQLALCHEMY_MAX_OVERFLOW) to match, and keep
+workers x that total below PostgreSQL's max_connections. GET
+/api/settings/database/pool shows how close a worker gets
+(peak_checked_out) and how often connections had to be replaced.
+
+Managed PostgreSQL services and firewalls drop idle connections, so
+connections are recycled after SQLALCHEMY_POOL_RECYCLE seconds and
+checked with a cheap ping before use (pre-ping). A dropped connection is
+then replaced before the request runs, instead of failing it.
+"""
+import os
+import threading
+
+from sqlalchemy import event
+
+
+def _flag(name, default):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes')
+
+
+# Connections each worker keeps open
+SQLALCHEMY_POOL_SIZE = int(os.environ.get('SQLALCHEMY_POOL_SIZE', '5'))
+
+# Extra connections a worker may open under load, closed again when returned
+SQLALCHEMY_MAX_OVERFLOW = int(os.environ.get('SQLALCHEMY_MAX_OVERFLOW', '5'))
+
+# Seconds a request waits for a free connection before failing
+SQLALCHEMY_POOL_TIMEOUT = float(os.environ.get('SQLALCHEMY_POOL_TIMEOUT', '10'))
+
+# Seconds before a connection is replaced (-1 never)
+SQLALCHEMY_POOL_RECYCLE = int(os.environ.get('SQLALCHEMY_POOL_RECYCLE', '1800'))
+
+# Test each connection before handing it out
+SQLALCHEMY_POOL_PRE_PING = _flag('SQLALCHEMY_POOL_PRE_PING', 'true')
+
+# Milliseconds any one statement may run (0 for no limit)
+SQLALCHEMY_STATEMENT_TIMEOUT_MS = int(os.environ.get('SQLALCHEMY_STATEMENT_TIMEOUT_MS', '30000'))
+
+
+def postgres_engine_options():
+    """SQLALCHEMY_ENGINE_OPTIONS for a PostgreSQL DATABASE_URL, from the SQLALCHEMY_* settings"""
+    options = {
+        'pool_size': SQLALCHEMY_POOL_SIZE,
+        'max_overflow': SQLALCHEMY_MAX_OVERFLOW,
+        'pool_timeout': SQLALCHEMY_POOL_TIMEOUT,
+        'pool_recycle': SQLALCHEMY_POOL_RECYCLE,
+        'pool_pre_ping': SQLALCHEMY_POOL_PRE_PING,
+    }
+    if SQLALCHEMY_STATEMENT_TIMEOUT_MS:
+        # Set per connection by the server, so it also covers raw SQL
+        options['connect_args'] = {'options': f'-c statement_timeout={SQLALCHEMY_STATEMENT_TIMEOUT_MS}'}
+    return options
+
+
+class PoolStats:
+    """Counts of one engine's pool events since the worker started.
+
+    Args:
+        engine: Engine whose pool to watch
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidated = 0
+        self.peak_checked_out = 0
+        self._lock = threading.Lock()
+
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'invalidate', self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        checked_out = self._pool_value('checkedout')
+        with self._lock:
+            self.checkouts += 1
+            if checked_out is not None:
+                self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidated += 1
+
+    def _pool_value(self, name):
+        # Only QueuePool tracks sizes; SQLite in-memory databases use StaticPool
+        method = getattr(self.engine.pool, name, None)
+        return method() if callable(method) else None
+
+    def to_dict(self):
+        with self._lock:
+            counters = {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'invalidated': self.invalidated,
+                'peak_checked_out': self.peak_checked_out,
+            }
+        return {
+            'dialect': self.engine.dialect.name,
+            'pool': type(self.engine.pool).__name__,
+            'pid': os.getpid(),
+            'size': self._pool_value('size'),
+            'checked_in': self._pool_value('checkedin'),
+            'checked_out': self._pool_value('checkedout'),
+            'overflow': self._pool_value('overflow'),
+            **counters,
+        }
+
+
+def track_pool_stats(app, engine):
+    """Start counting pool events for an app's engine"""
+    app.extensions['db_pool_stats'] = PoolStats(engine)
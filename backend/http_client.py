@@ -0,0 +1,145 @@
+"""
+Shared HTTP client for outbound API calls (UPC providers, Pexels).
+
+Each gunicorn worker keeps one requests.Session, so repeat calls to the
+same API reuse a pooled keep-alive connection instead of paying for a new
+TCP and TLS handshake every time. Timeouts and retries are configured
+here, and every call is logged and counted per service in one place.
+"""
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', '3.05'))
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', '5'))
+
+# Retries for connection errors and 502/503/504 (never for 429, which
+# would only burn more of a provider's rate limit)
+HTTP_RETRIES = int(os.environ.get('HTTP_RETRIES', '2'))
+HTTP_RETRY_BACKOFF = float(os.environ.get('HTTP_RETRY_BACKOFF', '0.2'))
+
+# Connection pools per host and connections kept per pool; sized for the
+# UPC lookup thread pool plus request threads
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 10
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+_stats = defaultdict(lambda: {'requests': 0, 'errors': 0, 'total_ms': 0.0})
+_stats_lock = threading.Lock()
+
+
+def create_session():
+    """Create a session with pooled, retrying HTTP(S) adapters"""
+    retry = Retry(
+        total=HTTP_RETRIES,
+        connect=HTTP_RETRIES,
+        read=HTTP_RETRIES,
+        status=HTTP_RETRIES,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """Get this process's shared session, creating it on first use.
+
+    A forked worker gets its own session rather than sharing the parent's
+    sockets.
+    """
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = create_session()
+            _session_pid = os.getpid()
+        return _session
+
+
+def close_session():
+    """Close the shared session and its pooled connections"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def http_get(service, url, timeout=None, **kwargs):
+    """GET a URL through the shared session.
+
+    Args:
+        service: Short name of the API, used for logging and stats
+        url: URL to request
+        timeout: Upper bound in seconds on each of the connect and read
+            timeouts, e.g. the time left before a deadline
+        **kwargs: Passed to requests (params, headers, ...)
+
+    Returns:
+        requests.Response
+
+    Raises:
+        requests.RequestException: If the request fails after retries
+    """
+    connect_timeout, read_timeout = HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+    if timeout is not None:
+        connect_timeout, read_timeout = min(connect_timeout, timeout), min(read_timeout, timeout)
+
+    start = time.monotonic()
+    try:
+        response = get_session().get(url, timeout=(connect_timeout, read_timeout), **kwargs)
+    except requests.RequestException as e:
+        _record(service, start, error=True)
+        logging.warning("HTTP GET %s failed after %.0f ms: %s", service, (time.monotonic() - start) * 1000, e)
+        raise
+
+    _record(service, start, error=response.status_code >= 500)
+    logging.debug("HTTP GET %s -> %s in %.0f ms", service, response.status_code, (time.monotonic() - start) * 1000)
+    return response
+
+
+def _record(service, start, error):
+    elapsed_ms = (time.monotonic() - start) * 1000
+    with _stats_lock:
+        stats = _stats[service]
+        stats['requests'] += 1
+        stats['total_ms'] += elapsed_ms
+        if error:
+            stats['errors'] += 1
+
+
+def get_http_stats():
+    """Per-service call counts, errors and average latency for this process"""
+    with _stats_lock:
+        return {
+            service: {
+                'requests': stats['requests'],
+                'errors': stats['errors'],
+                'avg_ms': round(stats['total_ms'] / stats['requests'], 1) if stats['requests'] else 0.0,
+            }
+            for service, stats in _stats.items()
+        }
+
+
+def reset_http_stats():
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,184 @@
+"""
+Background import jobs.
+
+Large imports would otherwise run inside the request and hit the gunicorn
+timeout while tying up a worker. Instead the upload is saved to a temporary
+file, an ImportJob row is created, and the import runs on a small in-process
+thread pool. Progress is written to the job row after every committed batch,
+so any gunicorn worker can answer progress polls.
+
+A job only lives in the memory of the worker that queued it, so each job
+records that worker (host:pid). If the worker exits first (restart, deploy,
+crash), the job is marked failed and its upload deleted, both when a worker
+on the same host starts and when the job is polled.
+"""
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from models import db, ImportJob
+from importer import ItemImporter, ImportFormatError, import_csv_stream, import_json_stream, import_ndjson_stream
+
+# Concurrent imports per gunicorn worker
+IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS', '1'))
+
+ABANDONED_JOB_MESSAGE = 'Import was interrupted by a server restart. Please upload the file again.'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Get the shared import thread pool, creating it on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=IMPORT_WORKERS, thread_name_prefix='import-job')
+        return _executor
+
+
+def start_import_job(app, user_id, file, file_type):
+    """Save an uploaded file and queue it for import.
+
+    Args:
+        app: Flask application the job runs under
+        user_id: User performing the import
+        file: Uploaded FileStorage
+        file_type: 'csv', 'json' or 'ndjson'
+
+    Returns:
+        ImportJob: The queued job
+    """
+    fd, path = tempfile.mkstemp(prefix='freezer-import-', suffix=f'.{file_type}')
+    with os.fdopen(fd, 'wb') as saved:
+        file.save(saved)
+
+    job = ImportJob(user_id=user_id, file_type=file_type, filename=file.filename,
+                    worker=current_worker(), upload_path=path)
+    db.session.add(job)
+    db.session.commit()
+
+    get_executor().submit(run_import_job, app, job.id, path)
+    return job
+
+
+def current_worker():
+    """This process, as recorded on the jobs it runs"""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def worker_alive(worker):
+    """Whether the process a job was queued in may still be running it.
+
+    Processes on other hosts can't be checked and are assumed alive; a
+    worker starting on that host cleans up after them.
+    """
+    if not worker:
+        # Queued before jobs recorded their worker
+        return False
+    host, _, pid = worker.rpartition(':')
+    if host != socket.gethostname():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, but belongs to another user
+        return True
+    return True
+
+
+def remove_upload(path):
+    try:
+        os.remove(path)
+    except OSError:
+        logging.warning("Could not remove import upload %s", path)
+
+
+def fail_if_abandoned(job):
+    """Mark a queued or running job failed if its worker has exited (caller commits).
+
+    Returns:
+        bool: True if the job was abandoned
+    """
+    if job.status not in ('queued', 'running') or worker_alive(job.worker):
+        return False
+
+    logging.warning("Import job %s was abandoned by worker %s", job.id, job.worker)
+    job.status = 'failed'
+    job.message = ABANDONED_JOB_MESSAGE
+    job.finished_at = datetime.utcnow()
+    if job.upload_path and os.path.exists(job.upload_path):
+        remove_upload(job.upload_path)
+    return True
+
+
+def fail_abandoned_import_jobs():
+    """Fail every queued or running job whose worker has exited; run when a worker starts
+
+    Returns:
+        int: Number of jobs failed
+    """
+    jobs = ImportJob.query.filter(ImportJob.status.in_(('queued', 'running'))).all()
+    abandoned = sum(fail_if_abandoned(job) for job in jobs)
+    db.session.commit()
+    return abandoned
+
+
+def run_import_job(app, job_id, path):
+    """Run a queued import job to completion (executes on the thread pool)"""
+    with app.app_context():
+        job = db.session.get(ImportJob, job_id)
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+
+        importer = None
+
+        def report_progress(importer):
+            job.rows_processed = importer.processed
+            job.imported = importer.imported
+            job.skipped = importer.skipped
+            job.errors = json.dumps(importer.errors)
+            db.session.commit()
+
+        try:
+            with open(path, 'rb') as stream:
+                if job.file_type == 'csv':
+                    importer = ItemImporter(job.user_id, label='Row', on_flush=report_progress)
+                    import_csv_stream(stream, importer)
+                elif job.file_type == 'ndjson':
+                    importer = ItemImporter(job.user_id, label='Line', on_flush=report_progress)
+                    import_ndjson_stream(stream, importer)
+                else:
+                    importer = ItemImporter(job.user_id, label='Item', on_flush=report_progress)
+                    import_json_stream(stream, importer)
+
+            job.status = 'completed'
+
+        except ImportFormatError as e:
+            db.session.rollback()
+            job.status = 'failed'
+            job.message = str(e)
+
+        except Exception:
+            db.session.rollback()
+            # Log detailed error including stack trace, but only store a generic message
+            logging.exception("Import job %s failed", job_id)
+            job.status = 'failed'
+            job.message = 'Failed to import CSV' if job.file_type == 'csv' else 'Failed to import JSON'
+
+        finally:
+            job.finished_at = datetime.utcnow()
+            if importer is not None:
+                report_progress(importer)
+            else:
+                db.session.commit()
+
+            remove_upload(path)
@@ -0,0 +1,440 @@
+"""
+Bulk import engine for CSV and JSON item imports.
+
+Category names and existing QR codes are loaded once up front, rows are
+validated in Python and inserted with executemany in fixed-size batches,
+and each batch is committed on its own so a large import never holds one
+huge transaction open.
+"""
+import csv
+import io
+import json
+import logging
+import re
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+from models import db, Item, Category
+from qr_codes import qr_code_for_index, reserve_qr_code_indexes
+from category_catalog import mark_categories_changed, invalidate_category_catalog
+from item_events import RESYNC, publish_item_event
+
+# Rows inserted (and committed) per batch
+IMPORT_BATCH_SIZE = 500
+
+# Only the first few per-row errors are shown to the user
+MAX_REPORTED_ERRORS = 10
+
+
+def parse_import_date(value):
+    """Parse an ISO date string from an import file, or None if unparseable"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+
+
+def csv_row_to_item_data(row):
+    """Map a CSV row (export column headers) to the JSON import field names"""
+    return {
+        'qr_code': row.get('QR Code'),
+        'upc': row.get('UPC'),
+        'name': row.get('Name'),
+        'category': row.get('Category'),
+        'source': row.get('Source'),
+        'weight': float(row['Weight']) if row.get('Weight') else None,
+        'weight_unit': row.get('Weight Unit'),
+        'added_date': row.get('Added Date'),
+        'expiration_date': row.get('Expiration Date'),
+        'status': row.get('Status'),
+        'removed_date': row.get('Removed Date'),
+        'notes': row.get('Notes'),
+    }
+
+
+class ItemImporter:
+    """Accumulates imported rows and writes them to the database in batches.
+
+    Usage:
+        importer = ItemImporter(user_id, label='Row')
+        for row_num, row in rows:
+            importer.add(row_num, lambda: csv_row_to_item_data(row))
+        summary = importer.finish()
+
+    Args:
+        user_id: User the imported items (and any new categories) belong to
+        label: Prefix for per-row error messages, e.g. 'Row' or 'Item'
+        batch_size: Rows per INSERT/commit
+        on_flush: Optional callback(importer) run after each batch is
+            committed, used to report progress
+    """
+
+    def __init__(self, user_id, label='Row', batch_size=None, on_flush=None):
+        self.user_id = user_id
+        self.label = label
+        self.batch_size = batch_size or IMPORT_BATCH_SIZE
+        self.on_flush = on_flush
+
+        self.processed = 0
+        self.imported = 0
+        self.skipped = 0
+        self.errors = []
+
+        self._pending = []
+
+        # One query each instead of two per row
+        self._category_ids = {
+            name: category_id
+            for category_id, name in db.session.execute(db.select(Category.id, Category.name))
+        }
+        self._qr_codes = set(db.session.execute(db.select(Item.qr_code)).scalars())
+        self._qr_code_indexes = deque()
+
+    def _error(self, message):
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(message)
+
+    def _category_id(self, name):
+        """Look up a category by name, creating it if it doesn't exist"""
+        if name not in self._category_ids:
+            category = Category(
+                name=name,
+                default_expiration_days=180,
+                created_by_user_id=self.user_id
+            )
+            db.session.add(category)
+            mark_categories_changed()
+            # Committed straight away so a failed item batch can't roll it back
+            db.session.commit()
+            invalidate_category_catalog()
+            self._category_ids[name] = category.id
+
+        return self._category_ids[name]
+
+    def _unused_qr_code(self):
+        qr_code = self._next_qr_code()
+        while qr_code in self._qr_codes:
+            qr_code = self._next_qr_code()
+        return qr_code
+
+    def _next_qr_code(self):
+        if not self._qr_code_indexes:
+            self._qr_code_indexes = deque(reserve_qr_code_indexes(self.batch_size))
+            # Committed straight away so a failed item batch can't return the
+            # positions to the pool while this import still holds them
+            db.session.commit()
+        return qr_code_for_index(self._qr_code_indexes.popleft())
+
+    def add(self, row_num, get_item_data):
+        """Validate one row and queue it for insertion.
+
+        Args:
+            row_num: Row/item number used in error messages
+            get_item_data: Callable returning the row in JSON import field
+                names; called here so parse errors count against the row
+        """
+        self.processed += 1
+
+        try:
+            item_data = get_item_data()
+
+            qr_code = item_data.get('qr_code') or self._unused_qr_code()
+
+            # Check if item already exists (in the database or earlier in this file)
+            if qr_code in self._qr_codes:
+                self.skipped += 1
+                self._error(f"{self.label} {row_num}: QR code '{qr_code}' already exists")
+                return
+
+            category_id = None
+            if item_data.get('category'):
+                category_id = self._category_id(item_data['category'])
+
+            row = {
+                'qr_code': qr_code,
+                'upc': item_data.get('upc') or None,
+                'image_url': item_data.get('image_url') or None,
+                'name': item_data.get('name') or 'Unnamed Item',
+                'source': item_data.get('source') or None,
+                'weight': item_data.get('weight'),
+                'weight_unit': item_data.get('weight_unit') or 'lb',
+                'category_id': category_id,
+                'added_date': parse_import_date(item_data.get('added_date')) or datetime.utcnow(),
+                'expiration_date': parse_import_date(item_data.get('expiration_date')),
+                'status': item_data.get('status') or 'in_freezer',
+                'removed_date': parse_import_date(item_data.get('removed_date')),
+                'notes': item_data.get('notes') or None,
+                'added_by_user_id': self.user_id,
+            }
+        except Exception:
+            # Log detailed error including stack trace, but do not expose it to the client
+            logging.exception("Error importing %s %s", self.label.lower(), row_num)
+            self.skipped += 1
+            self._error(f"{self.label} {row_num}: Failed to import {self.label.lower()}")
+            return
+
+        self._qr_codes.add(qr_code)
+        self._pending.append((row_num, row))
+
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Insert and commit the queued rows"""
+        self._write_pending()
+        if self.on_flush:
+            self.on_flush(self)
+
+    def _write_pending(self):
+        if not self._pending:
+            db.session.commit()
+            return
+
+        pending, self._pending = self._pending, []
+
+        try:
+            db.session.execute(db.insert(Item), [row for _, row in pending])
+            db.session.commit()
+            self.imported += len(pending)
+            return
+        except Exception:
+            db.session.rollback()
+            logging.warning("Batch insert failed, retrying %d rows individually", len(pending), exc_info=True)
+
+        # Fall back to one row at a time so a single bad row is reported
+        # without losing the rest of the batch
+        for row_num, row in pending:
+            try:
+                db.session.execute(db.insert(Item), [row])
+                db.session.commit()
+                self.imported += 1
+            except Exception:
+                db.session.rollback()
+                logging.exception("Error importing %s %s", self.label.lower(), row_num)
+                self.skipped += 1
+                self._error(f"{self.label} {row_num}: Failed to import {self.label.lower()}")
+
+    def finish(self):
+        """Write any remaining rows and return the import summary"""
+        self.flush()
+        if self.imported:
+            # One event for the whole import; open inventory pages reload
+            publish_item_event(RESYNC)
+            db.session.commit()
+        return self.summary()
+
+    def summary(self):
+        return {
+            'success': True,
+            'imported': self.imported,
+            'skipped': self.skipped,
+            'errors': self.errors
+        }
+
+
+class ImportFormatError(ValueError):
+    """Raised when an import file doesn't have the expected structure"""
+
+
+# Characters read from an upload at a time when parsing JSON
+JSON_READ_CHUNK_SIZE = 64 * 1024
+
+_json_decoder = json.JSONDecoder()
+_json_whitespace = re.compile(r'[ \t\n\r]*')
+
+
+@contextmanager
+def text_stream(stream, **kwargs):
+    """Decode a binary upload stream as UTF-8 text without reading it all.
+
+    The wrapper is detached afterwards so the underlying upload isn't closed
+    out from under its owner.
+    """
+    wrapper = io.TextIOWrapper(stream, encoding='utf-8-sig', **kwargs)
+    try:
+        yield wrapper
+    finally:
+        wrapper.detach()
+
+
+class JSONTokenReader:
+    """Reads JSON values one at a time from a text stream.
+
+    Only the unconsumed tail of the input is kept in memory, so a document
+    can be walked value by value regardless of its total size.
+    """
+
+    def __init__(self, stream, chunk_size=None):
+        self.stream = stream
+        self.chunk_size = chunk_size or JSON_READ_CHUNK_SIZE
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        """Append the next chunk of input; returns False at end of input"""
+        if self.eof:
+            return False
+
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+
+        # Drop the text that has already been consumed
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character, or '' at end of input"""
+        while True:
+            self.pos = _json_whitespace.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def take(self, expected):
+        """Consume the next non-whitespace character, which must be one of expected"""
+        char = self.peek()
+        if not char or char not in expected:
+            raise ValueError(f'Malformed JSON: expected one of {expected!r}, found {char!r}')
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode and consume the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = _json_decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Value is cut off at the end of the buffer
+                if self._fill():
+                    continue
+                raise
+
+            # A value ending exactly at the buffer edge (e.g. a number) may continue in the next chunk
+            if end == len(self.buffer) and self._fill():
+                continue
+
+            self.pos = end
+            return value
+
+
+def iter_json_items(stream, chunk_size=None):
+    """Yield the elements of the top-level "items" array of a JSON document.
+
+    Other top-level keys (exported_at, total_items, ...) are skipped.
+
+    Args:
+        stream: Text stream containing a {"items": [...]} document
+
+    Raises:
+        ImportFormatError: If the document isn't an object with an "items" list
+        ValueError: If the document is not valid JSON
+    """
+    format_error = 'Invalid JSON format. Expected {"items": [...]}'
+    reader = JSONTokenReader(stream, chunk_size)
+
+    if reader.peek() != '{':
+        raise ImportFormatError(format_error)
+    reader.take('{')
+
+    found_items = False
+    if reader.peek() != '}':
+        while True:
+            key = reader.value()
+            if not isinstance(key, str):
+                raise ValueError('Malformed JSON: object keys must be strings')
+            reader.take(':')
+
+            if key == 'items' and not found_items:
+                if reader.peek() != '[':
+                    raise ImportFormatError(format_error)
+                reader.take('[')
+                found_items = True
+
+                if reader.peek() == ']':
+                    reader.take(']')
+                else:
+                    while True:
+                        yield reader.value()
+                        if reader.take(',]') == ']':
+                            break
+            else:
+                reader.value()
+
+            if reader.take(',}') == '}':
+                break
+    else:
+        reader.take('}')
+
+    if not found_items:
+        raise ImportFormatError(format_error)
+
+
+def import_csv_stream(stream, importer):
+    """Import every row of a CSV upload.
+
+    Rows are decoded and parsed as they are read, so memory use doesn't
+    grow with the size of the file.
+
+    Args:
+        stream: Binary file object with UTF-8 CSV data
+        importer: ItemImporter to feed rows into
+
+    Returns:
+        dict: Import summary
+    """
+    with text_stream(stream, newline='') as text:
+        csv_reader = csv.DictReader(text)
+
+        for row_num, row in enumerate(csv_reader, start=2):
+            importer.add(row_num, lambda: csv_row_to_item_data(row))
+
+    return importer.finish()
+
+
+def import_json_stream(stream, importer):
+    """Import every item of a JSON upload shaped like {"items": [...]}.
+
+    The document is parsed incrementally, one item at a time.
+
+    Args:
+        stream: Binary file object with JSON data
+        importer: ItemImporter to feed items into
+
+    Returns:
+        dict: Import summary
+
+    Raises:
+        ImportFormatError: If the document has no "items" list
+    """
+    with text_stream(stream) as text:
+        for idx, item_data in enumerate(iter_json_items(text), start=1):
+            importer.add(idx, lambda: item_data)
+
+    return importer.finish()
+
+
+def import_ndjson_stream(stream, importer):
+    """Import an NDJSON upload (one item object per line, as exported with format=ndjson).
+
+    Args:
+        stream: Binary file object with UTF-8 NDJSON data
+        importer: ItemImporter to feed items into; errors are reported by line
+
+    Returns:
+        dict: Import summary
+    """
+    with text_stream(stream) as text:
+        for line_num, line in enumerate(text, start=1):
+            if line.strip():
+                importer.add(line_num, lambda: json.loads(line))
+
+    return importer.finish()
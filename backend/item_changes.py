@@ -0,0 +1,249 @@
+"""
+Change tracking for the items table: list validators and delta sync.
+
+A list's validator combines max(updated_at) and the row count of the
+filtered set. Inserts and updates move updated_at, but a delete can leave
+both unchanged (e.g. deleting an older row while adding another), so
+every delete also bumps the 'items' counter in cache_versions and that
+counter is part of the validator too.
+
+That aggregate reads the whole filtered set, so paginated responses are
+validated by the rows on the page instead (item_page_etag): their ids and
+updated_at values, plus the same counter.
+
+Delta sync (GET /api/items/changes) returns items whose updated_at is
+past the client's cursor, plus the ids of items deleted since then, read
+from item_tombstones. Anything that deletes items must go through
+record_item_deletions() or delete_items() so both stay correct (and so
+live subscribers get a 'deleted' event, see item_events.py).
+Replacing the whole database (restoring a backup) calls
+mark_items_reset(), which makes every outstanding cursor resync in full.
+"""
+import base64
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from cache_versions import bump_cache_version, get_cache_version
+from item_events import DELETED, RESYNC, publish_item_event
+from models import db, Item, ItemTombstone, CacheVersion
+
+ITEMS_VERSION = 'items'
+ITEMS_RESET_VERSION = 'items_reset'
+
+# Cursors stay this many seconds behind the clock, so a change written just
+# before a sync but committed just after it is still picked up next time.
+# Changes inside the window may be sent twice; clients apply them as upserts.
+ITEM_CHANGES_SETTLE_SECONDS = float(os.environ.get('ITEM_CHANGES_SETTLE_SECONDS', '2'))
+
+# Days tombstones are kept; clients with older cursors get a full resync
+ITEM_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('ITEM_TOMBSTONE_RETENTION_DAYS', '30'))
+
+# Ids per DELETE ... WHERE id IN (...) when bulk deleting
+DELETE_BATCH_SIZE = 500
+
+
+def mark_items_deleted():
+    """Bump the items version as part of the current transaction"""
+    bump_cache_version(ITEMS_VERSION)
+
+
+def mark_item_users_changed():
+    """Bump the items version as part of the current transaction after a
+    user is renamed or deleted, which changes added_by_username in item
+    lists without touching the items themselves"""
+    bump_cache_version(ITEMS_VERSION)
+
+
+def record_item_deletions(item_ids):
+    """Write tombstones for deleted items as part of the current transaction.
+
+    Also prunes tombstones past the retention period, bumps the items
+    version so cached list validators change, and publishes a deleted event.
+
+    Args:
+        item_ids: Ids of the items being deleted
+    """
+    now = datetime.utcnow()
+    if item_ids:
+        db.session.execute(
+            db.insert(ItemTombstone),
+            [{'item_id': item_id, 'deleted_at': now} for item_id in item_ids]
+        )
+
+    db.session.execute(
+        db.delete(ItemTombstone).where(ItemTombstone.deleted_at < now - timedelta(days=ITEM_TOMBSTONE_RETENTION_DAYS))
+    )
+    mark_items_deleted()
+    if item_ids:
+        publish_item_event(DELETED, item_ids=item_ids)
+
+
+def delete_items(query):
+    """Bulk-delete the items matched by a query, leaving tombstones.
+
+    Only the rows whose tombstones were written are deleted, so an item
+    added concurrently can't disappear without one.
+
+    Args:
+        query: Item query selecting the rows to delete
+
+    Returns:
+        int: Number of items deleted
+    """
+    item_ids = [item_id for (item_id,) in query.order_by(None).with_entities(Item.id)]
+    record_item_deletions(item_ids)
+
+    deleted = 0
+    for start in range(0, len(item_ids), DELETE_BATCH_SIZE):
+        batch = item_ids[start:start + DELETE_BATCH_SIZE]
+        deleted += Item.query.filter(Item.id.in_(batch)).delete(synchronize_session=False)
+    return deleted
+
+
+def mark_items_reset(previous_versions):
+    """Invalidate every sync cursor, list validator and live view after the items were replaced wholesale.
+
+    A restored database brings back its own, older reset generation, so
+    the new generation is set past both that and the one before the
+    restore; bumping the restored value could repeat a generation clients
+    already hold cursors for (e.g. when restoring the same backup twice).
+
+    Args:
+        previous_versions: read_cache_versions() from before the database
+            was replaced
+    """
+    restored_generation = get_cache_version(ITEMS_RESET_VERSION)
+    generation = max(previous_versions.get(ITEMS_RESET_VERSION, 0), restored_generation) + 1
+    db.session.merge(CacheVersion(name=ITEMS_RESET_VERSION, version=generation))
+    mark_items_deleted()
+    publish_item_event(RESYNC)
+
+
+def item_list_etag(query, *extra):
+    """Validator for the items matched by a query.
+
+    Args:
+        query: Filtered Item query (ordering and eager loads are ignored)
+        *extra: Anything else the response depends on, e.g. the category
+            catalog's etag and the request's query string
+
+    Returns:
+        Hex digest that changes whenever an item in the set is added,
+        changed or removed
+    """
+    # One round trip: the version is read as a scalar subquery
+    version = db.select(CacheVersion.version).where(CacheVersion.name == ITEMS_VERSION).scalar_subquery()
+    last_updated, count, version = query.order_by(None).with_entities(
+        func.max(Item.updated_at), func.count(Item.id), version
+    ).one()
+
+    parts = [last_updated.isoformat() if last_updated else '', count, version or 0, *extra]
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def item_page_etag(items, *extra):
+    """Validator for a page of items the request has already fetched.
+
+    Costs one counter read rather than a scan of the filtered set. An item
+    added to, changed on or removed from the page changes the ids or
+    updated_at values seen; deletes and user renames also bump the counter.
+
+    Args:
+        items: The page's Items, including any row fetched only to tell
+            whether there is a next page
+        *extra: As for item_list_etag
+
+    Returns:
+        Hex digest of the page's rows, the items version and extra
+    """
+    rows = ','.join(f"{item.id}:{item.updated_at.isoformat() if item.updated_at else ''}" for item in items)
+    parts = [rows, get_cache_version(ITEMS_VERSION), *extra]
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def encode_changes_cursor(since, generation):
+    """Encode a sync position as an opaque cursor"""
+    payload = json.dumps({'t': since.isoformat(), 'g': generation}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_changes_cursor(cursor):
+    """Decode a cursor produced by encode_changes_cursor.
+
+    Returns:
+        tuple: (since datetime, reset generation)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        generation = payload['g']
+        if not isinstance(generation, int):
+            raise ValueError('Invalid cursor generation')
+        since = datetime.fromisoformat(payload['t'])
+    except (KeyError, TypeError, UnicodeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+    return since, generation
+
+
+def item_changes_since(cursor=None):
+    """Items changed and deleted since a sync cursor.
+
+    Args:
+        cursor: Cursor from a previous sync, or None for a full sync
+
+    Returns:
+        dict with
+            items: Items created or updated since the cursor (all items if reset)
+            deleted: Ids of items deleted since the cursor and not re-created
+            cursor: Cursor to send next time
+            reset: True if this is a full snapshot and the client should
+                drop any items not in it
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    now = datetime.utcnow()
+    generation = get_cache_version(ITEMS_RESET_VERSION)
+
+    since = None
+    if cursor:
+        since, cursor_generation = decode_changes_cursor(cursor)
+        tombstones_pruned = since < now - timedelta(days=ITEM_TOMBSTONE_RETENTION_DAYS)
+        if cursor_generation != generation or tombstones_pruned:
+            since = None
+
+    query = Item.list_query()
+    deleted = []
+    if since is not None:
+        query = query.filter(Item.updated_at > since)
+        deleted = db.session.execute(
+            db.select(ItemTombstone.item_id)
+            .where(ItemTombstone.deleted_at > since)
+            .order_by(ItemTombstone.id)
+        ).scalars().all()
+
+    items = query.order_by(Item.updated_at.asc(), Item.id.asc()).all()
+
+    # A deleted id may have been reused by a newer item (SQLite can reuse the
+    # highest rowid); the item itself wins
+    item_ids = {item.id for item in items}
+    deleted = list(dict.fromkeys(item_id for item_id in deleted if item_id not in item_ids))
+
+    next_since = now - timedelta(seconds=ITEM_CHANGES_SETTLE_SECONDS)
+    if since is not None:
+        next_since = max(next_since, since)
+
+    return {
+        'items': items,
+        'deleted': deleted,
+        'cursor': encode_changes_cursor(next_since, generation),
+        'reset': since is None,
+    }
@@ -0,0 +1,324 @@
+"""
+Live item change events, pushed to browsers over Server-Sent Events.
+
+Routes that change items call publish_item_event() before committing,
+which adds a row to item_events in the same transaction. That table is the
+only channel between gunicorn workers: each worker runs one poller thread
+(only while it has open streams) that reads new rows every
+ITEM_EVENTS_POLL_INTERVAL seconds and fans them out to its subscribers, so
+the database sees one small query per worker per interval however many
+browsers are connected.
+
+An event's SSE id is its row id. A browser that reconnects sends the last
+id it saw as Last-Event-ID and is sent everything after it; if those
+events have been pruned (or the database was replaced) it gets a 'resync'
+event instead and should reload its items.
+
+Events near the end of the log may be delivered twice (see
+ITEM_EVENTS_OVERLAP_SECONDS), so clients apply them idempotently and ignore
+an item older than the copy they have (compare updated_at).
+
+Events older than ITEM_EVENT_RETENTION_HOURS are deleted by the poller
+thread every ITEM_EVENTS_PRUNE_INTERVAL seconds (and once when a worker
+starts), not by the writes that add them.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func
+
+from models import db, ItemEvent
+
+CREATED = 'created'
+UPDATED = 'updated'
+STATUS = 'status'
+DELETED = 'deleted'
+RESYNC = 'resync'
+
+# Seconds between each worker's reads of the event log
+ITEM_EVENTS_POLL_INTERVAL = float(os.environ.get('ITEM_EVENTS_POLL_INTERVAL', '1'))
+
+# Seconds between keep-alive comments on an idle stream
+ITEM_EVENTS_HEARTBEAT = float(os.environ.get('ITEM_EVENTS_HEARTBEAT', '15'))
+
+# Streams end after this many seconds and the browser reconnects (with
+# Last-Event-ID), so long-lived connections re-authenticate regularly
+ITEM_EVENTS_STREAM_SECONDS = float(os.environ.get('ITEM_EVENTS_STREAM_SECONDS', '300'))
+
+# Open streams per gunicorn worker; each one holds a worker thread
+ITEM_EVENTS_MAX_STREAMS = int(os.environ.get('ITEM_EVENTS_MAX_STREAMS', '4'))
+
+# Hours events are kept for reconnecting browsers
+ITEM_EVENT_RETENTION_HOURS = int(os.environ.get('ITEM_EVENT_RETENTION_HOURS', '24'))
+
+# Seconds between each worker's deletes of events past retention
+ITEM_EVENTS_PRUNE_INTERVAL = float(os.environ.get('ITEM_EVENTS_PRUNE_INTERVAL', '300'))
+
+# Events each worker buffers for subscribers that haven't caught up yet
+ITEM_EVENTS_BUFFER = 1000
+
+# Events this recent are re-read on every poll, in case a transaction that
+# took an earlier id committed after a later one (PostgreSQL sequences)
+ITEM_EVENTS_OVERLAP_SECONDS = 2
+
+# Browsers wait this long (ms) before reconnecting a dropped stream
+ITEM_EVENTS_RETRY_MS = 3000
+
+
+def publish_item_event(action, item=None, item_ids=None, changes=None, items=None):
+    """Add an item event to the current transaction.
+
+    Args:
+        action: CREATED, UPDATED, STATUS, DELETED or RESYNC
+        item: The changed Item, for created/updated/status events
+        items: Serialized items (Item.to_dict()), for created events
+            covering many items at once
+        item_ids: Ids of the removed items, for deleted events
+        changes: Partial item dicts (id plus changed fields), for status
+            events covering many items at once
+    """
+    payload = {}
+    if item is not None:
+        # Flush so a new item has its id and defaults, and an updated one its new updated_at
+        db.session.flush()
+        payload['item'] = item.to_dict()
+    if item_ids is not None:
+        payload['item_ids'] = list(item_ids)
+    if changes is not None:
+        payload['changes'] = changes
+    if items is not None:
+        payload['items'] = items
+
+    db.session.add(ItemEvent(action=action, payload=json.dumps(payload), created_at=datetime.utcnow()))
+
+
+def prune_item_events():
+    """Delete events older than ITEM_EVENT_RETENTION_HOURS and commit.
+
+    Returns:
+        int: Number of events deleted
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=ITEM_EVENT_RETENTION_HOURS)
+    deleted = db.session.execute(db.delete(ItemEvent).where(ItemEvent.created_at < cutoff)).rowcount
+    db.session.commit()
+    return deleted
+
+
+def event_dict(row):
+    return {'id': row.id, 'action': row.action, **json.loads(row.payload)}
+
+
+def resync_event():
+    return {'id': None, 'action': RESYNC}
+
+
+def read_item_events(after_id):
+    """Events with an id above after_id, plus any written in the last few seconds"""
+    recent = datetime.utcnow() - timedelta(seconds=ITEM_EVENTS_OVERLAP_SECONDS)
+    rows = db.session.execute(
+        db.select(ItemEvent)
+        .where(db.or_(ItemEvent.id > after_id, ItemEvent.created_at >= recent))
+        .order_by(ItemEvent.id)
+    ).scalars()
+    return [event_dict(row) for row in rows]
+
+
+def item_events_since(last_event_id):
+    """Events after a browser's Last-Event-ID, or a single resync event if some are gone"""
+    oldest, newest = db.session.execute(db.select(func.min(ItemEvent.id), func.max(ItemEvent.id))).one()
+
+    if newest is None:
+        return [resync_event()] if last_event_id else []
+    if last_event_id > newest or oldest > last_event_id + 1:
+        return [resync_event()]
+    return read_item_events(last_event_id)
+
+
+def format_event(event):
+    """Encode an event in the text/event-stream format"""
+    lines = []
+    if event.get('id') is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['action']}")
+    lines.append(f"data: {json.dumps(event)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+class ItemEventBroker:
+    """Fans the event log out to one worker's open streams.
+
+    Args:
+        app: Flask app the poller thread runs under
+        max_streams: Streams accepted at once (default ITEM_EVENTS_MAX_STREAMS)
+    """
+
+    def __init__(self, app, max_streams=None):
+        self.app = app
+        self.max_streams = ITEM_EVENTS_MAX_STREAMS if max_streams is None else max_streams
+        self._cond = threading.Condition()
+        self._events = deque(maxlen=ITEM_EVENTS_BUFFER)  # (position, event)
+        self._position = 0
+        self._subscribers = 0
+        self._last_id = None
+        self._seen = deque(maxlen=ITEM_EVENTS_BUFFER)
+        self._next_prune = 0
+        self._thread = None
+
+    def subscribe(self):
+        """Register a stream.
+
+        Must be called with an app context; the first subscriber starts the
+        poller from the current end of the log.
+
+        Returns:
+            Position to pass to wait(), or None if the worker is at capacity
+        """
+        with self._cond:
+            if self._subscribers >= self.max_streams:
+                return None
+
+            if self._last_id is None:
+                newest = db.session.execute(db.select(func.max(ItemEvent.id))).scalar() or 0
+                # Events in the overlap window up to here predate this stream
+                self._seen.clear()
+                self._seen.extend(event['id'] for event in read_item_events(newest) if event['id'] <= newest)
+                self._last_id = newest
+
+            self._subscribers += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='item-events', daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+            return self._position
+
+    def unsubscribe(self):
+        with self._cond:
+            self._subscribers -= 1
+
+    def wait(self, position, timeout):
+        """Wait for events after a position.
+
+        Returns:
+            tuple: (events, new position); a subscriber that fell behind the
+            buffer gets a single resync event
+        """
+        with self._cond:
+            if self._position == position:
+                self._cond.wait(timeout)
+
+            if self._events and self._events[0][0] > position + 1:
+                return [resync_event()], self._position
+            return [event for event_position, event in self._events if event_position > position], self._position
+
+    def poll(self):
+        """Read new events from the log and hand them to subscribers"""
+        last_id = self._last_id
+        if last_id is None:
+            return
+
+        events = [event for event in read_item_events(last_id) if event['id'] not in self._seen]
+
+        if not events:
+            newest = db.session.execute(db.select(func.max(ItemEvent.id))).scalar() or 0
+            if newest < last_id:
+                # The database was replaced (backup restored)
+                self._last_id = newest
+                self._deliver([resync_event()])
+            return
+
+        self._seen.extend(event['id'] for event in events)
+        self._last_id = max(last_id, max(event['id'] for event in events))
+        self._deliver(events)
+
+    def prune_if_due(self):
+        """Prune the event log if ITEM_EVENTS_PRUNE_INTERVAL has passed since this worker last did"""
+        now = time.monotonic()
+        if now < self._next_prune:
+            return
+        self._next_prune = now + ITEM_EVENTS_PRUNE_INTERVAL
+        prune_item_events()
+
+    def _deliver(self, events):
+        with self._cond:
+            for event in events:
+                self._position += 1
+                self._events.append((self._position, event))
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._subscribers:
+                    # Idle: the next subscriber restarts from the end of the log
+                    self._last_id = None
+                    self._cond.wait(ITEM_EVENTS_PRUNE_INTERVAL)
+                active = self._subscribers > 0
+
+            if active:
+                try:
+                    with self.app.app_context():
+                        self.poll()
+                except Exception:
+                    logging.exception("Failed to read item events")
+
+            try:
+                with self.app.app_context():
+                    self.prune_if_due()
+            except Exception:
+                logging.exception("Failed to prune item events")
+
+            if active:
+                time.sleep(ITEM_EVENTS_POLL_INTERVAL)
+
+
+def get_item_event_broker():
+    """Get the current app's event broker, creating it on first use"""
+    broker = current_app.extensions.get('item_event_broker')
+    if broker is None:
+        broker = current_app.extensions.setdefault('item_event_broker', ItemEventBroker(current_app._get_current_object()))
+    return broker
+
+
+def item_event_stream(broker, position, last_event_id=None):
+    """Generate a text/event-stream body for one subscriber.
+
+    Args:
+        broker: ItemEventBroker the stream was subscribed to
+        position: Position returned by broker.subscribe()
+        last_event_id: Id of the last event the browser saw, if reconnecting
+
+    Yields:
+        Encoded events, and keep-alive comments while idle, until
+        ITEM_EVENTS_STREAM_SECONDS have passed
+    """
+    yield f'retry: {ITEM_EVENTS_RETRY_MS}\n\n'
+
+    caught_up = set()
+    if last_event_id is not None:
+        events = item_events_since(last_event_id)
+        caught_up = {event['id'] for event in events}
+        if events:
+            yield ''.join(format_event(event) for event in events)
+
+    # Don't hold a database connection for the life of the stream
+    db.session.remove()
+
+    deadline = time.monotonic() + ITEM_EVENTS_STREAM_SECONDS
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+
+        events, position = broker.wait(position, min(ITEM_EVENTS_HEARTBEAT, remaining))
+        events = [event for event in events if event['id'] is None or event['id'] not in caught_up]
+
+        if events:
+            yield ''.join(format_event(event) for event in events)
+        else:
+            yield ': keep-alive\n\n'
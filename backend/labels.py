@@ -0,0 +1,228 @@
+"""
+QR code label rendering for printable PDFs.
+
+QR codes are drawn straight onto the reportlab canvas as filled vector
+rectangles instead of being rendered to a PNG and embedded as an image.
+That skips a PNG encode/decode per label, keeps PDFs small, and prints
+sharp at any resolution.
+
+Computing the QR module matrices is the CPU-heavy part of a large sheet.
+It can be split page by page across a process pool (LABEL_WORKERS), with
+the results drawn onto a single canvas in order. The pool is off by
+default: with vector drawing, sending matrices back from the pool costs
+about as much as computing them, so benchmark_labels.py shows no speedup
+on typical hosts, and each gunicorn worker would keep its own pool
+processes running.
+"""
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import qrcode
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas as pdf_canvas
+
+# Quiet zone around label QR codes, in modules
+LABEL_QR_BORDER = 2
+
+# Label sheet layout
+LABEL_SIZE = 1.5 * inch
+LABEL_GAP = 0.25 * inch
+LABEL_MARGIN = 0.5 * inch
+
+# Processes used to compute QR codes for large print runs (0 disables the pool);
+# only worth enabling where benchmark_labels.py shows a speedup
+LABEL_WORKERS = int(os.environ.get('LABEL_WORKERS', '0'))
+
+# Smaller runs are computed in-process; starting pool work costs more than it saves
+PARALLEL_LABEL_THRESHOLD = 100
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def qr_matrix(data, border=LABEL_QR_BORDER):
+    """Compute the module matrix for a QR code.
+
+    Args:
+        data: Text to encode
+        border: Quiet zone width in modules
+
+    Returns:
+        list: Rows of booleans, True for dark modules (quiet zone included)
+    """
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        border=border,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr.get_matrix()
+
+
+def draw_qr_matrix(canvas, matrix, x, y, size):
+    """Draw a QR module matrix as vector rectangles.
+
+    Horizontal runs of dark modules are merged into one rectangle, so a
+    label costs a few hundred path operations rather than an image.
+
+    Args:
+        canvas: reportlab canvas
+        matrix: Module matrix from qr_matrix()
+        x, y: Bottom-left corner of the code, in points
+        size: Width and height of the code (quiet zone included), in points
+    """
+    module = size / len(matrix)
+    path = canvas.beginPath()
+
+    for row_index, row in enumerate(matrix):
+        # PDF y runs bottom-up, the matrix top-down
+        row_y = y + size - (row_index + 1) * module
+        run_start = None
+
+        for col_index, dark in enumerate(row + [False]):
+            if dark and run_start is None:
+                run_start = col_index
+            elif not dark and run_start is not None:
+                path.rect(x + run_start * module, row_y, (col_index - run_start) * module, module)
+                run_start = None
+
+    canvas.saveState()
+    canvas.setFillColorRGB(0, 0, 0)
+    canvas.drawPath(path, stroke=0, fill=1)
+    canvas.restoreState()
+
+
+def labels_per_page(page_size=letter):
+    """Number of labels that fit on one sheet (row-major, top to bottom)"""
+    page_width, page_height = page_size
+    per_row = int((page_width - 2 * LABEL_MARGIN) / (LABEL_SIZE + LABEL_GAP))
+    # A row is placed while its bottom edge stays above the bottom margin
+    rows = int((page_height - 2 * LABEL_MARGIN - LABEL_SIZE) / (LABEL_SIZE + LABEL_GAP)) + 1
+    return per_row * rows
+
+
+def get_label_pool(workers):
+    """Get the shared QR computation process pool of a given size, creating it on first use.
+
+    Workers are spawned rather than forked so they don't inherit the
+    parent's threads, database connections or open sockets.
+    """
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pools[workers]
+
+
+def compute_qr_matrices(data, workers=None):
+    """Compute QR module matrices for many labels.
+
+    Args:
+        data: List of texts to encode
+        workers: Override LABEL_WORKERS; 0 or 1 computes everything in-process
+
+    Returns:
+        list: Module matrices in the same order as data
+    """
+    workers = LABEL_WORKERS if workers is None else workers
+
+    if workers < 2 or len(data) < PARALLEL_LABEL_THRESHOLD:
+        return [qr_matrix(text) for text in data]
+
+    # One page of labels per task
+    return list(get_label_pool(workers).map(qr_matrix, data, chunksize=labels_per_page()))
+
+
+def render_labels_pdf(labels, workers=None):
+    """Render a sheet of QR code labels.
+
+    Args:
+        labels: List of dicts with 'qr_code' and 'qr_data' (the text to
+            encode), plus optional 'name', 'category', 'weight' and
+            'expiration' lines to print under the code
+        workers: Processes used to compute QR codes (see compute_qr_matrices)
+
+    Returns:
+        bytes: PDF document
+    """
+    matrices = compute_qr_matrices([label['qr_data'] for label in labels], workers)
+
+    pdf_file = io.BytesIO()
+    c = pdf_canvas.Canvas(pdf_file, pagesize=letter)
+    page_width, page_height = letter
+
+    # Calculate how many labels fit per row
+    available_width = page_width - (2 * LABEL_MARGIN)
+    labels_per_row = int(available_width / (LABEL_SIZE + LABEL_GAP))
+
+    # Starting positions
+    x_start = LABEL_MARGIN
+    y_start = page_height - LABEL_MARGIN - LABEL_SIZE
+
+    col = 0
+    row = 0
+
+    for label, matrix in zip(labels, matrices):
+        has_info = any(label.get(field) for field in ('name', 'category', 'weight', 'expiration'))
+
+        # Calculate position for this label
+        x = x_start + col * (LABEL_SIZE + LABEL_GAP)
+        y = y_start - row * (LABEL_SIZE + LABEL_GAP)
+
+        # Check if we need a new page
+        if y < LABEL_MARGIN:
+            c.showPage()
+            row = 0
+            col = 0
+            x = x_start
+            y = y_start
+
+        # Draw label border
+        c.rect(x, y, LABEL_SIZE, LABEL_SIZE)
+
+        # QR code size
+        qr_size = 0.9 * inch if not has_info else 0.8 * inch
+
+        # Draw QR code (centered horizontally)
+        qr_x = x + (LABEL_SIZE - qr_size) / 2
+        qr_y = y + LABEL_SIZE - qr_size - 0.1 * inch
+        draw_qr_matrix(c, matrix, qr_x, qr_y, qr_size)
+
+        # Draw QR code text
+        c.setFont("Courier-Bold", 10 if has_info else 11)
+        text_y = qr_y - 0.15 * inch
+        c.drawCentredString(x + LABEL_SIZE / 2, text_y, label['qr_code'])
+
+        # Draw additional info if present
+        if has_info:
+            c.setFont("Helvetica", 7)
+            info_y = text_y - 0.12 * inch
+
+            if label.get('name'):
+                c.setFont("Helvetica-Bold", 7)
+                # Truncate if too long
+                name = label['name'][:20] + '...' if len(label['name']) > 20 else label['name']
+                c.drawCentredString(x + LABEL_SIZE / 2, info_y, name)
+                info_y -= 0.1 * inch
+                c.setFont("Helvetica", 7)
+
+            for field in ('category', 'weight', 'expiration'):
+                if label.get(field):
+                    c.drawCentredString(x + LABEL_SIZE / 2, info_y, label[field])
+                    info_y -= 0.1 * inch
+
+        # Move to next position
+        col += 1
+        if col >= labels_per_row:
+            col = 0
+            row += 1
+
+    c.save()
+    return pdf_file.getvalue()
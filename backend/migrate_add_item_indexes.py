@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the items table indexes to an existing database.
+Works on both SQLite and PostgreSQL. Safe to run more than once.
+"""
+
+from app import create_app
+from models import db, Item
+from sqlalchemy import inspect
+
+
+def migrate(app=None):
+    """Create any Item indexes that are missing from the database"""
+    if app is None:
+        app = create_app()
+
+    with app.app_context():
+        existing = {index['name'] for index in inspect(db.engine).get_indexes('items')}
+        created = []
+
+        for index in sorted(Item.__table__.indexes, key=lambda i: i.name):
+            if index.name in existing:
+                print(f"✓ {index.name} already exists")
+                continue
+
+            print(f"Creating {index.name} on items({', '.join(c.name for c in index.columns)})...")
+            index.create(db.engine)
+            created.append(index.name)
+
+        if created:
+            print(f"\n✅ Created {len(created)} index(es)")
+        else:
+            print("\n✅ All item indexes already exist")
+
+        return created
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Item Indexes Migration Script")
+    print("=" * 60)
+
+    migrate()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the full-text search index for items.
+SQLite gets an FTS5 table plus sync triggers (existing rows are indexed),
+PostgreSQL gets a GIN index on a tsvector expression. Safe to run more than once.
+"""
+
+from app import create_app
+from models import db
+from search import create_search_index
+
+
+def migrate(app=None):
+    """Create the item search index and index existing rows"""
+    if app is None:
+        app = create_app()
+
+    with app.app_context():
+        with db.engine.begin() as connection:
+            created = create_search_index(connection, rebuild=True)
+
+        if created:
+            print("✅ Item search index is in place")
+        else:
+            print("✗ Full-text search is not supported by this database; search will use LIKE matching")
+
+        return created
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Item Search Index Migration Script")
+    print("=" * 60)
+
+    migrate()
@@ -1,6 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import joinedload
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+import json
 import uuid
 
 db = SQLAlchemy()
@@ -86,6 +88,43 @@ class Item(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Indexes for the hot access patterns: list/expiring/oldest filter on status
+    # and sort by date, UPC lookups, category filters, delta sync. Existing
+    # databases pick these up via migrate_add_item_indexes.py
+    __table_args__ = (
+        db.Index('ix_items_status_added_date', 'status', 'added_date'),
+        db.Index('ix_items_status_expiration_date', 'status', 'expiration_date'),
+        db.Index('ix_items_upc', 'upc'),
+        db.Index('ix_items_category_id', 'category_id'),
+        db.Index('ix_items_updated_at', 'updated_at'),
+    )
+
+    @classmethod
+    def list_query(cls):
+        """Item query that eager-loads the relationships read by to_dict.
+
+        List endpoints should start from this instead of Item.query so that
+        serializing N rows doesn't trigger N extra lazy-load SELECTs.
+        (Category names come from the cached category catalog.)
+        """
+        return cls.query.options(
+            joinedload(cls.added_by)
+        )
+
+    def category_name(self):
+        """Name of the item's category, from the cached category catalog"""
+        # Imported here because category_catalog imports this module
+        from category_catalog import get_category_catalog
+
+        if self.category_id is None:
+            return None
+
+        name = get_category_catalog().name(self.category_id)
+        if name is None and self.category:
+            # Category created by another worker since our catalog was loaded
+            name = self.category.name
+        return name
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -97,7 +136,7 @@ class Item(db.Model):
             'weight': self.weight,
             'weight_unit': self.weight_unit,
             'category_id': self.category_id,
-            'category_name': self.category.name if self.category else None,
+            'category_name': self.category_name(),
             'added_date': self.added_date.isoformat(),
             'expiration_date': self.expiration_date.isoformat() if self.expiration_date else None,
             'status': self.status,
@@ -129,12 +168,85 @@ class Setting(db.Model):
         }
 
 
-def generate_qr_code():
-    """Generate a unique alphanumeric code identifier (e.g., ABC123)"""
-    import random
-    import string
+class ImportJob(db.Model):
+    __tablename__ = 'import_jobs'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    file_type = db.Column(db.String(10), nullable=False)  # csv, json, ndjson
+    filename = db.Column(db.String(255))
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, completed, failed
+
+    rows_processed = db.Column(db.Integer, nullable=False, default=0)
+    imported = db.Column(db.Integer, nullable=False, default=0)
+    skipped = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.Text)  # JSON list of per-row error messages
+    message = db.Column(db.String(255))  # Failure reason shown to the user
+    worker = db.Column(db.String(100))  # host:pid of the gunicorn worker running the job
+    upload_path = db.Column(db.String(500))  # Temporary copy of the uploaded file
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'file_type': self.file_type,
+            'filename': self.filename,
+            'status': self.status,
+            'rows_processed': self.rows_processed,
+            'imported': self.imported,
+            'skipped': self.skipped,
+            'errors': json.loads(self.errors) if self.errors else [],
+            'message': self.message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class CacheVersion(db.Model):
+    """Version counter for a table cached in each worker (see cache_versions.py)"""
+    __tablename__ = 'cache_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
 
-    # Generate 3 random uppercase letters + 3 random digits
-    letters = ''.join(random.choices(string.ascii_uppercase, k=3))
-    digits = ''.join(random.choices(string.digits, k=3))
-    return f"{letters}{digits}"
+
+class ItemTombstone(db.Model):
+    """Record of a deleted item, so delta sync clients can drop it (see item_changes.py)"""
+    __tablename__ = 'item_tombstones'
+
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
+class ItemEvent(db.Model):
+    """Item change pushed to live subscribers on every worker (see item_events.py)"""
+    __tablename__ = 'item_events'
+
+    id = db.Column(db.Integer, primary_key=True)
+    action = db.Column(db.String(20), nullable=False)  # created, updated, status, deleted, resync
+    payload = db.Column(db.Text, nullable=False)  # JSON event data
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
+class UpcLookupCache(db.Model):
+    """Cached result of an external UPC lookup (see upc_lookup.py)"""
+    __tablename__ = 'upc_lookup_cache'
+
+    upc = db.Column(db.String(32), primary_key=True)
+    found = db.Column(db.Boolean, nullable=False)
+    response = db.Column(db.Text, nullable=False)  # JSON lookup response body
+    fetched_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+
+class QrCodeSequence(db.Model):
+    """Next unused position in the QR code sequence (see qr_codes.py)"""
+    __tablename__ = 'qr_code_sequence'
+
+    id = db.Column(db.Integer, primary_key=True)
+    next_index = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,133 @@
+"""
+Allocation of item codes (3 letters + 3 digits, e.g. KXR402).
+
+Codes aren't drawn at random and checked for collisions, which gets
+slower and riskier as the table fills. Each one comes from the next
+position of a shared counter (qr_code_sequence), mapped onto the 17,576,000
+possible codes by a fixed keyed permutation. Distinct positions always give
+distinct codes, so new codes never collide with each other, and
+consecutive items still get unrelated-looking labels.
+
+Positions are claimed in the caller's transaction, so codes from a
+rolled-back transaction return to the pool with it. Codes that are already
+taken (from before this allocator, typed in by hand, or restored from an
+older backup) are skipped. That costs one IN query per allocation and
+doesn't grow as more codes are handed out.
+"""
+import hashlib
+import string
+
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Item, QrCodeSequence
+
+QR_LETTER_CODES = 26 ** 3
+QR_DIGIT_CODES = 10 ** 3
+QR_CODE_SPACE = QR_LETTER_CODES * QR_DIGIT_CODES
+
+# Changing either of these reorders the sequence; codes already issued
+# would then only be protected by the taken-code check
+QR_CODE_PERMUTATION_KEY = b'freezer-inventory-qr-codes'
+QR_CODE_PERMUTATION_ROUNDS = 4
+
+
+def _round_value(round_number, value, modulus):
+    digest = hashlib.blake2b(f'{round_number}:{value}'.encode(), digest_size=8, key=QR_CODE_PERMUTATION_KEY)
+    return int.from_bytes(digest.digest(), 'big') % modulus
+
+
+def permute_qr_index(index):
+    """Map a sequence position onto a code number, one-to-one.
+
+    A Feistel network over the letter and digit halves: each round adds a
+    keyed hash of one half to the other, modulo its size. The two halves
+    swap every round, so an even number of rounds gives back a number in
+    the same range, and every round can be undone.
+
+    Args:
+        index: Position in [0, QR_CODE_SPACE)
+
+    Returns:
+        int: Code number in [0, QR_CODE_SPACE)
+    """
+    left, right = divmod(index, QR_DIGIT_CODES)
+    for round_number in range(QR_CODE_PERMUTATION_ROUNDS):
+        modulus = QR_LETTER_CODES if round_number % 2 == 0 else QR_DIGIT_CODES
+        left, right = right, (left + _round_value(round_number, right, modulus)) % modulus
+    return left * QR_DIGIT_CODES + right
+
+
+def format_qr_code(number):
+    """Format a code number (0 to QR_CODE_SPACE - 1) as e.g. 'ABC123'"""
+    letters, digits = divmod(number, QR_DIGIT_CODES)
+    chars = []
+    for _ in range(3):
+        letters, letter = divmod(letters, 26)
+        chars.append(string.ascii_uppercase[letter])
+    return ''.join(reversed(chars)) + f'{digits:03d}'
+
+
+def qr_code_for_index(index):
+    return format_qr_code(permute_qr_index(index))
+
+
+def reserve_qr_code_indexes(count):
+    """Claim the next `count` sequence positions as part of the current transaction.
+
+    Returns:
+        range: The claimed positions
+
+    Raises:
+        RuntimeError: If every code has been handed out
+    """
+    # UPDATE then SELECT rather than UPDATE ... RETURNING, which needs SQLite
+    # 3.35+ (Raspberry Pi OS bullseye has 3.34). The UPDATE holds the row's
+    # write lock until commit, so no one else can move it in between.
+    updated = db.session.execute(
+        db.update(QrCodeSequence)
+        .where(QrCodeSequence.id == 1)
+        .values(next_index=QrCodeSequence.next_index + count)
+    ).rowcount
+    end = None
+    if updated:
+        end = db.session.execute(
+            db.select(QrCodeSequence.next_index).where(QrCodeSequence.id == 1)
+        ).scalar()
+
+    if end is None:
+        try:
+            with db.session.begin_nested():
+                db.session.add(QrCodeSequence(id=1, next_index=count))
+            end = count
+        except IntegrityError:
+            # Another worker created the row first
+            return reserve_qr_code_indexes(count)
+
+    if end > QR_CODE_SPACE:
+        raise RuntimeError('No unused QR codes left')
+    return range(end - count, end)
+
+
+def allocate_qr_codes(count, exclude=()):
+    """Allocate `count` codes that no item uses yet.
+
+    Args:
+        count: Number of codes needed
+        exclude: Codes already claimed by the caller
+
+    Returns:
+        list: The new codes, in allocation order
+    """
+    codes = []
+    exclude = set(exclude)
+    while len(codes) < count:
+        candidates = [qr_code_for_index(index) for index in reserve_qr_code_indexes(count - len(codes))]
+        # Only codes issued some other way can be taken
+        taken = set(db.session.execute(db.select(Item.qr_code).where(Item.qr_code.in_(candidates))).scalars())
+        codes.extend(code for code in candidates if code not in taken and code not in exclude)
+    return codes
+
+
+def allocate_qr_code():
+    """Allocate a single unused code"""
+    return allocate_qr_codes(1)[0]
@@ -0,0 +1,142 @@
+"""
+Cache of rendered QR code PNGs.
+
+A QR image depends only on the encoded text, so each PNG is rendered once
+and kept in a bounded in-memory LRU shared by all requests in the worker.
+When QR_CACHE_DIR is configured, PNGs are also written to disk under the
+hash of their input, so other gunicorn workers and restarts reuse them.
+
+The same hash is used as the image's ETag, which lets a conditional
+request be answered without rendering anything.
+"""
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import qrcode
+
+# PNGs kept in memory per worker (each is ~1KB)
+QR_CACHE_SIZE = int(os.environ.get('QR_CACHE_SIZE', '1024'))
+
+# Rendering parameters; any change here changes every cache key
+QR_RENDER_OPTIONS = {
+    'version': 1,
+    'error_correction': qrcode.constants.ERROR_CORRECT_L,
+    'box_size': 10,
+    'border': 4,
+}
+
+
+def render_qr_png(data):
+    """Render text as a QR code PNG.
+
+    Args:
+        data: Text to encode
+
+    Returns:
+        bytes: PNG image data
+    """
+    qr = qrcode.QRCode(**QR_RENDER_OPTIONS)
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="black", back_color="white")
+
+    img_io = io.BytesIO()
+    img.save(img_io, 'PNG')
+    return img_io.getvalue()
+
+
+def qr_image_key(data):
+    """Content address of the PNG rendered for data (also used as its ETag)"""
+    options = ','.join(f'{name}={value}' for name, value in sorted(QR_RENDER_OPTIONS.items()))
+    return hashlib.sha256(f'{options}\n{data}'.encode('utf-8')).hexdigest()
+
+
+class QRImageCache:
+    """Bounded LRU of rendered QR PNGs with an optional on-disk second level.
+
+    Args:
+        max_entries: PNGs kept in memory
+        cache_dir: Directory for the on-disk cache, or None to keep the
+            cache in memory only
+    """
+
+    def __init__(self, max_entries=None, cache_dir=None):
+        self.max_entries = max_entries or QR_CACHE_SIZE
+        self.cache_dir = cache_dir
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f'{key}.png')
+
+    def _read_disk(self, key):
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key, png):
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file and rename so readers never see a partial PNG
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(png)
+            os.replace(tmp_path, path)
+        except OSError:
+            logging.warning("Could not write QR image cache file %s", path, exc_info=True)
+
+    def _remember(self, key, png):
+        with self._lock:
+            self._images[key] = png
+            self._images.move_to_end(key)
+            while len(self._images) > self.max_entries:
+                self._images.popitem(last=False)
+
+    def get(self, data):
+        """Get the PNG for data, rendering it on a cache miss.
+
+        Returns:
+            tuple: (png bytes, cache key)
+        """
+        key = qr_image_key(data)
+
+        with self._lock:
+            png = self._images.get(key)
+            if png is not None:
+                self._images.move_to_end(key)
+                return png, key
+
+        png = self._read_disk(key) if self.cache_dir else None
+        if png is None:
+            png = render_qr_png(data)
+            if self.cache_dir:
+                self._write_disk(key, png)
+
+        self._remember(key, png)
+        return png, key
+
+    def clear(self):
+        """Drop the in-memory entries (the disk cache is left alone)"""
+        with self._lock:
+            self._images.clear()
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_qr_image_cache(cache_dir=None):
+    """Get the worker's shared QR image cache for a disk cache directory"""
+    with _caches_lock:
+        if cache_dir not in _caches:
+            _caches[cache_dir] = QRImageCache(cache_dir=cache_dir)
+        return _caches[cache_dir]
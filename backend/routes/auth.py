@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from models import db, User
+from settings_cache import get_setting
+from item_changes import mark_item_users_changed
 from datetime import timedelta
 
 auth_bp = Blueprint('auth', __name__)
@@ -152,6 +154,8 @@ def update_user(user_id):
             if User.query.filter_by(username=new_username_lower).first():
                 return jsonify({'error': 'Username already exists'}), 400
             user.username = new_username_lower
+            # Item lists show who added each item
+            mark_item_users_changed()
 
     # Update role if provided
     if 'role' in data:
@@ -188,6 +192,7 @@ def delete_user(user_id):
         return jsonify({'error': 'User not found'}), 404
 
     db.session.delete(user)
+    mark_item_users_changed()
     db.session.commit()
 
     return jsonify({'message': 'User deleted successfully'}), 200
@@ -225,19 +230,13 @@ def reset_user_password(user_id):
 def quick_login_status():
     """Check if no-auth mode is enabled (no JWT required)"""
     import os
-    from models import Setting
 
     # Only available in development
     if os.environ.get('FLASK_ENV') != 'development':
         return jsonify({'enabled': False, 'reason': 'Not in development mode'}), 200
 
     # Check if no_auth_mode system setting is enabled
-    setting = Setting.query.filter_by(
-        user_id=None,
-        setting_name='no_auth_mode'
-    ).first()
-
-    enabled = setting and setting.setting_value == 'true'
+    enabled = get_setting(None, 'no_auth_mode') == 'true'
 
     return jsonify({'enabled': enabled}), 200
 
@@ -252,13 +251,7 @@ def quick_login_users():
         return jsonify({'error': 'This endpoint is only available in development'}), 403
 
     # Check if no_auth_mode is enabled
-    from models import Setting
-    setting = Setting.query.filter_by(
-        user_id=None,
-        setting_name='no_auth_mode'
-    ).first()
-
-    if not setting or setting.setting_value != 'true':
+    if get_setting(None, 'no_auth_mode') != 'true':
         return jsonify({'error': 'No-auth mode is not enabled'}), 403
 
     # Return all users
@@ -276,13 +269,7 @@ def quick_login():
         return jsonify({'error': 'This endpoint is only available in development'}), 403
 
     # Check if no_auth_mode is enabled
-    from models import Setting
-    setting = Setting.query.filter_by(
-        user_id=None,
-        setting_name='no_auth_mode'
-    ).first()
-
-    if not setting or setting.setting_value != 'true':
+    if get_setting(None, 'no_auth_mode') != 'true':
         return jsonify({'error': 'No-auth mode is not enabled'}), 403
 
     data = request.get_json()
@@ -1,29 +1,48 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from models import db, Category
 from routes.items import get_category_stock_image
+from category_catalog import get_category_catalog, mark_categories_changed, invalidate_category_catalog
 
 categories_bp = Blueprint('categories', __name__)
 
 
+def catalog_response(catalog, body):
+    """Respond with catalog data, or 304 if the client's copy is current.
+
+    The ETag is the catalog's hash, so clients revalidate on every request
+    (no-cache) but only download categories after one has changed.
+    """
+    if request.if_none_match.contains(catalog.etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(body)
+
+    response.set_etag(catalog.etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
 @categories_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_categories():
-    """Get all categories"""
-    categories = Category.query.order_by(Category.name).all()
-    return jsonify([category.to_dict() for category in categories]), 200
+    """Get all categories (served from the cached catalog, with an ETag)"""
+    catalog = get_category_catalog()
+    return catalog_response(catalog, catalog.categories)
 
 
 @categories_bp.route('/<int:category_id>', methods=['GET'])
 @jwt_required()
 def get_category(category_id):
     """Get a specific category"""
-    category = db.session.get(Category, category_id)
+    catalog = get_category_catalog()
+    category = catalog.by_id.get(category_id)
 
     if not category:
         return jsonify({'error': 'Category not found'}), 404
 
-    return jsonify(category.to_dict()), 200
+    return catalog_response(catalog, category)
 
 
 @categories_bp.route('/', methods=['POST'])
@@ -48,7 +67,9 @@ def create_category():
     )
 
     db.session.add(category)
+    mark_categories_changed()
     db.session.commit()
+    invalidate_category_catalog()
 
     return jsonify(category.to_dict()), 201
 
@@ -85,7 +106,9 @@ def update_category(category_id):
     if 'image_url' in data:
         category.image_url = data['image_url']
 
+    mark_categories_changed()
     db.session.commit()
+    invalidate_category_catalog()
 
     return jsonify(category.to_dict()), 200
 
@@ -112,7 +135,9 @@ def delete_category(category_id):
         return jsonify({'error': 'Cannot delete category with existing items'}), 400
 
     db.session.delete(category)
+    mark_categories_changed()
     db.session.commit()
+    invalidate_category_catalog()
 
     return jsonify({'message': 'Category deleted successfully'}), 200
 
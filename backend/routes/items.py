@@ -1,8 +1,24 @@
-from flask import Blueprint, request, jsonify, send_file, render_template_string
+from flask import Blueprint, Response, current_app, request, jsonify, send_file, render_template_string, stream_with_context, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Item, Category, User, Setting, generate_qr_code
+from models import db, Item, Category, User, ImportJob
+from search import apply_item_search
+from importer import ItemImporter, ImportFormatError, import_csv_stream, import_json_stream, import_ndjson_stream
+from import_jobs import start_import_job, fail_if_abandoned
+from qr_images import get_qr_image_cache, qr_image_key
+from qr_codes import allocate_qr_code, allocate_qr_codes
+from sqlite_db import backup_sqlite_database, restore_sqlite_database
+from labels import render_labels_pdf
+from http_client import http_get
+from settings_cache import get_setting
+from category_catalog import get_category_catalog
+from item_changes import item_list_etag, item_page_etag, item_changes_since, record_item_deletions, delete_items, mark_items_reset
+from cache_versions import invalidate_all_caches, read_cache_versions
+from item_events import (CREATED, UPDATED, STATUS, publish_item_event,
+                         get_item_event_broker, item_event_stream)
+from upc_lookup import (FOUND, NOT_FOUND, FAILED, lookup_deadline, lookup_upc_providers,
+                        upc_cache_ttl, get_cached_upc_lookup, cache_upc_lookup)
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timedelta
-import qrcode
 import io
 import requests
 import os
@@ -10,10 +26,9 @@ import base64
 import csv
 import json as json_lib
 import logging
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.units import inch
-from reportlab.pdfgen import canvas as pdf_canvas
-from reportlab.lib.utils import ImageReader
+import re
+import textwrap
+import time
 
 items_bp = Blueprint('items', __name__)
 
@@ -90,23 +105,19 @@ def get_category_stock_image(category_name):
     return None
 
 
-def fetch_product_image(product_name, category_name=None):
+def fetch_product_image(product_name, category_name=None, timeout=None):
     """Fetch product image from Pexels API.
 
     Args:
         product_name: Name of the product to search for
         category_name: Optional category to refine search
+        timeout: Optional cap on the request timeouts, in seconds
 
     Returns:
         str: Image URL if found, None otherwise
     """
     # Check if image fetching is enabled (system setting)
-    enable_images = Setting.query.filter_by(
-        user_id=None,
-        setting_name='enable_image_fetching'
-    ).first()
-
-    if not enable_images or enable_images.setting_value != 'true':
+    if get_setting(None, 'enable_image_fetching') != 'true':
         return None
 
     # Check if Pexels API key is configured
@@ -122,7 +133,8 @@ def fetch_product_image(product_name, category_name=None):
             search_query = f"{product_name} food"
 
         # Call Pexels API
-        response = requests.get(
+        response = http_get(
+            'pexels',
             'https://api.pexels.com/v1/search',
             headers={'Authorization': pexels_api_key},
             params={
@@ -130,7 +142,7 @@ def fetch_product_image(product_name, category_name=None):
                 'per_page': 1,
                 'orientation': 'square'
             },
-            timeout=5
+            timeout=timeout
         )
 
         if response.status_code == 200:
@@ -145,32 +157,158 @@ def fetch_product_image(product_name, category_name=None):
         return None
 
 
+# Keyset pagination for the items list
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+ITEMS_SORT_COLUMNS = ('added_date', 'expiration_date', 'name')
+
+
+def encode_items_cursor(sort_value, item_id, sort_by, sort_order):
+    """Encode the position of the last returned row as an opaque cursor.
+
+    The cursor carries the sort column and direction so it can't be replayed
+    against a differently sorted listing.
+    """
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+
+    payload = json_lib.dumps({'s': sort_by, 'o': sort_order, 'v': sort_value, 'id': item_id},
+                             separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_items_cursor(cursor, sort_by, sort_order):
+    """Decode a cursor produced by encode_items_cursor.
+
+    Returns:
+        tuple: (sort_value, item_id) of the last row on the previous page
+
+    Raises:
+        ValueError: If the cursor is malformed or belongs to another sort order
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json_lib.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if payload['s'] != sort_by or payload['o'] != sort_order:
+            raise ValueError('Cursor does not match the requested sort')
+
+        item_id = payload['id']
+        if not isinstance(item_id, int):
+            raise ValueError('Invalid cursor id')
+
+        sort_value = payload['v']
+        if sort_value is not None and sort_by != 'name':
+            sort_value = datetime.fromisoformat(sort_value)
+    except (KeyError, TypeError, UnicodeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+    return sort_value, item_id
+
+
+def keyset_after(order_col, sort_order, after_value, after_id):
+    """Build the WHERE clause selecting rows that sort after a cursor position.
+
+    Rows are ordered by (order_col NULLS LAST, id), in the same direction.
+    The predicate keeps a plain range bound on order_col so the
+    (status, <sort column>) indexes can seek straight to the cursor.
+    """
+    if sort_order == 'asc':
+        id_after = Item.id > after_id
+    else:
+        id_after = Item.id < after_id
+
+    if after_value is None:
+        # Already into the trailing NULL block; only the id can advance
+        return db.and_(order_col.is_(None), id_after)
+
+    if sort_order == 'asc':
+        after = db.and_(order_col >= after_value, db.or_(order_col > after_value, id_after))
+    else:
+        after = db.and_(order_col <= after_value, db.or_(order_col < after_value, id_after))
+
+    if order_col is Item.expiration_date:
+        # NULL expiration dates sort after every dated row
+        after = db.or_(after, order_col.is_(None))
+
+    return after
+
+
+def keyset_order(order_col, sort_order):
+    """ORDER BY clauses matching keyset_after."""
+    if sort_order == 'asc':
+        ordering = [order_col.asc(), Item.id.asc()]
+    else:
+        ordering = [order_col.desc(), Item.id.desc()]
+
+    if order_col is Item.expiration_date:
+        ordering[0] = ordering[0].nulls_last()
+
+    return ordering
+
+
+def item_list_response(query, build, *extra, page=None):
+    """Respond with an item list, or 304 if the client's copy is current.
+
+    Args:
+        query: Filtered Item query the list is built from
+        build: Function returning the response body, only called on a miss
+        *extra: Anything else the body depends on (see item_list_etag)
+        page: Items already fetched for a limited response; the ETag is
+            then built from them (item_page_etag) and query is ignored
+
+    Returns:
+        Flask response with an ETag; clients revalidate on every request
+    """
+    extra = (get_category_catalog().etag, request.query_string.decode('utf-8'), *extra)
+    if page is None:
+        etag = item_list_etag(query, *extra)
+    else:
+        etag = item_page_etag(page, *extra)
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
 @items_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_items():
-    """Get all items with optional filtering"""
+    """Get all items with optional filtering.
+
+    Passing `limit` and/or `cursor` switches to keyset pagination: the response
+    becomes {"items": [...], "next_cursor": "..."} and the next page is
+    requested by sending `next_cursor` back as `cursor` with the same filters.
+
+    `search` uses the full-text index (see search.py); combine it with
+    sort_by=relevance to get best matches first. Relevance ordering isn't
+    available for paginated requests, which fall back to added_date.
+
+    Responses carry an ETag and a matching If-None-Match gets a 304 (see
+    item_list_response).
+    """
     current_user_id = int(get_jwt_identity())
 
     # Get query parameters
     status = request.args.get('status', 'in_freezer')
     search = request.args.get('search', '')
     category_id = request.args.get('category_id', type=int)
-    sort_by = request.args.get('sort_by', 'added_date')  # added_date, expiration_date, name
+    sort_by = request.args.get('sort_by', 'added_date')  # added_date, expiration_date, name, relevance
     sort_order = request.args.get('sort_order', 'desc')  # asc or desc
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
 
     # Check if user wants to see history
-    track_history = Setting.query.filter_by(
-        user_id=current_user_id,
-        setting_name='track_history'
-    ).first()
-
     # Default to tracking history if setting doesn't exist
-    track_history_enabled = True if not track_history else track_history.setting_value == 'true'
+    track_history_enabled = get_setting(current_user_id, 'track_history', 'true') == 'true'
 
     # Build query
-    query = Item.query
+    query = Item.list_query()
 
     # Filter by status
     if not track_history_enabled:
@@ -180,15 +318,9 @@ def get_items():
         query = query.filter_by(status=status)
 
     # Search filter
+    rank_order = None
     if search:
-        search_pattern = f'%{search}%'
-        query = query.filter(
-            db.or_(
-                Item.name.ilike(search_pattern),
-                Item.source.ilike(search_pattern),
-                Item.notes.ilike(search_pattern)
-            )
-        )
+        query, rank_order = apply_item_search(query, search)
 
     # Category filter
     if category_id:
@@ -210,13 +342,115 @@ def get_items():
     else:
         order_col = Item.added_date
 
-    if sort_order == 'asc':
-        query = query.order_by(order_col.asc())
-    else:
-        query = query.order_by(order_col.desc())
+    # Keyset pagination is opt-in: old clients that send neither `limit`
+    # nor `cursor` keep getting the full list as a bare JSON array
+    cursor = request.args.get('cursor')
+    limit = request.args.get('limit', type=int)
+
+    if cursor is None and limit is None:
+        if sort_by == 'relevance' and rank_order is not None:
+            query = query.order_by(rank_order, Item.added_date.desc())
+        elif sort_order == 'asc':
+            query = query.order_by(order_col.asc())
+        else:
+            query = query.order_by(order_col.desc())
+
+        return item_list_response(
+            query,
+            lambda: [item.to_dict() for item in query.all()],
+            track_history_enabled
+        )
+
+    if sort_by not in ITEMS_SORT_COLUMNS:
+        sort_by = 'added_date'
+    if sort_order != 'asc':
+        sort_order = 'desc'
+
+    limit = min(max(limit or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+
+    if cursor:
+        try:
+            after_value, after_id = decode_items_cursor(cursor, sort_by, sort_order)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(keyset_after(order_col, sort_order, after_value, after_id))
+
+    # NULL expiration dates always sort last so the (column, id) ordering
+    # is the same on SQLite and PostgreSQL
+    query = query.order_by(*keyset_order(order_col, sort_order))
+
+    # Fetch one extra row to find out whether another page exists
+    fetched = query.limit(limit + 1).all()
+
+    def build_page():
+        has_more = len(fetched) > limit
+        items = fetched[:limit]
+
+        next_cursor = None
+        if has_more:
+            last = items[-1]
+            next_cursor = encode_items_cursor(getattr(last, sort_by), last.id, sort_by, sort_order)
+
+        return {
+            'items': [item.to_dict() for item in items],
+            'next_cursor': next_cursor,
+            'limit': limit
+        }
+
+    return item_list_response(query, build_page, track_history_enabled, page=fetched)
+
+
+@items_bp.route('/changes', methods=['GET'])
+@jwt_required()
+def get_item_changes():
+    """Get items changed since a sync cursor, for clients keeping a local copy.
+
+    Without `since` the response is a full snapshot of all items. Each
+    response carries a `cursor` to send back as `since` next time, which
+    returns only items created or updated after it plus the ids of deleted
+    items in `deleted`. When `reset` is true (first sync, a restored
+    backup, or a cursor older than the tombstone retention) the client
+    should replace its copy with `items`.
+    """
+    try:
+        changes = item_changes_since(request.args.get('since'))
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    return jsonify({
+        'items': [item.to_dict() for item in changes['items']],
+        'deleted': changes['deleted'],
+        'cursor': changes['cursor'],
+        'reset': changes['reset']
+    }), 200
+
+
+@items_bp.route('/events', methods=['GET'])
+@jwt_required()
+def stream_item_events():
+    """Stream item changes to an open inventory page as Server-Sent Events.
+
+    Events are `created`, `updated` and `status` (data has the full `item`),
+    `deleted` (data has `item_ids`) and `resync` (reload everything). A
+    reconnecting client sends the last event id it saw as Last-Event-ID to
+    receive what it missed. Streams end after a few minutes and the client
+    reconnects.
+    """
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
 
-    items = query.all()
-    return jsonify([item.to_dict() for item in items]), 200
+    broker = get_item_event_broker()
+    position = broker.subscribe()
+    if position is None:
+        return jsonify({'error': 'Too many open event streams, try again later'}), 503
+
+    response = Response(
+        stream_with_context(item_event_stream(broker, position, last_event_id)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Runs even if the client goes away before the stream starts
+    response.call_on_close(broker.unsubscribe)
+    return response
 
 
 @items_bp.route('/<int:item_id>', methods=['GET'])
@@ -243,57 +477,58 @@ def get_item_by_qr(qr_code):
     return jsonify(item.to_dict()), 200
 
 
-@items_bp.route('/', methods=['POST'])
-@jwt_required()
-def create_item():
-    """Create a new item"""
-    current_user_id = int(get_jwt_identity())
-    data = request.get_json()
+def category_details(category_id):
+    """Category dict (as Category.to_dict) for a create request, or None"""
+    if not category_id:
+        return None
 
-    if not data or not data.get('name'):
-        return jsonify({'error': 'Item name is required'}), 400
+    category = get_category_catalog().by_id.get(category_id)
+    if category is None:
+        # Created by another worker since our catalog was loaded
+        row = db.session.get(Category, category_id)
+        category = row.to_dict() if row else None
+    return category
 
-    # Validate UPC format if provided (must be 12 digits)
-    if data.get('upc'):
-        import re
-        if not re.match(r'^\d{12}$', data['upc']):
-            return jsonify({'error': 'Invalid UPC format. UPC must be exactly 12 digits.'}), 400
 
-    # Generate or use provided QR code
-    qr_code = data.get('qr_code') or generate_qr_code()
+def new_item(data, user_id):
+    """Build an unsaved Item (without a QR code) from a create request body.
 
-    # Check if QR code already exists
-    if Item.query.filter_by(qr_code=qr_code).first():
-        return jsonify({'error': 'QR code already exists'}), 400
+    Fills in the expiration date from the category's default and a
+    category stock image, as for POST /api/items/.
+
+    Raises:
+        ValueError: With a message for the client if the body is invalid
+    """
+    if not data or not data.get('name'):
+        raise ValueError('Item name is required')
+
+    # Validate UPC format if provided (must be 12 digits)
+    if data.get('upc') and not re.match(r'^\d{12}$', data['upc']):
+        raise ValueError('Invalid UPC format. UPC must be exactly 12 digits.')
 
     # Parse added_date if provided
     added_date = None
     if data.get('added_date'):
         added_date = datetime.fromisoformat(data['added_date'])
 
+    category = category_details(data.get('category_id'))
+
     # Calculate expiration date if not provided
     expiration_date = None
-    category = None
     if data.get('expiration_date'):
         expiration_date = datetime.fromisoformat(data['expiration_date'])
-    elif data.get('category_id'):
-        category = db.session.get(Category, data['category_id'])
-        if category and category.default_expiration_days:
-            # Use custom added_date if provided, otherwise use current time
-            base_date = added_date or datetime.utcnow()
-            expiration_date = base_date + timedelta(days=category.default_expiration_days)
+    elif category and category['default_expiration_days']:
+        # Use custom added_date if provided, otherwise use current time
+        base_date = added_date or datetime.utcnow()
+        expiration_date = base_date + timedelta(days=category['default_expiration_days'])
 
     # Get image URL - priority: provided URL > category stock image
     image_url = data.get('image_url')
-    if not image_url and not data.get('upc'):
+    if not image_url and not data.get('upc') and category:
         # No image URL and no UPC - use category-based stock image
-        if not category and data.get('category_id'):
-            category = db.session.get(Category, data['category_id'])
-        if category:
-            image_url = get_category_stock_image(category.name)
+        image_url = get_category_stock_image(category['name'])
 
     item = Item(
-        qr_code=qr_code,
         upc=data.get('upc'),
         image_url=image_url,
         name=data['name'],
@@ -303,19 +538,135 @@ def create_item():
         category_id=data.get('category_id'),
         expiration_date=expiration_date,
         notes=data.get('notes'),
-        added_by_user_id=current_user_id
+        added_by_user_id=user_id
     )
 
     # Set added_date if provided (must be set after creation to override default)
     if added_date:
         item.added_date = added_date
 
+    return item
+
+
+@items_bp.route('/', methods=['POST'])
+@jwt_required()
+def create_item():
+    """Create a new item"""
+    current_user_id = int(get_jwt_identity())
+    data = request.get_json()
+
+    try:
+        item = new_item(data, current_user_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Use the provided QR code if it's free, otherwise allocate one
+    if data.get('qr_code'):
+        if Item.query.filter_by(qr_code=data['qr_code']).first():
+            return jsonify({'error': 'QR code already exists'}), 400
+        item.qr_code = data['qr_code']
+    else:
+        item.qr_code = allocate_qr_code()
+
     db.session.add(item)
+    publish_item_event(CREATED, item=item)
     db.session.commit()
 
     return jsonify(item.to_dict()), 201
 
 
+# Items one batch create may add
+MAX_BATCH_CREATE_ITEMS = 200
+
+
+@items_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def create_items():
+    """Create several items in one request (e.g. a multi-pack purchase).
+
+    Accepts JSON body with either:
+    - item + quantity: An item body (as for POST /) to create `quantity` copies of
+    - items: A list of item bodies
+    and optionally:
+    - labels: true, or label options as for /print-labels (show_name,
+      show_expiration, show_category, show_weight), to also get a label
+      PDF for the new items, base64 encoded, in `labels_pdf`
+
+    QR codes are allocated together and all items are inserted in one
+    transaction, so either every item is created or none is.
+    """
+    current_user_id = int(get_jwt_identity())
+    data = request.get_json() or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+
+    if 'items' in data:
+        bodies = data['items']
+        if not isinstance(bodies, list) or not bodies:
+            return jsonify({'error': 'items must be a non-empty list'}), 400
+    else:
+        quantity = data.get('quantity')
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+            return jsonify({'error': 'quantity must be a positive integer'}), 400
+        template = data.get('item') or {}
+        if not isinstance(template, dict):
+            return jsonify({'error': 'item must be an object'}), 400
+        if template.get('qr_code'):
+            return jsonify({'error': 'A template item cannot have a QR code'}), 400
+        bodies = [template] * quantity
+
+    if len(bodies) > MAX_BATCH_CREATE_ITEMS:
+        return jsonify({'error': f'At most {MAX_BATCH_CREATE_ITEMS} items can be created at once'}), 400
+
+    items = []
+    for index, body in enumerate(bodies, start=1):
+        try:
+            items.append(new_item(body if isinstance(body, dict) else None, current_user_id))
+        except ValueError as e:
+            return jsonify({'error': f'Item {index}: {e}'}), 400
+
+    # Keep any QR codes provided and allocate the rest in one pass
+    provided = [body.get('qr_code') or None for body in bodies]
+    claimed = [qr_code for qr_code in provided if qr_code]
+    if len(set(claimed)) != len(claimed):
+        return jsonify({'error': 'Duplicate QR codes in request'}), 400
+    if claimed and db.session.execute(db.select(Item.id).where(Item.qr_code.in_(claimed))).first():
+        return jsonify({'error': 'QR code already exists'}), 400
+
+    generated = iter(allocate_qr_codes(len(bodies) - len(claimed), exclude=claimed))
+    for item, qr_code in zip(items, provided):
+        item.qr_code = qr_code or next(generated)
+
+    db.session.add_all(items)
+    db.session.flush()
+
+    # Serialize before committing, which would expire every item
+    created = [item.to_dict() for item in items]
+    labels = None
+    if data.get('labels'):
+        options = data['labels'] if isinstance(data['labels'], dict) else {}
+        labels = [
+            item_label(item, options.get('show_name', False), options.get('show_expiration', False),
+                       options.get('show_category', False), options.get('show_weight', False))
+            for item in items
+        ]
+
+    publish_item_event(CREATED, items=created)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another request took one of the codes since they were allocated
+        db.session.rollback()
+        logging.warning("Batch create hit a QR code conflict", exc_info=True)
+        return jsonify({'error': 'QR code already exists, please try again'}), 409
+
+    response = {'items': created}
+    if labels:
+        response['labels_pdf'] = base64.b64encode(render_labels_pdf(labels)).decode('ascii')
+
+    return jsonify(response), 201
+
+
 @items_bp.route('/<int:item_id>', methods=['PUT'])
 @jwt_required()
 def update_item(item_id):
@@ -329,7 +680,6 @@ def update_item(item_id):
 
     # Validate UPC format if provided (must be 12 digits)
     if 'upc' in data and data['upc']:
-        import re
         if not re.match(r'^\d{12}$', data['upc']):
             return jsonify({'error': 'Invalid UPC format. UPC must be exactly 12 digits.'}), 400
 
@@ -362,6 +712,7 @@ def update_item(item_id):
     if 'removed_date' in data:
         item.removed_date = datetime.fromisoformat(data['removed_date']) if data['removed_date'] else None
 
+    publish_item_event(UPDATED, item=item)
     db.session.commit()
 
     return jsonify(item.to_dict()), 200
@@ -389,11 +740,99 @@ def update_item_status(item_id):
     else:
         item.removed_date = None
 
+    publish_item_event(STATUS, item=item)
     db.session.commit()
 
     return jsonify(item.to_dict()), 200
 
 
+# Items one batch status update may touch
+MAX_BATCH_STATUS_ITEMS = 1000
+
+
+@items_bp.route('/status', methods=['PUT'])
+@jwt_required()
+def update_items_status():
+    """Update the status of many items at once (e.g. after a freezer clean-out).
+
+    Takes {"status": ..., "item_ids": [...], "qr_codes": [...]} (either list
+    may be omitted) and applies the change in a single UPDATE, setting
+    removed_date the same way as update_item_status.
+
+    Returns:
+        {"status", "updated", "results"}: one compact result per requested
+        id/code, in request order, with an error for unknown ones
+    """
+    data = request.get_json() or {}
+    new_status = data.get('status')
+    item_ids = data.get('item_ids') or []
+    qr_codes = data.get('qr_codes') or []
+
+    if new_status not in ['in_freezer', 'consumed', 'thrown_out']:
+        return jsonify({'error': 'Invalid status'}), 400
+
+    if not isinstance(item_ids, list) or not isinstance(qr_codes, list):
+        return jsonify({'error': 'item_ids and qr_codes must be lists'}), 400
+
+    if not all(isinstance(item_id, int) and not isinstance(item_id, bool) for item_id in item_ids):
+        return jsonify({'error': 'item_ids must be integers'}), 400
+
+    if not all(isinstance(qr_code, str) for qr_code in qr_codes):
+        return jsonify({'error': 'qr_codes must be strings'}), 400
+
+    if not item_ids and not qr_codes:
+        return jsonify({'error': 'No items provided'}), 400
+
+    if len(item_ids) + len(qr_codes) > MAX_BATCH_STATUS_ITEMS:
+        return jsonify({'error': f'At most {MAX_BATCH_STATUS_ITEMS} items can be updated at once'}), 400
+
+    rows = db.session.execute(
+        db.select(Item.id, Item.qr_code).where(db.or_(Item.id.in_(item_ids), Item.qr_code.in_(qr_codes)))
+    ).all()
+    qr_codes_by_id = {row.id: row.qr_code for row in rows}
+    ids_by_qr_code = {row.qr_code: row.id for row in rows}
+
+    now = datetime.utcnow()
+    removed_date = now if new_status in ['consumed', 'thrown_out'] else None
+
+    if qr_codes_by_id:
+        db.session.execute(
+            db.update(Item)
+            .where(Item.id.in_(list(qr_codes_by_id)))
+            .values(status=new_status, removed_date=removed_date, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+        publish_item_event(STATUS, changes=[
+            {
+                'id': item_id,
+                'status': new_status,
+                'removed_date': removed_date.isoformat() if removed_date else None,
+                'updated_at': now.isoformat()
+            }
+            for item_id in qr_codes_by_id
+        ])
+        db.session.commit()
+
+    results = []
+    for item_id in item_ids:
+        if item_id in qr_codes_by_id:
+            results.append({'id': item_id, 'qr_code': qr_codes_by_id[item_id], 'status': new_status})
+        else:
+            results.append({'id': item_id, 'error': 'Item not found'})
+    for qr_code in qr_codes:
+        if qr_code in ids_by_qr_code:
+            results.append({'id': ids_by_qr_code[qr_code], 'qr_code': qr_code, 'status': new_status})
+        else:
+            results.append({'qr_code': qr_code, 'error': 'Item not found'})
+
+    return jsonify({
+        'status': new_status,
+        'updated': len(qr_codes_by_id),
+        'results': results
+    }), 200
+
+
 @items_bp.route('/<int:item_id>', methods=['DELETE'])
 @jwt_required()
 def delete_item(item_id):
@@ -411,6 +850,7 @@ def delete_item(item_id):
         return jsonify({'error': 'Item not found'}), 404
 
     db.session.delete(item)
+    record_item_deletions([item.id])
     db.session.commit()
 
     return jsonify({'message': 'Item deleted successfully'}), 200
@@ -429,11 +869,8 @@ def purge_all_items():
         return jsonify({'error': 'This endpoint is only available in development'}), 403
 
     try:
-        # Count items before deletion
-        count = Item.query.count()
-
-        # Delete all items
-        Item.query.delete()
+        # Delete all items, leaving tombstones for synced clients
+        count = delete_items(Item.query)
         db.session.commit()
 
         return jsonify({
@@ -457,10 +894,6 @@ def copy_prod_db():
     preserving the dev admin user(s).
     Only available in development environments.
     """
-    import subprocess
-    import shutil
-    from flask import current_app
-
     # Only allow in development environment
     if not os.environ.get('FLASK_ENV') == 'development':
         return jsonify({'error': 'This endpoint is only available in development'}), 403
@@ -496,27 +929,23 @@ def copy_prod_db():
         # Create a backup of the current dev database
         if os.path.exists(dev_db_path):
             backup_path = dev_db_path + '.backup'
-            shutil.copy2(dev_db_path, backup_path)
+            backup_sqlite_database(backup_path)
             logging.info(f"Created backup of dev database at {backup_path}")
 
-        # Close all database connections
-        db.session.close()
+        # Copy production database into dev with SQLite's backup API: both
+        # run in WAL mode, so copying the files could miss recent production
+        # commits or leave dev's old -wal file next to the new database
+        previous_versions = read_cache_versions()
         db.session.remove()
-        db.engine.dispose()
-
-        # Copy production database to dev
-        shutil.copy2(prod_db_path, dev_db_path)
+        restore_sqlite_database(prod_db_path)
 
         logging.info(f"Copied production database ({prod_size} bytes) to dev ({dev_db_path})")
 
-        # Force reconnect to the new database by creating a fresh engine
-        # This ensures we're working with the newly copied database, not cached connections
-        current_app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{dev_db_path}'
-        db.engine.dispose()
-
-        # Create a new session with the fresh database
-        db.session.close()
-        db.session.remove()
+        # As for a restored backup: clients' cursors and cached lists, and
+        # every worker's caches, refer to the old dev data
+        db.create_all()
+        mark_items_reset(previous_versions)
+        invalidate_all_caches(previous_versions)
 
         # Restore dev admin users
         if dev_admins:
@@ -576,30 +1005,34 @@ def copy_prod_db():
         return jsonify({'error': 'Failed to copy production database'}), 500
 
 
+# QR images never change for a given code, so clients may cache them for a year
+QR_IMAGE_MAX_AGE = 365 * 24 * 60 * 60
+
+
 @items_bp.route('/qr/<qr_code>/image', methods=['GET'])
 def get_qr_image(qr_code):
-    """Generate and return QR code image"""
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
+    """Return the QR code image for an item.
 
+    PNGs are served from the QR image cache with a strong ETag (the hash of
+    the encoded URL), so repeat requests are answered with 304 without
+    rendering anything.
+    """
     # Encode the QR code with a full URL that phones can open
     base_url = get_base_url()
     qr_data = f"{base_url}/item/{qr_code}"
-    qr.add_data(qr_data)
-    qr.make(fit=True)
-
-    img = qr.make_image(fill_color="black", back_color="white")
 
-    # Convert to bytes
-    img_io = io.BytesIO()
-    img.save(img_io, 'PNG')
-    img_io.seek(0)
+    etag = qr_image_key(qr_data)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        png, etag = get_qr_image_cache(current_app.config.get('QR_CACHE_DIR')).get(qr_data)
+        response = Response(png, mimetype='image/png')
 
-    return send_file(img_io, mimetype='image/png')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = QR_IMAGE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
 
 
 @items_bp.route('/expiring-soon', methods=['GET'])
@@ -609,13 +1042,13 @@ def get_expiring_soon():
     days = request.args.get('days', 30, type=int)
     threshold_date = datetime.utcnow() + timedelta(days=days)
 
-    items = Item.query.filter(
+    query = Item.list_query().filter(
         Item.status == 'in_freezer',
         Item.expiration_date.isnot(None),
         Item.expiration_date <= threshold_date
-    ).order_by(Item.expiration_date.asc()).all()
+    ).order_by(Item.expiration_date.asc())
 
-    return jsonify([item.to_dict() for item in items]), 200
+    return item_list_response(query, lambda: [item.to_dict() for item in query.all()])
 
 
 @items_bp.route('/oldest', methods=['GET'])
@@ -624,12 +1057,73 @@ def get_oldest_items():
     """Get oldest items in freezer"""
     limit = request.args.get('limit', 10, type=int)
 
-    items = Item.query.filter_by(status='in_freezer')\
-        .order_by(Item.added_date.asc())\
-        .limit(limit)\
-        .all()
+    query = Item.list_query().filter_by(status='in_freezer')\
+        .order_by(Item.added_date.asc())
+
+    items = query.limit(limit).all()
+    return item_list_response(query, lambda: [item.to_dict() for item in items], page=items)
+
+
+def upc_lookup_response(upc, results, deadline):
+    """Build the lookup_upc response body from the external provider results.
+
+    The Pexels image fallback only gets whatever is left of the lookup deadline.
+    """
+    found = next((result for result in results if result.status == FOUND), None)
+
+    if found:
+        product = found.product
+        image_url = product['image_url']
 
-    return jsonify([item.to_dict() for item in items]), 200
+        # If no image from the UPC provider, try Pexels
+        remaining = deadline - time.monotonic()
+        if not image_url and remaining > 0:
+            image_url = fetch_product_image(product['name'], product['category'], timeout=remaining)
+
+        return {
+            'found': True,
+            'source': found.source,
+            'data': {
+                'name': product['name'],
+                'brand': product['brand'],
+                'category': product['category'],
+                'notes': '',
+                'upc': upc,
+                'image_url': image_url
+            },
+            'message': f'Found product: {product["name"]}'
+        }
+
+    fallback = next((result for result in results if result.source == 'upcdatabase'), None)
+
+    if fallback is None:
+        return {
+            'found': False,
+            'source': 'none',
+            'message': 'UPC not found. Please enter item details manually.',
+            'data': {'upc': upc}
+        }
+    elif fallback.status == NOT_FOUND:
+        return {
+            'found': False,
+            'source': 'api',
+            'message': 'UPC not found in database. Please enter item details manually.',
+            'data': {'upc': upc}
+        }
+    elif fallback.status == FAILED:
+        return {
+            'found': False,
+            'source': 'api',
+            'message': 'UPC lookup failed. Please enter item details manually.',
+            'data': {'upc': upc}
+        }
+    else:
+        return {
+            'found': False,
+            'source': 'error',
+            'message': 'UPC lookup service unavailable. Please enter item details manually.',
+            'data': {'upc': upc}
+        }
 
 
 @items_bp.route('/lookup-upc/<upc>', methods=['GET'])
@@ -637,7 +1131,11 @@ def get_oldest_items():
 def lookup_upc(upc):
     """Lookup product information by UPC code
 
-    First checks local database, then queries upcdatabase.org API if not found locally.
+    First checks local database, then the UPC lookup cache, then queries
+    the external UPC APIs concurrently (bounded by UPC_LOOKUP_DEADLINE) if
+    not found. Found products are cached for
+    UPC_CACHE_TTL_DAYS and unknown UPCs for UPC_NEGATIVE_CACHE_TTL_HOURS,
+    so repeat scans don't wait on (or use up the rate limit of) the APIs.
     Returns product information to auto-fill the add item form.
     """
     # First check if we have this UPC in our local database
@@ -659,141 +1157,21 @@ def lookup_upc(upc):
             'message': f'You already have "{local_item.name}" in your inventory!'
         }), 200
 
+    cached = get_cached_upc_lookup(upc)
+    if cached is not None:
+        cached['cached'] = True
+        return jsonify(cached), 200
+
     # Not found locally, try external APIs
-    # Priority: 1. UPC Item DB (free, good images), 2. UPCDatabase.org (requires key)
+    deadline = lookup_deadline()
+    results = lookup_upc_providers(upc, deadline)
+    response = upc_lookup_response(upc, results, deadline)
 
-    # Try UPC Item DB API first (trial endpoint, no key required)
-    try:
-        response = requests.get(
-            f'https://api.upcitemdb.com/prod/trial/lookup',
-            params={'upc': upc},
-            timeout=5
-        )
+    ttl = upc_cache_ttl(results)
+    if ttl:
+        cache_upc_lookup(upc, response, ttl)
 
-        if response.status_code == 200:
-            api_data = response.json()
-
-            # Log the response for debugging
-            import logging
-            logging.info(f"UPC Item DB Response: {api_data}")
-
-            # Check if product was found
-            if api_data.get('code') == 'OK' and api_data.get('items'):
-                product_data = api_data['items'][0]
-
-                product_name = product_data.get('title', '')
-                brand = product_data.get('brand', '')
-                category = product_data.get('category', '')
-
-                # Get product image from UPC Item DB
-                image_url = None
-                if product_data.get('images'):
-                    # Use first image from array
-                    image_url = product_data['images'][0]
-
-                # If no image from UPC Item DB, try Pexels
-                if not image_url:
-                    image_url = fetch_product_image(product_name, category)
-
-                return jsonify({
-                    'found': True,
-                    'source': 'upcitemdb',
-                    'data': {
-                        'name': product_name,
-                        'brand': brand,
-                        'category': category,
-                        'notes': '',
-                        'upc': upc,
-                        'image_url': image_url
-                    },
-                    'message': f'Found product: {product_name}'
-                }), 200
-
-    except requests.RequestException as e:
-        # UPC Item DB failed, will try fallback
-        import logging
-        logging.warning(f"UPC Item DB lookup failed: {e}")
-
-    # Fallback to UPCDatabase.org API
-    api_key = os.environ.get('UPC_API_KEY')
-
-    if not api_key:
-        return jsonify({
-            'found': False,
-            'source': 'none',
-            'message': 'UPC not found. Please enter item details manually.',
-            'data': {'upc': upc}
-        }), 200
-
-    try:
-        # Call upcdatabase.org API
-        response = requests.get(
-            f'https://api.upcdatabase.org/product/{upc}',
-            headers={'Authorization': f'Bearer {api_key}'},
-            timeout=5
-        )
-
-        if response.status_code == 200:
-            api_data = response.json()
-
-            # Log the response for debugging
-            import logging
-            logging.info(f"UPCDatabase.org Response: {api_data}")
-
-            # Extract relevant fields from API response
-            # Handle both direct fields and nested 'items' array structure
-            if 'items' in api_data and len(api_data['items']) > 0:
-                product_data = api_data['items'][0]
-            else:
-                product_data = api_data
-
-            product_name = product_data.get('title') or product_data.get('description', '') or product_data.get('brand', '') + ' ' + product_data.get('category', '')
-            brand = product_data.get('brand', '')
-            category = product_data.get('category', '')
-
-            # Try to get product image
-            # Priority: 1. UPC API image, 2. Pexels search
-            image_url = product_data.get('images', [None])[0] if product_data.get('images') else None
-
-            # If no image from UPC API, try Pexels
-            if not image_url:
-                image_url = fetch_product_image(product_name, category)
-
-            return jsonify({
-                'found': True,
-                'source': 'upcdatabase',
-                'data': {
-                    'name': product_name,
-                    'brand': brand,
-                    'category': category,
-                    'notes': '',
-                    'upc': upc,
-                    'image_url': image_url
-                },
-                'message': f'Found product: {product_name}'
-            }), 200
-        elif response.status_code == 404:
-            return jsonify({
-                'found': False,
-                'source': 'api',
-                'message': 'UPC not found in database. Please enter item details manually.',
-                'data': {'upc': upc}
-            }), 200
-        else:
-            return jsonify({
-                'found': False,
-                'source': 'api',
-                'message': f'UPC lookup failed. Please enter item details manually.',
-                'data': {'upc': upc}
-            }), 200
-
-    except requests.RequestException as e:
-        return jsonify({
-            'found': False,
-            'source': 'error',
-            'message': 'UPC lookup service unavailable. Please enter item details manually.',
-            'data': {'upc': upc}
-        }), 200
+    return jsonify(response), 200
 
 
 @items_bp.route('/search-image', methods=['POST'])
@@ -828,6 +1206,22 @@ def search_image():
         }), 200
 
 
+def item_label(item, show_name=False, show_expiration=False, show_category=False, show_weight=False):
+    """Build the render_labels_pdf entry for an item with the selected info lines"""
+    category_name = item.category_name() if show_category else None
+
+    return {
+        'qr_code': item.qr_code,
+        # Encode with full URL that phones can open
+        'qr_data': f"{get_base_url()}/item/{item.qr_code}",
+        'name': item.name if show_name else None,
+        'category': category_name[:25] if category_name else None,
+        'weight': f"{item.weight} {item.weight_unit}" if show_weight and item.weight else None,
+        'expiration': f"Exp: {item.expiration_date.strftime('%m/%d/%Y')}"
+                      if show_expiration and item.expiration_date else None,
+    }
+
+
 @items_bp.route('/print-labels', methods=['POST'])
 @jwt_required()
 def print_labels():
@@ -852,122 +1246,16 @@ def print_labels():
     show_weight = data.get('show_weight', False)
 
     # Fetch items
-    items = Item.query.filter(Item.id.in_(item_ids)).all()
+    items = Item.list_query().filter(Item.id.in_(item_ids)).all()
 
     if not items:
         return jsonify({'error': 'No items found'}), 404
 
-    # Create PDF in memory
-    pdf_file = io.BytesIO()
-    c = pdf_canvas.Canvas(pdf_file, pagesize=letter)
-    page_width, page_height = letter
-
-    # Label dimensions
-    label_size = 1.5 * inch
-    label_gap = 0.25 * inch
-    margin = 0.5 * inch
-
-    # Calculate how many labels fit per row
-    available_width = page_width - (2 * margin)
-    labels_per_row = int(available_width / (label_size + label_gap))
-
-    # Starting positions
-    x_start = margin
-    y_start = page_height - margin - label_size
-
-    col = 0
-    row = 0
-
-    for item in items:
-        # Generate QR code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=2,
-        )
-        # Encode with full URL that phones can open
-        base_url = get_base_url()
-        qr_data = f"{base_url}/item/{item.qr_code}"
-        qr.add_data(qr_data)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-
-        # Convert QR code to ImageReader
-        img_io = io.BytesIO()
-        img.save(img_io, 'PNG')
-        img_io.seek(0)
-        qr_img = ImageReader(img_io)
-
-        # Check if additional info is present
-        has_info = (show_name and item.name) or \
-                   (show_expiration and item.expiration_date) or \
-                   (show_category and item.category) or \
-                   (show_weight and item.weight)
-
-        # Calculate position for this label
-        x = x_start + col * (label_size + label_gap)
-        y = y_start - row * (label_size + label_gap)
-
-        # Check if we need a new page
-        if y < margin:
-            c.showPage()
-            row = 0
-            col = 0
-            x = x_start
-            y = y_start
-
-        # Draw label border
-        c.rect(x, y, label_size, label_size)
-
-        # QR code size
-        qr_size = 0.9 * inch if not has_info else 0.8 * inch
-
-        # Draw QR code (centered horizontally)
-        qr_x = x + (label_size - qr_size) / 2
-        qr_y = y + label_size - qr_size - 0.1 * inch
-        c.drawImage(qr_img, qr_x, qr_y, width=qr_size, height=qr_size)
-
-        # Draw QR code text
-        c.setFont("Courier-Bold", 10 if has_info else 11)
-        text_y = qr_y - 0.15 * inch
-        c.drawCentredString(x + label_size / 2, text_y, item.qr_code)
-
-        # Draw additional info if present
-        if has_info:
-            c.setFont("Helvetica", 7)
-            info_y = text_y - 0.12 * inch
-
-            if show_name and item.name:
-                c.setFont("Helvetica-Bold", 7)
-                # Truncate if too long
-                name = item.name[:20] + '...' if len(item.name) > 20 else item.name
-                c.drawCentredString(x + label_size / 2, info_y, name)
-                info_y -= 0.1 * inch
-                c.setFont("Helvetica", 7)
-
-            if show_category and item.category:
-                c.drawCentredString(x + label_size / 2, info_y, item.category.name[:25])
-                info_y -= 0.1 * inch
-
-            if show_weight and item.weight:
-                weight_text = f"{item.weight} {item.weight_unit}"
-                c.drawCentredString(x + label_size / 2, info_y, weight_text)
-                info_y -= 0.1 * inch
-
-            if show_expiration and item.expiration_date:
-                exp_text = f"Exp: {item.expiration_date.strftime('%m/%d/%Y')}"
-                c.drawCentredString(x + label_size / 2, info_y, exp_text)
-
-        # Move to next position
-        col += 1
-        if col >= labels_per_row:
-            col = 0
-            row += 1
-
-    # Save PDF
-    c.save()
-    pdf_file.seek(0)
+    labels = [
+        item_label(item, show_name, show_expiration, show_category, show_weight)
+        for item in items
+    ]
+    pdf_file = io.BytesIO(render_labels_pdf(labels))
 
     # Return PDF as downloadable file
     return send_file(
@@ -978,117 +1266,230 @@ def print_labels():
     )
 
 
+# Rows fetched per round trip when streaming exports
+EXPORT_BATCH_SIZE = 500
+
+
+def export_row_batches(status):
+    """Yield batches of item rows for export.
+
+    Selects plain columns with the category name joined in, so rows never
+    enter the session identity map and there is no per-row lazy load.
+    yield_per makes PostgreSQL stream through a server-side cursor instead
+    of buffering the whole result set.
+
+    Args:
+        status: Status filter (in_freezer, consumed, thrown_out, all)
+    """
+    stmt = db.select(
+        Item.qr_code,
+        Item.upc,
+        Item.image_url,
+        Item.name,
+        Category.name.label('category'),
+        Item.source,
+        Item.weight,
+        Item.weight_unit,
+        Item.added_date,
+        Item.expiration_date,
+        Item.status,
+        Item.removed_date,
+        Item.notes
+    ).outerjoin(Category, Item.category_id == Category.id).order_by(Item.id)
+
+    if status != 'all':
+        stmt = stmt.where(Item.status == status)
+
+    result = db.session.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    yield from result.partitions()
+
+
+def export_download_headers(extension):
+    """Content-Disposition header for a timestamped export download"""
+    filename = f'freezer_inventory_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.{extension}'
+    return {'Content-Disposition': f'attachment; filename={filename}'}
+
+
 @items_bp.route('/export/csv', methods=['GET'])
 @jwt_required()
 def export_csv():
     """Export all items to CSV format.
 
+    The file is streamed in chunks as rows are read from the database, so
+    memory use stays flat no matter how many items are exported.
+
     Query parameters:
     - status: Filter by status (in_freezer, consumed, thrown_out, all)
     """
-    current_user_id = int(get_jwt_identity())
     status = request.args.get('status', 'in_freezer')
 
-    # Build query
-    query = Item.query
-
-    if status != 'all':
-        query = query.filter_by(status=status)
-
-    items = query.all()
-
-    # Create CSV in memory
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    # Write header
-    writer.writerow([
-        'QR Code', 'UPC', 'Name', 'Category', 'Source', 'Weight',
-        'Weight Unit', 'Added Date', 'Expiration Date', 'Status',
-        'Removed Date', 'Notes'
-    ])
+    def generate():
+        output = io.StringIO()
+        writer = csv.writer(output)
 
-    # Write data
-    for item in items:
+        # Write header
         writer.writerow([
-            item.qr_code,
-            item.upc or '',
-            item.name,
-            item.category.name if item.category else '',
-            item.source or '',
-            item.weight or '',
-            item.weight_unit or '',
-            item.added_date.isoformat() if item.added_date else '',
-            item.expiration_date.isoformat() if item.expiration_date else '',
-            item.status,
-            item.removed_date.isoformat() if item.removed_date else '',
-            item.notes or ''
+            'QR Code', 'UPC', 'Name', 'Category', 'Source', 'Weight',
+            'Weight Unit', 'Added Date', 'Expiration Date', 'Status',
+            'Removed Date', 'Notes'
         ])
 
-    # Prepare response
-    output.seek(0)
-    return send_file(
-        io.BytesIO(output.getvalue().encode('utf-8')),
+        # Write data, one chunk per batch of rows
+        for rows in export_row_batches(status):
+            for row in rows:
+                writer.writerow([
+                    row.qr_code,
+                    row.upc or '',
+                    row.name,
+                    row.category or '',
+                    row.source or '',
+                    row.weight or '',
+                    row.weight_unit or '',
+                    row.added_date.isoformat() if row.added_date else '',
+                    row.expiration_date.isoformat() if row.expiration_date else '',
+                    row.status,
+                    row.removed_date.isoformat() if row.removed_date else '',
+                    row.notes or ''
+                ])
+
+            yield output.getvalue().encode('utf-8')
+            output.seek(0)
+            output.truncate(0)
+
+        # Header-only export when there are no matching items
+        if output.tell():
+            yield output.getvalue().encode('utf-8')
+
+    return Response(
+        stream_with_context(generate()),
         mimetype='text/csv',
-        as_attachment=True,
-        download_name=f'freezer_inventory_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.csv'
+        headers=export_download_headers('csv')
     )
 
 
+def export_item_dict(row):
+    """Convert an export row to the JSON shape accepted by import_json"""
+    return {
+        'qr_code': row.qr_code,
+        'upc': row.upc,
+        'image_url': row.image_url,
+        'name': row.name,
+        'category': row.category,
+        'source': row.source,
+        'weight': row.weight,
+        'weight_unit': row.weight_unit,
+        'added_date': row.added_date.isoformat() if row.added_date else None,
+        'expiration_date': row.expiration_date.isoformat() if row.expiration_date else None,
+        'status': row.status,
+        'removed_date': row.removed_date.isoformat() if row.removed_date else None,
+        'notes': row.notes
+    }
+
+
 @items_bp.route('/export/json', methods=['GET'])
 @jwt_required()
 def export_json():
     """Export all items to JSON format.
 
+    The export is streamed batch by batch as rows are read from the database.
+
     Query parameters:
     - status: Filter by status (in_freezer, consumed, thrown_out, all)
+    - format: 'json' (default) for a {"items": [...]} document compatible
+      with import_json, or 'ndjson' for one item object per line
+    - pretty: 'true' (default) to indent the JSON document, 'false' for
+      compact output (roughly half the size)
     """
-    current_user_id = int(get_jwt_identity())
     status = request.args.get('status', 'in_freezer')
+    export_format = request.args.get('format', 'json')
+    pretty = request.args.get('pretty', 'true').lower() != 'false'
+
+    if export_format not in ('json', 'ndjson'):
+        return jsonify({'error': 'Invalid format. Must be "json" or "ndjson"'}), 400
+
+    if export_format == 'ndjson':
+        def generate():
+            for rows in export_row_batches(status):
+                yield ''.join(
+                    json_lib.dumps(export_item_dict(row), separators=(',', ':')) + '\n'
+                    for row in rows
+                ).encode('utf-8')
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype='application/x-ndjson',
+            headers=export_download_headers('ndjson')
+        )
 
-    # Build query
-    query = Item.query
+    if pretty:
+        item_separator = ',\n'
 
-    if status != 'all':
-        query = query.filter_by(status=status)
+        def dump_item(item_dict):
+            return textwrap.indent(json_lib.dumps(item_dict, indent=2), '    ')
+    else:
+        item_separator = ','
 
-    items = query.all()
-
-    # Convert to JSON-serializable format
-    items_data = []
-    for item in items:
-        item_dict = {
-            'qr_code': item.qr_code,
-            'upc': item.upc,
-            'image_url': item.image_url,
-            'name': item.name,
-            'category': item.category.name if item.category else None,
-            'source': item.source,
-            'weight': item.weight,
-            'weight_unit': item.weight_unit,
-            'added_date': item.added_date.isoformat() if item.added_date else None,
-            'expiration_date': item.expiration_date.isoformat() if item.expiration_date else None,
-            'status': item.status,
-            'removed_date': item.removed_date.isoformat() if item.removed_date else None,
-            'notes': item.notes
-        }
-        items_data.append(item_dict)
+        def dump_item(item_dict):
+            return json_lib.dumps(item_dict, separators=(',', ':'))
 
-    # Create JSON response
-    json_data = json_lib.dumps({
-        'exported_at': datetime.utcnow().isoformat(),
-        'total_items': len(items_data),
-        'items': items_data
-    }, indent=2)
+    def generate():
+        exported_at = json_lib.dumps(datetime.utcnow().isoformat())
+        if pretty:
+            yield f'{{\n  "exported_at": {exported_at},\n  "items": ['.encode('utf-8')
+        else:
+            yield f'{{"exported_at":{exported_at},"items":['.encode('utf-8')
+
+        # total_items goes after the list since it's only known once streamed
+        total_items = 0
+        for rows in export_row_batches(status):
+            chunk = item_separator.join(dump_item(export_item_dict(row)) for row in rows)
+            if pretty:
+                chunk = ('\n' if total_items == 0 else item_separator) + chunk
+            elif total_items:
+                chunk = item_separator + chunk
+            total_items += len(rows)
+            yield chunk.encode('utf-8')
+
+        if pretty:
+            closing = '\n  ]' if total_items else ']'
+            yield f'{closing},\n  "total_items": {total_items}\n}}'.encode('utf-8')
+        else:
+            yield f'],"total_items":{total_items}}}'.encode('utf-8')
 
-    return send_file(
-        io.BytesIO(json_data.encode('utf-8')),
+    return Response(
+        stream_with_context(generate()),
         mimetype='application/json',
-        as_attachment=True,
-        download_name=f'freezer_inventory_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.json'
+        headers=export_download_headers('json')
     )
 
 
+# File extensions accepted by import_json, mapped to their import format
+JSON_IMPORT_EXTENSIONS = {'.json': 'json', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+
+def allow_import_upload_size():
+    """Raise the request body limit for import uploads to MAX_IMPORT_SIZE.
+
+    Must be called before request.files is first accessed.
+    """
+    max_size = current_app.config.get('MAX_IMPORT_SIZE')
+    if max_size:
+        request.max_content_length = max_size
+
+
+def is_background_import():
+    """Whether the client asked for the upload to be imported as a background job"""
+    value = request.args.get('background') or request.form.get('background') or ''
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def start_background_import(user_id, file, file_type):
+    """Queue an uploaded file for import and return 202 with the job"""
+    job = start_import_job(current_app._get_current_object(), user_id, file, file_type)
+    status_url = url_for('items.get_import_job', job_id=job.id)
+    return jsonify(job.to_dict()), 202, {'Location': status_url}
+
+
 @items_bp.route('/import/csv', methods=['POST'])
 @jwt_required()
 def import_csv():
@@ -1098,9 +1499,17 @@ def import_csv():
     QR Code, UPC, Name, Category, Source, Weight, Weight Unit,
     Added Date, Expiration Date, Status, Removed Date, Notes
 
+    Send background=true (query string or form field) to run the import as
+    a background job: the response is then 202 with the job, whose progress
+    can be polled at GET /api/items/import/jobs/<job_id>.
+
+    The file is parsed as it is read and rows are written in batches, so
+    uploads up to MAX_IMPORT_SIZE are accepted.
+
     Returns summary of imported items.
     """
     current_user_id = int(get_jwt_identity())
+    allow_import_upload_size()
 
     if 'file' not in request.files:
         return jsonify({'error': 'No file provided'}), 400
@@ -1113,96 +1522,12 @@ def import_csv():
     if not file.filename.endswith('.csv'):
         return jsonify({'error': 'File must be a CSV'}), 400
 
-    try:
-        # Read CSV file
-        stream = io.StringIO(file.stream.read().decode('utf-8'), newline=None)
-        csv_reader = csv.DictReader(stream)
-
-        imported = 0
-        skipped = 0
-        errors = []
-
-        for row_num, row in enumerate(csv_reader, start=2):
-            try:
-                # Get or create category
-                category = None
-                if row.get('Category'):
-                    category = Category.query.filter_by(name=row['Category']).first()
-                    if not category:
-                        # Create category if it doesn't exist
-                        category = Category(
-                            name=row['Category'],
-                            default_expiration_days=180,
-                            created_by_user_id=current_user_id
-                        )
-                        db.session.add(category)
-                        db.session.flush()  # Get the ID
-
-                # Generate or use provided QR code
-                qr_code = row.get('QR Code') or generate_qr_code()
-
-                # Check if item already exists
-                if Item.query.filter_by(qr_code=qr_code).first():
-                    skipped += 1
-                    errors.append(f"Row {row_num}: QR code '{qr_code}' already exists")
-                    continue
-
-                # Parse dates
-                added_date = None
-                if row.get('Added Date'):
-                    try:
-                        added_date = datetime.fromisoformat(row['Added Date'].replace('Z', '+00:00'))
-                    except ValueError:
-                        pass
-
-                expiration_date = None
-                if row.get('Expiration Date'):
-                    try:
-                        expiration_date = datetime.fromisoformat(row['Expiration Date'].replace('Z', '+00:00'))
-                    except ValueError:
-                        pass
-
-                removed_date = None
-                if row.get('Removed Date'):
-                    try:
-                        removed_date = datetime.fromisoformat(row['Removed Date'].replace('Z', '+00:00'))
-                    except ValueError:
-                        pass
-
-                # Create item
-                item = Item(
-                    qr_code=qr_code,
-                    upc=row.get('UPC') or None,
-                    name=row.get('Name') or 'Unnamed Item',
-                    source=row.get('Source') or None,
-                    weight=float(row['Weight']) if row.get('Weight') else None,
-                    weight_unit=row.get('Weight Unit') or 'lb',
-                    category_id=category.id if category else None,
-                    added_date=added_date,
-                    expiration_date=expiration_date,
-                    status=row.get('Status') or 'in_freezer',
-                    removed_date=removed_date,
-                    notes=row.get('Notes') or None,
-                    added_by_user_id=current_user_id
-                )
-
-                db.session.add(item)
-                imported += 1
-
-            except Exception as e:
-                # Log detailed error including stack trace, but do not expose it to the client
-                logging.exception("Error importing row %s in CSV import", row_num)
-                skipped += 1
-                errors.append(f"Row {row_num}: Failed to import row")
+    if is_background_import():
+        return start_background_import(current_user_id, file, 'csv')
 
-        db.session.commit()
-
-        return jsonify({
-            'success': True,
-            'imported': imported,
-            'skipped': skipped,
-            'errors': errors[:10]  # Limit to first 10 errors
-        }), 200
+    try:
+        summary = import_csv_stream(file.stream, ItemImporter(current_user_id, label='Row'))
+        return jsonify(summary), 200
 
     except Exception as e:
         db.session.rollback()
@@ -1228,9 +1553,19 @@ def import_json():
       ]
     }
 
+    A .ndjson or .jsonl file with one item object per line (as written by
+    the export with format=ndjson) is also accepted; per-line errors are
+    reported by line number.
+
+    Items are parsed one at a time as the file is read, so uploads up to
+    MAX_IMPORT_SIZE are accepted.
+
+    Send background=true to run the import as a background job (see import_csv).
+
     Returns summary of imported items.
     """
     current_user_id = int(get_jwt_identity())
+    allow_import_upload_size()
 
     if 'file' not in request.files:
         return jsonify({'error': 'No file provided'}), 400
@@ -1240,105 +1575,45 @@ def import_json():
     if file.filename == '':
         return jsonify({'error': 'No file selected'}), 400
 
-    if not file.filename.endswith('.json'):
+    file_type = JSON_IMPORT_EXTENSIONS.get(os.path.splitext(file.filename)[1].lower())
+    if not file_type:
         return jsonify({'error': 'File must be a JSON'}), 400
 
+    if is_background_import():
+        return start_background_import(current_user_id, file, file_type)
+
     try:
-        # Read JSON file
-        data = json_lib.load(file.stream)
-
-        if 'items' not in data or not isinstance(data['items'], list):
-            return jsonify({'error': 'Invalid JSON format. Expected {"items": [...]}'}), 400
-
-        imported = 0
-        skipped = 0
-        errors = []
-
-        for idx, item_data in enumerate(data['items'], start=1):
-            try:
-                # Get or create category
-                category = None
-                if item_data.get('category'):
-                    category = Category.query.filter_by(name=item_data['category']).first()
-                    if not category:
-                        # Create category if it doesn't exist
-                        category = Category(
-                            name=item_data['category'],
-                            default_expiration_days=180,
-                            created_by_user_id=current_user_id
-                        )
-                        db.session.add(category)
-                        db.session.flush()
-
-                # Generate or use provided QR code
-                qr_code = item_data.get('qr_code') or generate_qr_code()
-
-                # Check if item already exists
-                if Item.query.filter_by(qr_code=qr_code).first():
-                    skipped += 1
-                    errors.append(f"Item {idx}: QR code '{qr_code}' already exists")
-                    continue
-
-                # Parse dates
-                added_date = None
-                if item_data.get('added_date'):
-                    try:
-                        added_date = datetime.fromisoformat(item_data['added_date'].replace('Z', '+00:00'))
-                    except ValueError:
-                        pass
-
-                expiration_date = None
-                if item_data.get('expiration_date'):
-                    try:
-                        expiration_date = datetime.fromisoformat(item_data['expiration_date'].replace('Z', '+00:00'))
-                    except ValueError:
-                        pass
-
-                removed_date = None
-                if item_data.get('removed_date'):
-                    try:
-                        removed_date = datetime.fromisoformat(item_data['removed_date'].replace('Z', '+00:00'))
-                    except ValueError:
-                        pass
-
-                # Create item
-                item = Item(
-                    qr_code=qr_code,
-                    upc=item_data.get('upc'),
-                    image_url=item_data.get('image_url'),
-                    name=item_data.get('name') or 'Unnamed Item',
-                    source=item_data.get('source'),
-                    weight=item_data.get('weight'),
-                    weight_unit=item_data.get('weight_unit') or 'lb',
-                    category_id=category.id if category else None,
-                    added_date=added_date,
-                    expiration_date=expiration_date,
-                    status=item_data.get('status') or 'in_freezer',
-                    removed_date=removed_date,
-                    notes=item_data.get('notes'),
-                    added_by_user_id=current_user_id
-                )
-
-                db.session.add(item)
-                imported += 1
-
-            except Exception as e:
-                # Log detailed error including stack trace, but do not expose it to the client
-                logging.exception("Error importing item %s in JSON import", idx)
-                skipped += 1
-                errors.append(f"Item {idx}: Failed to import item")
+        if file_type == 'ndjson':
+            summary = import_ndjson_stream(file.stream, ItemImporter(current_user_id, label='Line'))
+        else:
+            summary = import_json_stream(file.stream, ItemImporter(current_user_id, label='Item'))
+        return jsonify(summary), 200
 
-        db.session.commit()
-
-        return jsonify({
-            'success': True,
-            'imported': imported,
-            'skipped': skipped,
-            'errors': errors[:10]  # Limit to first 10 errors
-        }), 200
+    except ImportFormatError as e:
+        return jsonify({'error': str(e)}), 400
 
     except Exception as e:
         db.session.rollback()
         # Log detailed error including stack trace, but return a generic message to the client
         logging.exception("Failed to import JSON")
         return jsonify({'error': 'Failed to import JSON'}), 500
+
+
+@items_bp.route('/import/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_import_job(job_id):
+    """Get progress of a background import job (owner or admin only)"""
+    from flask_jwt_extended import get_jwt
+    claims = get_jwt()
+    current_user_id = int(get_jwt_identity())
+
+    job = db.session.get(ImportJob, job_id)
+
+    if not job or (job.user_id != current_user_id and claims.get('role') != 'admin'):
+        return jsonify({'error': 'Import job not found'}), 404
+
+    # The worker running it may have been restarted since
+    if fail_if_abandoned(job):
+        db.session.commit()
+
+    return jsonify(job.to_dict()), 200
@@ -1,8 +1,12 @@
 from flask import Blueprint, request, jsonify, send_file, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from models import db, Setting, Item
+from settings_cache import mark_settings_changed, invalidate_settings_cache
+from cache_versions import invalidate_all_caches, read_cache_versions
+from item_changes import delete_items, mark_items_reset
+from sqlite_db import backup_sqlite_database, check_sqlite_database, restore_sqlite_database
 import os
-import shutil
+import tempfile
 from datetime import datetime
 from werkzeug.utils import secure_filename
 import logging
@@ -53,7 +57,9 @@ def update_settings():
             )
             db.session.add(setting)
 
+    mark_settings_changed()
     db.session.commit()
+    invalidate_settings_cache()
 
     return jsonify({'message': 'Settings updated successfully'}), 200
 
@@ -67,10 +73,10 @@ def purge_history():
     if claims.get('role') != 'admin':
         return jsonify({'error': 'Admin access required'}), 403
 
-    # Delete all items not in freezer
-    deleted_count = Item.query.filter(
+    # Delete all items not in freezer, leaving tombstones for synced clients
+    deleted_count = delete_items(Item.query.filter(
         Item.status.in_(['consumed', 'thrown_out'])
-    ).delete()
+    ))
 
     db.session.commit()
 
@@ -133,11 +139,33 @@ def update_system_settings():
             )
             db.session.add(setting)
 
+    mark_settings_changed()
     db.session.commit()
+    invalidate_settings_cache()
 
     return jsonify({'message': 'System settings updated successfully'}), 200
 
 
+@settings_bp.route('/database/pool', methods=['GET'])
+@jwt_required()
+def get_pool_stats():
+    """Get this worker's database connection pool usage (admin only)
+
+    Each gunicorn worker has its own pool, so repeated calls may be
+    answered by different workers (see pid).
+    """
+    claims = get_jwt()
+
+    if claims.get('role') != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+
+    options = current_app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    return jsonify({
+        **current_app.extensions['db_pool_stats'].to_dict(),
+        'options': {name: value for name, value in options.items() if name != 'connect_args'},
+    }), 200
+
+
 @settings_bp.route('/backup/download', methods=['GET'])
 @jwt_required()
 def download_backup():
@@ -160,13 +188,26 @@ def download_backup():
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     backup_filename = f'freezer_inventory_backup_{timestamp}.db'
 
+    # Snapshot rather than send the live file, whose latest commits may
+    # still be in the -wal file
+    fd, snapshot_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        backup_sqlite_database(snapshot_path)
+    except Exception:
+        os.remove(snapshot_path)
+        logging.exception("Failed to snapshot database for download")
+        return jsonify({'error': 'Failed to create backup. Please try again.'}), 500
+
     # Send the file
-    return send_file(
-        db_path,
+    response = send_file(
+        snapshot_path,
         as_attachment=True,
         download_name=backup_filename,
         mimetype='application/x-sqlite3'
     )
+    response.call_on_close(lambda: os.remove(snapshot_path))
+    return response
 
 
 @settings_bp.route('/backup/restore', methods=['POST'])
@@ -198,28 +239,39 @@ def restore_backup():
         # Ensure we have an absolute path
         db_path = os.path.abspath(db_path)
 
-        # Create a backup of current database before restoring
-        if os.path.exists(db_path):
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_path = f'{db_path}.backup_{timestamp}'
-            shutil.copy2(db_path, backup_path)
-
-        # Save uploaded file as new database
-        file.save(db_path)
-
-        # Test if the database is valid by trying to query it
-        from models import User
+        # Check the upload before touching the live database
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        upload_path = f'{db_path}.upload_{timestamp}'
+        file.save(upload_path)
         try:
-            User.query.first()
-        except Exception as e:
-            # SECURITY: Log detailed error for debugging but return generic message
-            logging.exception("Uploaded database file is invalid")
-
-            # If database is invalid, restore from backup
-            if os.path.exists(backup_path):
-                shutil.copy2(backup_path, db_path)
-
-            return jsonify({'error': 'Invalid database file. Please ensure you are uploading a valid backup.'}), 400
+            try:
+                check_sqlite_database(upload_path)
+            except Exception as e:
+                # SECURITY: Log detailed error for debugging but return generic message
+                logging.exception("Uploaded database file is invalid")
+                return jsonify({'error': 'Invalid database file. Please ensure you are uploading a valid backup.'}), 400
+
+            # Create a backup of current database before restoring
+            if os.path.exists(db_path):
+                backup_sqlite_database(f'{db_path}.backup_{timestamp}')
+
+            # The restore brings back the backup's older cache versions
+            previous_versions = read_cache_versions()
+
+            # Copy the upload into the live database (rather than replacing
+            # the file, which other workers and the -wal file still refer to)
+            db.session.remove()
+            restore_sqlite_database(upload_path)
+        finally:
+            os.remove(upload_path)
+
+        # Backups from older versions may lack newer tables (e.g. cache_versions)
+        db.create_all()
+
+        # Cached settings etc. came from the old database, and clients'
+        # cached item lists and sync cursors refer to the old items
+        mark_items_reset(previous_versions)
+        invalidate_all_caches(previous_versions)
 
         return jsonify({
             'message': 'Database restored successfully. Please refresh the page.'
@@ -0,0 +1,165 @@
+"""
+Full-text search for items.
+
+SQLite uses an FTS5 external-content table (items_fts) kept in sync with the
+items table by triggers, so creates, updates, imports, deletes and purges all
+update the index without any application code. PostgreSQL uses a GIN index
+over a tsvector expression, which the planner maintains on its own.
+
+If neither is available (e.g. SQLite built without FTS5, or a restored
+backup that predates the index) searches fall back to ILIKE matching.
+Whether the SQLite index exists is checked once per worker and cached
+until the database is replaced: every restore moves the items reset
+generation on (see item_changes.mark_items_reset), which drops the cached
+answer in all workers. Workers other than the one creating the index pick
+it up when restarted, searching with LIKE until then.
+"""
+import logging
+import re
+
+from flask import has_app_context
+from sqlalchemy import event, func, text, Float, Integer
+
+from cache_versions import get_cache
+from item_changes import ITEMS_RESET_VERSION
+from models import db, Item
+
+# Weight name matches above source/notes when ranking (bm25 column weights)
+SQLITE_BM25_WEIGHTS = (10.0, 2.0, 1.0)
+
+SQLITE_SEARCH_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+        name, source, notes,
+        content='items', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS items_fts_ai AFTER INSERT ON items BEGIN
+        INSERT INTO items_fts(rowid, name, source, notes)
+        VALUES (new.id, new.name, new.source, new.notes);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS items_fts_ad AFTER DELETE ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, name, source, notes)
+        VALUES ('delete', old.id, old.name, old.source, old.notes);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS items_fts_au AFTER UPDATE OF name, source, notes ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, name, source, notes)
+        VALUES ('delete', old.id, old.name, old.source, old.notes);
+        INSERT INTO items_fts(rowid, name, source, notes)
+        VALUES (new.id, new.name, new.source, new.notes);
+    END""",
+]
+
+# Must match postgres_search_vector() exactly or the planner won't use the index
+POSTGRES_SEARCH_DDL = [
+    """CREATE INDEX IF NOT EXISTS ix_items_search ON items USING GIN (
+        to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(source, '') || ' ' || coalesce(notes, ''))
+    )""",
+]
+
+
+def create_search_index(connection, rebuild=False):
+    """Create the full-text search structures for the connection's dialect.
+
+    Args:
+        connection: SQLAlchemy connection inside a transaction
+        rebuild: Re-index existing rows (SQLite only; needed when adding
+            search to a database that already has items)
+
+    Returns:
+        bool: True if a full-text index is in place
+    """
+    dialect = connection.dialect.name
+
+    if dialect == 'sqlite':
+        try:
+            for statement in SQLITE_SEARCH_DDL:
+                connection.exec_driver_sql(statement)
+            if rebuild:
+                connection.exec_driver_sql("INSERT INTO items_fts(items_fts) VALUES ('rebuild')")
+        except Exception:
+            logging.warning("SQLite FTS5 unavailable, item search will use LIKE matching", exc_info=True)
+            return False
+        if has_app_context():
+            get_cache(ITEMS_RESET_VERSION).invalidate()
+        return True
+
+    if dialect == 'postgresql':
+        for statement in POSTGRES_SEARCH_DDL:
+            connection.exec_driver_sql(statement)
+        return True
+
+    return False
+
+
+@event.listens_for(Item.__table__, 'after_create')
+def _create_search_index_after_items(target, connection, **kw):
+    create_search_index(connection)
+
+
+@event.listens_for(Item.__table__, 'before_drop')
+def _drop_search_index_before_items(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql('DROP TABLE IF EXISTS items_fts')
+
+
+def search_terms(search):
+    """Split a search box string into word tokens"""
+    return re.findall(r'\w+', search)
+
+
+def sqlite_fts_available():
+    """Check whether the current SQLite database has the items_fts table (cached)"""
+    return get_cache(ITEMS_RESET_VERSION).get('sqlite_fts', lambda: db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_fts'")
+    ).first() is not None)
+
+
+def postgres_search_vector():
+    """tsvector expression covered by the ix_items_search GIN index"""
+    return func.to_tsvector(
+        'simple',
+        func.coalesce(Item.name, '') + ' ' + func.coalesce(Item.source, '') + ' ' + func.coalesce(Item.notes, '')
+    )
+
+
+def apply_item_search(query, search):
+    """Restrict an Item query to rows matching a search string.
+
+    Every word must match the start of a word in name, source or notes, so
+    partially typed words still find results as the user types.
+
+    Returns:
+        tuple: (filtered query, ORDER BY clause ranking best matches first,
+            or None when falling back to LIKE matching)
+    """
+    terms = search_terms(search)
+    dialect = db.engine.dialect.name
+
+    if terms and dialect == 'sqlite' and sqlite_fts_available():
+        match = ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+        weights = ', '.join(str(weight) for weight in SQLITE_BM25_WEIGHTS)
+        matches = text(
+            f"SELECT rowid AS item_id, bm25(items_fts, {weights}) AS rank "
+            "FROM items_fts WHERE items_fts MATCH :match"
+        ).bindparams(match=match).columns(item_id=Integer, rank=Float).subquery('search_matches')
+
+        query = query.join(matches, Item.id == matches.c.item_id)
+        # bm25() is lower-is-better
+        return query, matches.c.rank.asc()
+
+    if terms and dialect == 'postgresql':
+        ts_query = func.to_tsquery('simple', ' & '.join(f'{term}:*' for term in terms))
+        vector = postgres_search_vector()
+        query = query.filter(vector.op('@@')(ts_query))
+        return query, func.ts_rank(vector, ts_query).desc()
+
+    search_pattern = f'%{search}%'
+    query = query.filter(
+        db.or_(
+            Item.name.ilike(search_pattern),
+            Item.source.ilike(search_pattern),
+            Item.notes.ilike(search_pattern)
+        )
+    )
+    return query, None
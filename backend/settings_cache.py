@@ -0,0 +1,44 @@
+"""
+Cached lookups of user and system settings.
+
+Settings are read on hot paths (the items list, image fetching, quick
+login) but change only from the settings page, so each worker keeps them
+in a VersionedCache guarded by the 'settings' version counter.
+"""
+from cache_versions import get_cache, bump_cache_version
+from models import Setting
+
+SETTINGS_CACHE = 'settings'
+
+
+def get_setting(user_id, setting_name, default=None):
+    """Get a setting's value.
+
+    Args:
+        user_id: Owner of the setting, or None for a system setting
+        setting_name: Name of the setting
+        default: Returned if the setting has never been saved
+
+    Returns:
+        str: The stored value, or default
+    """
+    def load():
+        setting = Setting.query.filter_by(user_id=user_id, setting_name=setting_name).first()
+        return setting.setting_value if setting else None
+
+    value = get_cache(SETTINGS_CACHE).get((user_id, setting_name), load)
+    return default if value is None else value
+
+
+def mark_settings_changed():
+    """Bump the settings version as part of the current transaction.
+
+    Call before committing a settings change, then call
+    invalidate_settings_cache() once it is committed.
+    """
+    bump_cache_version(SETTINGS_CACHE)
+
+
+def invalidate_settings_cache():
+    """Drop this worker's cached settings"""
+    get_cache(SETTINGS_CACHE).invalidate()
@@ -0,0 +1,119 @@
+"""
+SQLite connection tuning, and copies of the live database that are safe under WAL.
+
+Every new SQLite connection runs the PRAGMAs from sqlite_pragmas():
+
+- journal_mode=WAL: readers see the last committed state without waiting
+  for a writer, and a writer doesn't wait for readers. Writers still take
+  turns.
+- busy_timeout: a writer waits this long for the write lock instead of
+  failing straight away with "database is locked".
+- synchronous=NORMAL: in WAL mode this skips an fsync per commit. A crashed
+  app loses nothing; a power cut can lose the last few commits but can't
+  corrupt the file.
+- mmap_size, cache_size, temp_store: read pages through a memory map, keep
+  more of them cached per connection, and sort in memory.
+
+In WAL mode recent commits sit in the -wal file next to the database until
+they are checkpointed, so copying the .db file on its own can miss them or
+catch it half written. Backups and restores go through SQLite's online
+backup API instead (backup_sqlite_database, restore_sqlite_database).
+"""
+import os
+import sqlite3
+from contextlib import closing
+
+from sqlalchemy import event
+
+from models import db
+
+JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+TEMP_STORES = ('DEFAULT', 'FILE', 'MEMORY')
+
+
+def _choice(name, default, allowed):
+    value = os.environ.get(name, default).upper()
+    if value not in allowed:
+        raise ValueError(f"{name} must be one of {', '.join(allowed)}")
+    return value
+
+
+SQLITE_JOURNAL_MODE = _choice('SQLITE_JOURNAL_MODE', 'WAL', JOURNAL_MODES)
+
+# Milliseconds a connection waits for another worker's write lock
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+
+SQLITE_SYNCHRONOUS = _choice('SQLITE_SYNCHRONOUS', 'NORMAL', SYNCHRONOUS_LEVELS)
+
+# Megabytes of the database file each connection maps into memory (0 to disable)
+SQLITE_MMAP_SIZE_MB = int(os.environ.get('SQLITE_MMAP_SIZE_MB', '256'))
+
+# Megabytes of page cache per connection
+SQLITE_CACHE_SIZE_MB = int(os.environ.get('SQLITE_CACHE_SIZE_MB', '16'))
+
+SQLITE_TEMP_STORE = _choice('SQLITE_TEMP_STORE', 'MEMORY', TEMP_STORES)
+
+
+def sqlite_pragmas():
+    """PRAGMA statements run on every new connection, from the SQLITE_* settings"""
+    return [
+        f'PRAGMA journal_mode={SQLITE_JOURNAL_MODE}',
+        f'PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT_MS)}',
+        f'PRAGMA synchronous={SQLITE_SYNCHRONOUS}',
+        f'PRAGMA mmap_size={int(SQLITE_MMAP_SIZE_MB) * 1024 * 1024}',
+        # Negative sizes are in KiB rather than pages
+        f'PRAGMA cache_size={-int(SQLITE_CACHE_SIZE_MB) * 1024}',
+        f'PRAGMA temp_store={SQLITE_TEMP_STORE}',
+    ]
+
+
+def apply_sqlite_pragmas(connection):
+    """Run sqlite_pragmas() on a DB-API connection"""
+    cursor = connection.cursor()
+    try:
+        for statement in sqlite_pragmas():
+            cursor.execute(statement)
+    finally:
+        cursor.close()
+
+
+def configure_sqlite_engine(engine):
+    """Tune every connection the engine opens, if it is a SQLite engine"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection)
+
+
+def check_sqlite_database(path):
+    """Raise sqlite3.DatabaseError unless path is a SQLite database with a users table"""
+    with closing(sqlite3.connect(f'file:{path}?mode=ro', uri=True)) as connection:
+        connection.execute('SELECT id FROM users LIMIT 1').fetchall()
+
+
+def backup_sqlite_database(path):
+    """Write a consistent snapshot of the app's database, including WAL contents, to path"""
+    raw = db.engine.raw_connection()
+    try:
+        with closing(sqlite3.connect(path)) as target:
+            raw.driver_connection.backup(target)
+    finally:
+        raw.close()
+
+
+def restore_sqlite_database(path):
+    """Replace the app's database contents with the database at path.
+
+    The live database is overwritten page by page under SQLite's own
+    locking, rather than the file being replaced, so other workers' open
+    connections see the restored data on their next query.
+    """
+    raw = db.engine.raw_connection()
+    try:
+        with closing(sqlite3.connect(path)) as source:
+            source.backup(raw.driver_connection)
+    finally:
+        raw.close()
@@ -59,14 +59,15 @@ if [ -f "$DEV_DB" ]; then
     TIMESTAMP=$(date +%Y%m%d_%H%M%S)
     BACKUP_FILE="$BACKUP_DIR/freezer_inventory_dev_backup_$TIMESTAMP.db"
     echo "📦 Backing up existing dev database..."
-    cp "$DEV_DB" "$BACKUP_FILE"
+    sqlite3 "$DEV_DB" ".backup '$BACKUP_FILE'"
     echo "   Backup saved to: $BACKUP_FILE"
     echo ""
 fi
 
-# Copy production database to dev
+# Copy production database to dev (with the backup API, since both run in
+# WAL mode and recent changes may only be in the -wal files)
 echo "🔄 Copying production database to dev..."
-cp "$PROD_DB" "$DEV_DB"
+sqlite3 "$PROD_DB" ".backup '$DEV_DB'"
 
 # Restore dev admin users if they were saved
 if [ -f "$ADMIN_BACKUP" ] && [ -s "$ADMIN_BACKUP" ]; then
@@ -2,23 +2,36 @@
 Pytest configuration and fixtures for backend tests
 """
 import pytest
+import json
 import os
 import sys
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 # Add parent directory to path so we can import app modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from sqlalchemy import event
+
 from app import create_app
 from models import db, User, Category, Item, Setting
 
 
 @pytest.fixture
-def app():
+def database_uri():
+    """Database for the test app; override in a module to use a real file"""
+    return 'sqlite:///:memory:'
+
+
+@pytest.fixture
+def app(database_uri):
     """Create application for testing"""
     test_config = {
         'TESTING': True,
-        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_DATABASE_URI': database_uri,
         'SQLALCHEMY_TRACK_MODIFICATIONS': False,
         'JWT_SECRET_KEY': 'test-secret-key',
         'SECRET_KEY': 'test-secret-key',
@@ -76,6 +89,35 @@ def runner(app):
     return app.test_cli_runner()
 
 
+@pytest.fixture
+def count_statements(app):
+    """Context manager recording the SQL statements run inside it.
+
+    Usage:
+        with count_statements() as statements:
+            client.get(url, headers=headers)
+        assert len(statements) == 2
+
+    Pass with_parameters=True to record (statement, parameters) pairs.
+    """
+    @contextmanager
+    def count(with_parameters=False):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters) if with_parameters else statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    return count
+
+
 @pytest.fixture
 def admin_token(client):
     """Get JWT token for admin user"""
@@ -124,3 +166,69 @@ def sample_item(app, auth_headers_admin, client):
             headers=auth_headers_admin
         )
         return response.json
+
+
+class StubServer:
+    """A local HTTP server standing in for an external API.
+
+    Set `status`, `body` and `delay` (seconds) to control the reply, or
+    queue one-off statuses in `statuses`. `requests` records the path of
+    each request and `connections` the client address it arrived on.
+    """
+
+    def __init__(self, status=200, body=None):
+        self.status = status
+        self.statuses = []
+        self.body = body if body is not None else {}
+        self.delay = 0
+        self.requests = []
+        self.connections = []
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                stub.requests.append(self.path)
+                stub.connections.append(self.client_address)
+                time.sleep(stub.delay)
+                status = stub.statuses.pop(0) if stub.statuses else stub.status
+                payload = json.dumps(stub.body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            # Don't wait on clients holding keep-alive connections open
+            daemon_threads = True
+            block_on_close = False
+
+        self.server = Server(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    """Factory for local stub API servers, shut down after the test"""
+    servers = []
+
+    def start(**kwargs):
+        server = StubServer(**kwargs)
+        servers.append(server)
+        return server
+
+    yield start
+
+    for server in servers:
+        server.close()
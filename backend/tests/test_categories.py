@@ -68,3 +68,79 @@ def test_delete_category_as_user(client, auth_headers_user):
     response = client.delete('/api/categories/1', headers=auth_headers_user)
 
     assert response.status_code == 403
+
+
+def test_get_categories_etag(client, auth_headers_admin):
+    """Test the category list supports conditional GETs"""
+    response = client.get('/api/categories/', headers=auth_headers_admin)
+    etag, weak = response.get_etag()
+
+    assert etag and not weak
+    assert response.cache_control.no_cache
+
+    not_modified = client.get('/api/categories/',
+        headers={**auth_headers_admin, 'If-None-Match': f'"{etag}"'})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+
+    client.post('/api/categories/', json={'name': 'Game'}, headers=auth_headers_admin)
+
+    changed = client.get('/api/categories/',
+        headers={**auth_headers_admin, 'If-None-Match': f'"{etag}"'})
+    assert changed.status_code == 200
+    assert changed.get_etag()[0] != etag
+    assert 'Game' in [c['name'] for c in changed.json]
+
+
+def test_category_changes_invalidate_catalog(client, auth_headers_admin, monkeypatch):
+    """Test create, update and delete are visible straight away despite caching"""
+    import cache_versions
+    monkeypatch.setattr(cache_versions, 'CACHE_VERSION_CHECK_INTERVAL', 60)
+
+    category_id = client.post('/api/categories/', json={'name': 'Venison'}, headers=auth_headers_admin).json['id']
+    item = client.post('/api/items/', json={'name': 'Backstrap', 'category_id': category_id},
+        headers=auth_headers_admin).json
+    assert item['category_name'] == 'Venison'
+
+    client.put(f'/api/categories/{category_id}', json={'name': 'Deer'}, headers=auth_headers_admin)
+    assert client.get(f'/api/categories/{category_id}', headers=auth_headers_admin).json['name'] == 'Deer'
+    assert client.get('/api/items/', headers=auth_headers_admin).json[0]['category_name'] == 'Deer'
+
+    client.delete(f"/api/items/{item['id']}", headers=auth_headers_admin)
+    client.delete(f'/api/categories/{category_id}', headers=auth_headers_admin)
+    assert client.get(f'/api/categories/{category_id}', headers=auth_headers_admin).status_code == 404
+    assert 'Deer' not in [c['name'] for c in client.get('/api/categories/', headers=auth_headers_admin).json]
+
+
+def test_categories_served_from_cache(client, auth_headers_admin, monkeypatch, count_statements):
+    """Test repeat category list requests don't query the categories table"""
+    import cache_versions
+
+    monkeypatch.setattr(cache_versions, 'CACHE_VERSION_CHECK_INTERVAL', 60)
+    client.get('/api/categories/', headers=auth_headers_admin)
+
+    with count_statements() as statements:
+        response = client.get('/api/categories/', headers=auth_headers_admin)
+
+    assert len(response.json) == 4
+    assert not [s for s in statements if 'FROM categories' in s]
+
+
+def test_item_category_name_from_another_worker(app, client, auth_headers_admin, monkeypatch):
+    """Test items still get a category name when the catalog predates the category"""
+    import cache_versions
+    from models import db, Category
+
+    monkeypatch.setattr(cache_versions, 'CACHE_VERSION_CHECK_INTERVAL', 60)
+    client.get('/api/categories/', headers=auth_headers_admin)
+
+    # Created by another worker: no local invalidation
+    with app.app_context():
+        category = Category(name='Bison')
+        db.session.add(category)
+        db.session.commit()
+        category_id = category.id
+
+    item = client.post('/api/items/', json={'name': 'Bison Burger', 'category_id': category_id},
+        headers=auth_headers_admin).json
+    assert item['category_name'] == 'Bison'
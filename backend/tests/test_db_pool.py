@@ -0,0 +1,56 @@
+"""
+Tests for connection pool configuration and GET /api/settings/database/pool
+"""
+import pytest
+
+import db_pool
+
+
+@pytest.fixture
+def database_uri(tmp_path):
+    """A file database gets a real QueuePool rather than the in-memory StaticPool"""
+    return f"sqlite:///{tmp_path / 'pool.db'}"
+
+
+def test_postgres_engine_options(monkeypatch):
+    """Test the SQLALCHEMY_* settings become engine options"""
+    monkeypatch.setattr(db_pool, 'SQLALCHEMY_POOL_SIZE', 8)
+    monkeypatch.setattr(db_pool, 'SQLALCHEMY_STATEMENT_TIMEOUT_MS', 15000)
+
+    options = db_pool.postgres_engine_options()
+
+    assert options['pool_size'] == 8
+    assert options['pool_pre_ping'] is True
+    assert options['pool_recycle'] == 1800
+    assert options['connect_args'] == {'options': '-c statement_timeout=15000'}
+
+
+def test_postgres_engine_options_without_statement_timeout(monkeypatch):
+    """Test a statement timeout of 0 leaves the server default"""
+    monkeypatch.setattr(db_pool, 'SQLALCHEMY_STATEMENT_TIMEOUT_MS', 0)
+
+    assert 'connect_args' not in db_pool.postgres_engine_options()
+
+
+def test_pool_stats(client, auth_headers_admin):
+    """Test the worker's pool usage is reported"""
+    client.get('/api/items/', headers=auth_headers_admin)
+
+    response = client.get('/api/settings/database/pool', headers=auth_headers_admin)
+
+    assert response.status_code == 200
+    stats = response.json
+    assert stats['pool'] == 'QueuePool'
+    assert stats['dialect'] == 'sqlite'
+    assert stats['checkouts'] >= 2
+    assert stats['connects'] >= 1
+    assert stats['peak_checked_out'] >= 1
+    assert stats['checked_out'] + stats['checked_in'] >= 1
+    assert stats['options'] == {}
+
+
+def test_pool_stats_requires_admin(client, auth_headers_user):
+    """Test regular users can't see pool stats"""
+    response = client.get('/api/settings/database/pool', headers=auth_headers_user)
+
+    assert response.status_code == 403
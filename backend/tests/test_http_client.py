@@ -0,0 +1,87 @@
+"""
+Tests for the shared outbound HTTP client
+"""
+import pytest
+import requests
+
+import http_client
+
+
+@pytest.fixture(autouse=True)
+def fresh_client(monkeypatch):
+    """Start each test with a new session, no backoff delay and empty stats"""
+    monkeypatch.setattr(http_client, 'HTTP_RETRY_BACKOFF', 0)
+    http_client.close_session()
+    http_client.reset_http_stats()
+    yield
+    http_client.close_session()
+    http_client.reset_http_stats()
+
+
+def test_connections_are_reused(stub_server):
+    """Test repeat calls to one host share a keep-alive connection"""
+    server = stub_server(body={'ok': True})
+
+    for _ in range(3):
+        response = http_client.http_get('stub', f'{server.url}/ping')
+        assert response.json() == {'ok': True}
+
+    assert len(server.requests) == 3
+    assert len(set(server.connections)) == 1
+    assert http_client.get_session() is http_client.get_session()
+
+
+def test_retries_gateway_errors(stub_server):
+    """Test 502/503/504 responses are retried"""
+    server = stub_server()
+    server.statuses = [503, 502]
+
+    response = http_client.http_get('stub', f'{server.url}/flaky')
+
+    assert response.status_code == 200
+    assert len(server.requests) == 3
+
+
+def test_does_not_retry_rate_limits(stub_server):
+    """Test 429 is returned straight away instead of using up more of the limit"""
+    server = stub_server(status=429)
+
+    response = http_client.http_get('stub', f'{server.url}/limited')
+
+    assert response.status_code == 429
+    assert len(server.requests) == 1
+
+
+def test_gives_up_after_retries(stub_server):
+    """Test the last gateway error is returned once retries run out"""
+    server = stub_server(status=503)
+
+    response = http_client.http_get('stub', f'{server.url}/down')
+
+    assert response.status_code == 503
+    assert len(server.requests) == 1 + http_client.HTTP_RETRIES
+
+
+def test_timeout_cap(stub_server, monkeypatch):
+    """Test a caller-supplied timeout caps the read timeout"""
+    monkeypatch.setattr(http_client, 'HTTP_RETRIES', 0)
+    server = stub_server()
+    server.delay = 1
+
+    with pytest.raises(requests.RequestException):
+        http_client.http_get('stub', f'{server.url}/slow', timeout=0.2)
+
+
+def test_stats(stub_server):
+    """Test calls are counted per service"""
+    server = stub_server()
+    http_client.http_get('alpha', f'{server.url}/a')
+    http_client.http_get('alpha', f'{server.url}/b')
+    server.status = 500
+    http_client.http_get('beta', f'{server.url}/c')
+
+    stats = http_client.get_http_stats()
+
+    assert stats['alpha']['requests'] == 2
+    assert stats['alpha']['errors'] == 0
+    assert stats['beta'] == {'requests': 1, 'errors': 1, 'avg_ms': stats['beta']['avg_ms']}
@@ -0,0 +1,178 @@
+"""
+Tests for CSV/JSON item imports
+"""
+import io
+import json
+import pytest
+
+import importer
+
+CSV_HEADER = 'QR Code,UPC,Name,Category,Source,Weight,Weight Unit,Added Date,Expiration Date,Status,Removed Date,Notes\n'
+
+
+def upload(client, headers, kind, content, filename=None):
+    return client.post(f'/api/items/import/{kind}',
+        data={'file': (io.BytesIO(content.encode('utf-8')), filename or f'items.{kind}')},
+        headers=headers,
+        content_type='multipart/form-data'
+    )
+
+
+def test_import_csv(client, auth_headers_admin):
+    """Test CSV rows are imported with categories resolved and created"""
+    content = CSV_HEADER + (
+        'CSV001,,Ribeye,Beef,Costco,1.5,lb,2025-01-01T00:00:00,,in_freezer,,Thick cut\n'
+        'CSV002,,Mystery Meat,Game,,,,,,,,\n'
+        ',,No Code,,,,,,,,,\n'
+    )
+
+    response = upload(client, auth_headers_admin, 'csv', content)
+
+    assert response.status_code == 200
+    assert response.json == {'success': True, 'imported': 3, 'skipped': 0, 'errors': []}
+
+    items = {item['name']: item for item in client.get('/api/items/', headers=auth_headers_admin).json}
+    assert items['Ribeye']['category_name'] == 'Beef'
+    assert items['Ribeye']['weight'] == 1.5
+    assert items['Ribeye']['added_date'].startswith('2025-01-01')
+    assert items['Mystery Meat']['category_name'] == 'Game'
+    assert items['Mystery Meat']['weight_unit'] == 'lb'
+    assert len(items['No Code']['qr_code']) == 6
+
+    categories = client.get('/api/categories/', headers=auth_headers_admin).json
+    assert [c['name'] for c in categories].count('Game') == 1
+
+
+def test_import_reports_duplicates_and_bad_rows(client, auth_headers_admin, sample_item):
+    """Test per-row errors for existing, repeated and unparseable rows"""
+    content = CSV_HEADER + (
+        f"{sample_item['qr_code']},,Existing,,,,,,,,,\n"
+        'DUP001,,First,,,,,,,,,\n'
+        'DUP001,,Second,,,,,,,,,\n'
+        'BAD001,,Bad Weight,,,heavy,,,,,,\n'
+        'OK0001,,Fine,,,,,,,,,\n'
+    )
+
+    response = upload(client, auth_headers_admin, 'csv', content)
+
+    assert response.json['imported'] == 2
+    assert response.json['skipped'] == 3
+    assert response.json['errors'] == [
+        f"Row 2: QR code '{sample_item['qr_code']}' already exists",
+        "Row 4: QR code 'DUP001' already exists",
+        'Row 5: Failed to import row',
+    ]
+
+
+def test_import_json(client, auth_headers_admin):
+    """Test JSON import keeps the Item-numbered error messages"""
+    payload = json.dumps({'items': [
+        {'qr_code': 'JSN001', 'name': 'Salmon', 'category': 'Fish'},
+        {'qr_code': 'JSN001', 'name': 'Salmon again'},
+        'not an object',
+    ]})
+
+    response = upload(client, auth_headers_admin, 'json', payload)
+
+    assert response.json['imported'] == 1
+    assert response.json['errors'] == [
+        "Item 2: QR code 'JSN001' already exists",
+        'Item 3: Failed to import item',
+    ]
+
+
+def test_import_errors_are_capped(client, auth_headers_admin):
+    """Test only the first few errors are returned"""
+    content = CSV_HEADER + ''.join('SAME01,,Dup,,,,,,,,,\n' for _ in range(30))
+
+    response = upload(client, auth_headers_admin, 'csv', content)
+
+    assert response.json['imported'] == 1
+    assert response.json['skipped'] == 29
+    assert len(response.json['errors']) == importer.MAX_REPORTED_ERRORS
+
+
+def test_import_inserts_in_batches(client, auth_headers_admin, monkeypatch, count_statements):
+    """Test rows are written with one executemany INSERT per batch"""
+    monkeypatch.setattr(importer, 'IMPORT_BATCH_SIZE', 5)
+    content = CSV_HEADER + ''.join(f'BAT{i:03d},,Item {i},Beef,,,,,,,,\n' for i in range(23))
+
+    with count_statements() as statements:
+        response = upload(client, auth_headers_admin, 'csv', content)
+
+    assert response.json['imported'] == 23
+    item_inserts = [s for s in statements if s.startswith('INSERT INTO items')]
+    assert len(item_inserts) == 5
+    # Category and QR lookups happen once, not per row
+    assert len([s for s in statements if 'FROM categories' in s]) == 1
+    assert len([s for s in statements if 'FROM items' in s]) == 1
+
+
+def test_iter_json_items_across_chunk_boundaries():
+    """Test the incremental parser handles values split between reads"""
+    document = json.dumps({
+        'exported_at': '2025-01-01T00:00:00',
+        'meta': {'nested': [1, 2, {'items': 'not these'}]},
+        'items': [{'name': f'Item {i}', 'weight': 12345.5, 'notes': 'a "quoted" note'} for i in range(20)] + [7, None],
+        'total_items': 22,
+    }, indent=2)
+
+    for chunk_size in (1, 3, 7, 64):
+        items = list(importer.iter_json_items(io.StringIO(document), chunk_size=chunk_size))
+        assert items == json.loads(document)['items']
+
+
+@pytest.mark.parametrize('document', ['[]', '{}', '{"items": {}}', '{"other": [1]}'])
+def test_iter_json_items_requires_items_list(document):
+    """Test documents without a top-level items list are rejected"""
+    with pytest.raises(importer.ImportFormatError):
+        list(importer.iter_json_items(io.StringIO(document)))
+
+
+def test_import_json_bad_structure(client, auth_headers_admin):
+    """Test a JSON file without an items list is a 400"""
+    response = upload(client, auth_headers_admin, 'json', json.dumps([{'name': 'Loose'}]))
+
+    assert response.status_code == 400
+    assert 'Expected {"items": [...]}' in response.json['error']
+
+
+def test_import_ndjson(client, auth_headers_admin):
+    """Test NDJSON import reports bad lines by line number"""
+    content = (
+        json.dumps({'qr_code': 'NDJ001', 'name': 'Pork Chops', 'category': 'Pork'}) + '\n'
+        '\n'
+        '{"qr_code": "NDJ002", "name": \n'
+        + json.dumps({'qr_code': 'NDJ003', 'name': 'Bacon'}) + '\n'
+    )
+
+    response = upload(client, auth_headers_admin, 'json', content, filename='items.ndjson')
+
+    assert response.status_code == 200
+    assert response.json['imported'] == 2
+    assert response.json['errors'] == ['Line 3: Failed to import line']
+
+
+def test_import_csv_with_bom(client, auth_headers_admin):
+    """Test a UTF-8 BOM (as written by Excel) doesn't break the first header"""
+    content = '\ufeff' + CSV_HEADER + 'BOM001,,Lamb Shank,Lamb,,,,,,,,\n'
+
+    response = upload(client, auth_headers_admin, 'csv', content)
+
+    assert response.json['imported'] == 1
+    items = client.get('/api/items/', headers=auth_headers_admin).json
+    assert items[0]['qr_code'] == 'BOM001'
+
+
+def test_import_upload_size_limit(app, client, auth_headers_admin):
+    """Test imports use MAX_IMPORT_SIZE instead of the general upload limit"""
+    app.config['MAX_CONTENT_LENGTH'] = 1024
+    app.config['MAX_IMPORT_SIZE'] = 64 * 1024
+    content = CSV_HEADER + ''.join(f'BIG{i:03d},,Item {i} {"x" * 40},,,,,,,,,\n' for i in range(100))
+
+    response = upload(client, auth_headers_admin, 'csv', content)
+    assert response.json['imported'] == 100
+
+    app.config['MAX_IMPORT_SIZE'] = 1024
+    response = upload(client, auth_headers_admin, 'csv', content)
+    assert response.status_code == 413
@@ -0,0 +1,148 @@
+"""
+Tests for background import jobs
+"""
+import io
+import json
+import time
+import pytest
+
+import importer
+
+CSV_HEADER = 'QR Code,UPC,Name,Category,Source,Weight,Weight Unit,Added Date,Expiration Date,Status,Removed Date,Notes\n'
+
+
+@pytest.fixture
+def database_uri(tmp_path):
+    """Jobs run on another thread, so use a file database rather than a shared in-memory one"""
+    return f"sqlite:///{tmp_path / 'jobs.db'}"
+
+
+def upload_background(client, headers, kind, content):
+    return client.post(f'/api/items/import/{kind}?background=true',
+        data={'file': (io.BytesIO(content.encode('utf-8')), f'items.{kind}')},
+        headers=headers,
+        content_type='multipart/form-data'
+    )
+
+
+def wait_for_job(client, headers, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f'/api/items/import/jobs/{job_id}', headers=headers).json
+        if job['status'] in ('completed', 'failed'):
+            return job
+        time.sleep(0.05)
+    pytest.fail(f'Import job {job_id} did not finish')
+
+
+def test_background_csv_import(client, auth_headers_admin, monkeypatch):
+    """Test a background CSV import returns a job and reports final counts"""
+    monkeypatch.setattr(importer, 'IMPORT_BATCH_SIZE', 4)
+    content = CSV_HEADER + ''.join(f'JOB{i:03d},,Item {i},Beef,,,,,,,,\n' for i in range(10))
+    content += 'JOB000,,Duplicate,,,,,,,,,\n'
+
+    response = upload_background(client, auth_headers_admin, 'csv', content)
+
+    assert response.status_code == 202
+    assert response.json['status'] == 'queued'
+    assert response.headers['Location'].endswith(f"/api/items/import/jobs/{response.json['id']}")
+
+    job = wait_for_job(client, auth_headers_admin, response.json['id'])
+    assert job['status'] == 'completed'
+    assert job['rows_processed'] == 11
+    assert job['imported'] == 10
+    assert job['skipped'] == 1
+    assert job['errors'] == ["Row 12: QR code 'JOB000' already exists"]
+    assert job['finished_at'] is not None
+
+    items = client.get('/api/items/', headers=auth_headers_admin).json
+    assert len(items) == 10
+
+
+def test_background_json_import_invalid_format(client, auth_headers_admin):
+    """Test a malformed JSON document fails the job with a readable message"""
+    response = upload_background(client, auth_headers_admin, 'json', json.dumps({'things': []}))
+
+    job = wait_for_job(client, auth_headers_admin, response.json['id'])
+    assert job['status'] == 'failed'
+    assert 'Expected {"items": [...]}' in job['message']
+
+
+def test_import_job_visible_only_to_owner_and_admin(client, auth_headers_admin, auth_headers_user):
+    """Test other users can't poll someone else's job"""
+    content = json.dumps({'items': [{'name': 'Peas'}]})
+    response = upload_background(client, auth_headers_user, 'json', content)
+    job_id = response.json['id']
+
+    wait_for_job(client, auth_headers_user, job_id)
+    assert client.get(f'/api/items/import/jobs/{job_id}', headers=auth_headers_admin).status_code == 200
+
+    client.post('/api/auth/register',
+        json={'username': 'other', 'password': 'other123'},
+        headers=auth_headers_admin
+    )
+    token = client.post('/api/auth/login', json={'username': 'other', 'password': 'other123'}).json['access_token']
+    response = client.get(f'/api/items/import/jobs/{job_id}', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 404
+
+
+def add_job(app, worker, upload_path=None, status='running'):
+    from models import ImportJob, db
+
+    with app.app_context():
+        job = ImportJob(user_id=1, file_type='csv', filename='items.csv', status=status,
+                        worker=worker, upload_path=upload_path)
+        db.session.add(job)
+        db.session.commit()
+        return job.id
+
+
+def dead_worker():
+    """A host:pid on this machine with no process behind it"""
+    import os
+    import socket
+
+    pid = os.getpid() + 100000
+    while True:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return f'{socket.gethostname()}:{pid}'
+        except PermissionError:
+            pass
+        pid += 1
+
+
+def test_abandoned_jobs_failed_at_startup(app, tmp_path):
+    """Test jobs whose worker has exited are failed and their uploads deleted"""
+    from import_jobs import ABANDONED_JOB_MESSAGE, current_worker, fail_abandoned_import_jobs
+    from models import ImportJob, db
+
+    upload = tmp_path / 'freezer-import-abc.csv'
+    upload.write_text(CSV_HEADER)
+    abandoned_id = add_job(app, dead_worker(), str(upload))
+    unowned_id = add_job(app, None, status='queued')
+    live_id = add_job(app, current_worker())
+    remote_id = add_job(app, 'another-host:1')
+
+    with app.app_context():
+        assert fail_abandoned_import_jobs() == 2
+
+        abandoned = db.session.get(ImportJob, abandoned_id)
+        assert abandoned.status == 'failed'
+        assert abandoned.message == ABANDONED_JOB_MESSAGE
+        assert abandoned.finished_at is not None
+        assert db.session.get(ImportJob, unowned_id).status == 'failed'
+        assert db.session.get(ImportJob, live_id).status == 'running'
+        assert db.session.get(ImportJob, remote_id).status == 'running'
+    assert not upload.exists()
+
+
+def test_polling_abandoned_job_fails_it(app, client, auth_headers_admin):
+    """Test a poll doesn't report an abandoned job as running forever"""
+    job_id = add_job(app, dead_worker())
+
+    job = client.get(f'/api/items/import/jobs/{job_id}', headers=auth_headers_admin).json
+
+    assert job['status'] == 'failed'
+    assert 'upload the file again' in job['message']
@@ -0,0 +1,148 @@
+"""
+Tests for delta sync of items (GET /api/items/changes)
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+import item_changes
+
+
+@pytest.fixture(autouse=True)
+def no_settle_window(monkeypatch):
+    """Let cursors advance to the current time so each sync sees only newer changes"""
+    monkeypatch.setattr(item_changes, 'ITEM_CHANGES_SETTLE_SECONDS', 0)
+
+
+def sync(client, headers, cursor=None):
+    url = '/api/items/changes' + (f'?since={cursor}' if cursor else '')
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return response.json
+
+
+def create(client, headers, name, **fields):
+    return client.post('/api/items/', json={'name': name, **fields}, headers=headers).json
+
+
+def test_full_sync_then_no_changes(client, auth_headers_admin):
+    """Test the first sync is a full snapshot and an immediate resync is empty"""
+    create(client, auth_headers_admin, 'Steak')
+    create(client, auth_headers_admin, 'Chicken')
+
+    snapshot = sync(client, auth_headers_admin)
+    assert snapshot['reset'] is True
+    assert [item['name'] for item in snapshot['items']] == ['Steak', 'Chicken']
+    assert snapshot['deleted'] == []
+
+    delta = sync(client, auth_headers_admin, snapshot['cursor'])
+    assert delta == {'items': [], 'deleted': [], 'cursor': delta['cursor'], 'reset': False}
+
+
+def test_changes_since_cursor(client, auth_headers_admin):
+    """Test creates, updates and status changes after the cursor are returned"""
+    steak = create(client, auth_headers_admin, 'Steak')
+    fish = create(client, auth_headers_admin, 'Fish')
+    cursor = sync(client, auth_headers_admin)['cursor']
+
+    client.put(f"/api/items/{steak['id']}", json={'notes': 'Ribeye'}, headers=auth_headers_admin)
+    client.put(f"/api/items/{fish['id']}/status", json={'status': 'consumed'}, headers=auth_headers_admin)
+    create(client, auth_headers_admin, 'Pork')
+
+    delta = sync(client, auth_headers_admin, cursor)
+    assert delta['reset'] is False
+    assert {item['name']: item['status'] for item in delta['items']} == {
+        'Steak': 'in_freezer', 'Fish': 'consumed', 'Pork': 'in_freezer'
+    }
+    assert delta['deleted'] == []
+
+
+def test_deletes_leave_tombstones(client, auth_headers_admin, monkeypatch):
+    """Test delete_item, purge_history and purge_all_items are all reported"""
+    monkeypatch.setenv('FLASK_ENV', 'development')
+    deleted = create(client, auth_headers_admin, 'Deleted')
+    consumed = create(client, auth_headers_admin, 'Consumed')
+    kept = create(client, auth_headers_admin, 'Kept')
+    client.put(f"/api/items/{consumed['id']}/status", json={'status': 'consumed'}, headers=auth_headers_admin)
+    cursor = sync(client, auth_headers_admin)['cursor']
+
+    client.delete(f"/api/items/{deleted['id']}", headers=auth_headers_admin)
+    delta = sync(client, auth_headers_admin, cursor)
+    assert delta['deleted'] == [deleted['id']]
+    cursor = delta['cursor']
+
+    client.post('/api/settings/purge-history', headers=auth_headers_admin)
+    delta = sync(client, auth_headers_admin, cursor)
+    assert delta['deleted'] == [consumed['id']]
+    cursor = delta['cursor']
+
+    response = client.delete('/api/items/purge-all', headers=auth_headers_admin)
+    assert response.json['count'] == 1
+    delta = sync(client, auth_headers_admin, cursor)
+    assert delta['items'] == []
+    assert delta['deleted'] == [kept['id']]
+
+
+def test_reused_id_is_not_reported_deleted(app, client, auth_headers_admin):
+    """Test an item re-created under a deleted id comes back as an item, not a tombstone"""
+    from models import db, Item
+
+    last = create(client, auth_headers_admin, 'Last')
+    cursor = sync(client, auth_headers_admin)['cursor']
+
+    client.delete(f"/api/items/{last['id']}", headers=auth_headers_admin)
+    # SQLite hands the highest rowid out again once it's been deleted
+    with app.app_context():
+        db.session.add(Item(id=last['id'], qr_code='XYZ789', name='Replacement'))
+        db.session.commit()
+
+    delta = sync(client, auth_headers_admin, cursor)
+    assert delta['deleted'] == []
+    assert [item['name'] for item in delta['items']] == ['Replacement']
+
+
+def test_settle_window_resends_recent_changes(client, auth_headers_admin, monkeypatch):
+    """Test changes just before a sync are sent again rather than risk being missed"""
+    monkeypatch.setattr(item_changes, 'ITEM_CHANGES_SETTLE_SECONDS', 60)
+    cursor = sync(client, auth_headers_admin)['cursor']
+
+    create(client, auth_headers_admin, 'Steak')
+    first = sync(client, auth_headers_admin, cursor)
+    second = sync(client, auth_headers_admin, first['cursor'])
+
+    assert [item['name'] for item in first['items']] == ['Steak']
+    assert [item['name'] for item in second['items']] == ['Steak']
+
+
+def test_restore_resets_cursors(app, client, auth_headers_admin):
+    """Test cursors issued before the items were replaced trigger a full resync"""
+    from models import db
+    from cache_versions import read_cache_versions
+
+    create(client, auth_headers_admin, 'Steak')
+    cursor = sync(client, auth_headers_admin)['cursor']
+
+    with app.app_context():
+        item_changes.mark_items_reset(read_cache_versions())
+        db.session.commit()
+
+    delta = sync(client, auth_headers_admin, cursor)
+    assert delta['reset'] is True
+    assert [item['name'] for item in delta['items']] == ['Steak']
+
+
+def test_expired_cursor_resets(client, auth_headers_admin):
+    """Test a cursor older than the tombstone retention gets a full resync"""
+    create(client, auth_headers_admin, 'Steak')
+    old = datetime.utcnow() - timedelta(days=item_changes.ITEM_TOMBSTONE_RETENTION_DAYS + 1)
+    cursor = item_changes.encode_changes_cursor(old, 0)
+
+    delta = sync(client, auth_headers_admin, cursor)
+    assert delta['reset'] is True
+    assert len(delta['items']) == 1
+
+
+def test_invalid_cursor(client, auth_headers_admin):
+    """Test a malformed cursor is rejected"""
+    response = client.get('/api/items/changes?since=garbage', headers=auth_headers_admin)
+    assert response.status_code == 400
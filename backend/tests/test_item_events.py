@@ -0,0 +1,190 @@
+"""
+Tests for live item events (GET /api/items/events)
+"""
+import io
+import json
+
+import pytest
+
+import item_events
+
+
+@pytest.fixture
+def database_uri(tmp_path):
+    """The event poller runs on another thread, so use a file database rather than a shared in-memory one"""
+    return f"sqlite:///{tmp_path / 'events.db'}"
+
+
+@pytest.fixture(autouse=True)
+def short_streams(monkeypatch):
+    monkeypatch.setattr(item_events, 'ITEM_EVENTS_POLL_INTERVAL', 0.05)
+    monkeypatch.setattr(item_events, 'ITEM_EVENTS_HEARTBEAT', 0.2)
+    monkeypatch.setattr(item_events, 'ITEM_EVENTS_STREAM_SECONDS', 1)
+
+
+def parse_events(body):
+    """Parse a text/event-stream body into a list of event dicts"""
+    events = []
+    for block in body.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if line and not line.startswith(':'))
+        if 'data' in fields:
+            events.append(json.loads(fields['data']))
+    return events
+
+
+def open_stream(client, headers, last_event_id=None):
+    if last_event_id is not None:
+        headers = {**headers, 'Last-Event-ID': str(last_event_id)}
+    return client.get('/api/items/events', headers=headers, buffered=False)
+
+
+def read_stream(response):
+    """Read a stream until the server ends it"""
+    try:
+        return ''.join(chunk.decode('utf-8') for chunk in response.response)
+    finally:
+        response.close()
+
+
+def logged_events(app):
+    from models import ItemEvent
+    with app.app_context():
+        return [item_events.event_dict(row) for row in ItemEvent.query.order_by(ItemEvent.id)]
+
+
+def test_routes_publish_events(app, client, auth_headers_admin):
+    """Test create, update, status change and delete are written to the event log"""
+    item = client.post('/api/items/', json={'name': 'Steak'}, headers=auth_headers_admin).json
+    client.put(f"/api/items/{item['id']}", json={'notes': 'Ribeye'}, headers=auth_headers_admin)
+    client.put(f"/api/items/{item['id']}/status", json={'status': 'consumed'}, headers=auth_headers_admin)
+    client.delete(f"/api/items/{item['id']}", headers=auth_headers_admin)
+
+    events = logged_events(app)
+
+    assert [event['action'] for event in events] == ['created', 'updated', 'status', 'deleted']
+    assert events[0]['item']['id'] == item['id']
+    assert events[1]['item']['notes'] == 'Ribeye'
+    assert events[2]['item']['status'] == 'consumed'
+    assert events[3]['item_ids'] == [item['id']]
+
+
+def test_bulk_changes_publish_one_event(app, client, auth_headers_admin):
+    """Test purges and imports publish a single event rather than one per item"""
+    for name in ('A', 'B'):
+        item = client.post('/api/items/', json={'name': name}, headers=auth_headers_admin).json
+        client.put(f"/api/items/{item['id']}/status", json={'status': 'consumed'}, headers=auth_headers_admin)
+
+    client.post('/api/settings/purge-history', headers=auth_headers_admin)
+    client.post('/api/items/import/csv', headers=auth_headers_admin,
+        data={'file': (io.BytesIO(b'name\nC\nD\n'), 'items.csv')})
+
+    events = logged_events(app)[-2:]
+    assert events[0]['action'] == 'deleted' and len(events[0]['item_ids']) == 2
+    assert events[1]['action'] == 'resync'
+
+
+def test_batch_status_publishes_compact_event(app, client, auth_headers_admin):
+    """Test a batch status update publishes one event with the changed fields only"""
+    ids = [client.post('/api/items/', json={'name': name}, headers=auth_headers_admin).json['id'] for name in 'AB']
+
+    client.put('/api/items/status', json={'status': 'consumed', 'item_ids': ids}, headers=auth_headers_admin)
+
+    event = logged_events(app)[-1]
+    assert event['action'] == 'status'
+    assert [change['id'] for change in event['changes']] == ids
+    assert set(event['changes'][0]) == {'id', 'status', 'removed_date', 'updated_at'}
+
+
+def test_stream_delivers_events_from_other_workers(app, client, auth_headers_admin):
+    """Test events written to the log after subscribing reach the stream"""
+    from models import db
+
+    response = open_stream(client, auth_headers_admin)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+
+    # Another worker only shares the database
+    with app.app_context():
+        item_events.publish_item_event(item_events.DELETED, item_ids=[42])
+        db.session.commit()
+
+    body = read_stream(response)
+
+    assert body.startswith('retry: ')
+    assert [(event['action'], event['item_ids']) for event in parse_events(body)] == [('deleted', [42])]
+    assert 'id: ' in body
+
+
+def test_stream_catches_up_from_last_event_id(app, client, auth_headers_admin, monkeypatch):
+    """Test a reconnecting client gets the events it missed"""
+    # Otherwise events this recent are re-sent too
+    monkeypatch.setattr(item_events, 'ITEM_EVENTS_OVERLAP_SECONDS', 0)
+    client.post('/api/items/', json={'name': 'Seen'}, headers=auth_headers_admin)
+    client.post('/api/items/', json={'name': 'Missed'}, headers=auth_headers_admin)
+    seen_id = logged_events(app)[0]['id']
+
+    events = parse_events(read_stream(open_stream(client, auth_headers_admin, last_event_id=seen_id)))
+
+    assert [event['item']['name'] for event in events] == ['Missed']
+
+
+def test_stream_resyncs_when_events_are_gone(app, client, auth_headers_admin):
+    """Test a client whose missed events were pruned is told to reload"""
+    from models import db, ItemEvent
+
+    for name in ('A', 'B', 'C'):
+        client.post('/api/items/', json={'name': name}, headers=auth_headers_admin)
+    first_id = logged_events(app)[0]['id']
+
+    # Pruned after the client saw the first event
+    with app.app_context():
+        db.session.delete(db.session.get(ItemEvent, first_id))
+        db.session.delete(db.session.get(ItemEvent, first_id + 1))
+        db.session.commit()
+
+    events = parse_events(read_stream(open_stream(client, auth_headers_admin, last_event_id=first_id)))
+
+    assert [event['action'] for event in events] == ['resync']
+
+
+def test_old_events_pruned_by_poller_not_writes(app, client, auth_headers_admin):
+    """Test writes leave expired events alone and the broker deletes them once per prune interval"""
+    from datetime import datetime, timedelta
+    from models import db, ItemEvent
+
+    with app.app_context():
+        db.session.add(ItemEvent(action='created', payload='{}', created_at=datetime.utcnow() - timedelta(days=2)))
+        db.session.commit()
+    client.post('/api/items/', json={'name': 'Steak'}, headers=auth_headers_admin)
+    assert len(logged_events(app)) == 2
+
+    with app.app_context():
+        broker = item_events.get_item_event_broker()
+        broker.prune_if_due()
+        assert [event['item']['name'] for event in logged_events(app)] == ['Steak']
+
+        # Not due again until the interval has passed
+        db.session.add(ItemEvent(action='created', payload='{}', created_at=datetime.utcnow() - timedelta(days=2)))
+        db.session.commit()
+        broker.prune_if_due()
+        assert len(logged_events(app)) == 2
+
+
+def test_stream_limit(app, client, auth_headers_admin):
+    """Test a worker refuses streams beyond its limit and frees closed ones"""
+    with app.app_context():
+        item_events.get_item_event_broker().max_streams = 1
+
+    first = open_stream(client, auth_headers_admin)
+    assert first.status_code == 200
+    assert open_stream(client, auth_headers_admin).status_code == 503
+
+    first.close()
+    second = open_stream(client, auth_headers_admin)
+    assert second.status_code == 200
+    second.close()
+
+
+def test_stream_requires_auth(client):
+    """Test anonymous clients can't subscribe"""
+    assert client.get('/api/items/events').status_code == 401
@@ -331,3 +331,500 @@ def test_search_image_missing_product_name(client, auth_headers_admin):
 
     assert response.status_code == 400
     assert 'error' in response.json
+
+
+def test_get_items_paginated(client, auth_headers_admin):
+    """Test keyset pagination walks every item exactly once"""
+    base_date = datetime(2025, 1, 1)
+    for i in range(7):
+        client.post('/api/items/',
+            json={
+                'name': f'Item {i}',
+                # Two items share each added_date to exercise the id tie-breaker
+                'added_date': (base_date + timedelta(days=i // 2)).isoformat()
+            },
+            headers=auth_headers_admin
+        )
+
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {'limit': 3}
+        if cursor:
+            params['cursor'] = cursor
+        response = client.get('/api/items/', query_string=params, headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        assert len(response.json['items']) <= 3
+        seen.extend(item['name'] for item in response.json['items'])
+        pages += 1
+
+        cursor = response.json['next_cursor']
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert len(seen) == 7
+    assert set(seen) == {f'Item {i}' for i in range(7)}
+    # Default sort is added_date descending
+    assert seen[0] == 'Item 6'
+
+
+def test_get_items_paginated_nulls_last(client, auth_headers_admin):
+    """Test items without an expiration date come last when paging by expiration"""
+    client.post('/api/items/', json={'name': 'No Expiry A'}, headers=auth_headers_admin)
+    client.post('/api/items/',
+        json={'name': 'Expires Soon', 'expiration_date': '2025-02-01T00:00:00'},
+        headers=auth_headers_admin
+    )
+    client.post('/api/items/', json={'name': 'No Expiry B'}, headers=auth_headers_admin)
+    client.post('/api/items/',
+        json={'name': 'Expires Later', 'expiration_date': '2025-06-01T00:00:00'},
+        headers=auth_headers_admin
+    )
+
+    names = []
+    cursor = None
+    while True:
+        params = {'limit': 1, 'sort_by': 'expiration_date', 'sort_order': 'asc'}
+        if cursor:
+            params['cursor'] = cursor
+        response = client.get('/api/items/', query_string=params, headers=auth_headers_admin)
+        assert response.status_code == 200
+        names.extend(item['name'] for item in response.json['items'])
+        cursor = response.json['next_cursor']
+        if not cursor:
+            break
+
+    assert names == ['Expires Soon', 'Expires Later', 'No Expiry A', 'No Expiry B']
+
+
+def test_get_items_invalid_cursor(client, auth_headers_admin, sample_item):
+    """Test that a malformed or mismatched cursor is rejected"""
+    response = client.get('/api/items/?cursor=not-a-cursor', headers=auth_headers_admin)
+    assert response.status_code == 400
+
+    client.post('/api/items/', json={'name': 'Second'}, headers=auth_headers_admin)
+    first_page = client.get('/api/items/?limit=1&sort_by=name', headers=auth_headers_admin)
+    cursor = first_page.json['next_cursor']
+    assert cursor
+
+    # A cursor issued for name ordering can't be reused with another sort
+    response = client.get(f'/api/items/?cursor={cursor}&sort_by=added_date', headers=auth_headers_admin)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('url', [
+    '/api/items/?status=all',
+    '/api/items/?status=all&limit=100',
+    '/api/items/expiring-soon?days=3650',
+    '/api/items/oldest?limit=100',
+])
+def test_list_endpoints_constant_query_count(client, auth_headers_admin, auth_headers_user, url, monkeypatch, count_statements):
+    """Test list endpoints don't lazy-load category/user per serialized row"""
+    import cache_versions
+
+    def add_items(count):
+        for i in range(count):
+            client.post('/api/items/',
+                json={'name': f'Item {i}', 'category_id': (i % 4) + 1},
+                headers=auth_headers_admin if i % 2 else auth_headers_user
+            )
+
+    # Keep cached settings warm for both measurements
+    monkeypatch.setattr(cache_versions, 'CACHE_VERSION_CHECK_INTERVAL', 60)
+    client.get(url, headers=auth_headers_admin)
+
+    add_items(2)
+    with count_statements() as small_statements:
+        small_response = client.get(url, headers=auth_headers_admin)
+    assert len(small_response.json if isinstance(small_response.json, list) else small_response.json['items']) == 2
+
+    add_items(10)
+    with count_statements() as large_statements:
+        large_response = client.get(url, headers=auth_headers_admin)
+    large_items = large_response.json if isinstance(large_response.json, list) else large_response.json['items']
+    assert len(large_items) == 12
+    assert all(item['category_name'] and item['added_by_username'] for item in large_items)
+
+    assert len(large_statements) == len(small_statements)
+
+
+def test_export_csv_streams_rows(client, auth_headers_admin):
+    """Test CSV export is streamed and includes category names"""
+    import csv
+    import io
+
+    client.post('/api/items/', json={'name': 'Ribeye', 'category_id': 1, 'weight': 1.5}, headers=auth_headers_admin)
+    client.post('/api/items/', json={'name': 'Loose Peas'}, headers=auth_headers_admin)
+
+    response = client.get('/api/items/export/csv', headers=auth_headers_admin)
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'text/csv'
+    assert 'attachment; filename=freezer_inventory_' in response.headers['Content-Disposition']
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row['Name'] for row in rows] == ['Ribeye', 'Loose Peas']
+    assert rows[0]['Category'] == 'Beef'
+    assert rows[0]['Weight'] == '1.5'
+    assert rows[1]['Category'] == ''
+
+
+def test_export_csv_batches(client, auth_headers_admin, monkeypatch):
+    """Test CSV export writes one chunk per database batch"""
+    import routes.items
+
+    monkeypatch.setattr(routes.items, 'EXPORT_BATCH_SIZE', 2)
+    for i in range(5):
+        client.post('/api/items/', json={'name': f'Item {i}'}, headers=auth_headers_admin)
+
+    response = client.get('/api/items/export/csv', headers=auth_headers_admin)
+    chunks = list(response.response)
+
+    assert len(chunks) == 3
+    assert b''.join(chunks).decode('utf-8').count('Item ') == 5
+
+
+def test_export_csv_empty(client, auth_headers_admin):
+    """Test CSV export with no items still returns the header row"""
+    response = client.get('/api/items/export/csv', headers=auth_headers_admin)
+
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).startswith('QR Code,UPC,Name,Category')
+
+
+@pytest.mark.parametrize('item_count', [0, 1, 3])
+def test_export_json_streamed_document(client, auth_headers_admin, item_count):
+    """Test pretty and compact JSON exports are valid, matching documents"""
+    import json
+
+    for i in range(item_count):
+        client.post('/api/items/', json={'name': f'Item {i}', 'category_id': 2}, headers=auth_headers_admin)
+
+    # Consume each streamed body before issuing the next request
+    pretty = client.get('/api/items/export/json', headers=auth_headers_admin)
+    assert pretty.is_streamed
+    pretty_text = pretty.get_data(as_text=True)
+    compact_text = client.get('/api/items/export/json?pretty=false', headers=auth_headers_admin).get_data(as_text=True)
+    pretty_data = json.loads(pretty_text)
+    compact_data = json.loads(compact_text)
+
+    # Streamed layout is byte-for-byte what json.dumps would produce
+    assert pretty_text == json.dumps(pretty_data, indent=2)
+    assert compact_text == json.dumps(compact_data, separators=(',', ':'))
+
+    assert pretty_data['total_items'] == item_count
+    assert [item['name'] for item in pretty_data['items']] == [f'Item {i}' for i in range(item_count)]
+    assert all(item['category'] == 'Chicken' for item in pretty_data['items'])
+    assert compact_data['items'] == pretty_data['items']
+
+
+def test_export_ndjson(client, auth_headers_admin):
+    """Test NDJSON export emits one item per line"""
+    import json
+
+    client.post('/api/items/', json={'name': 'Ribeye', 'category_id': 1}, headers=auth_headers_admin)
+    client.post('/api/items/', json={'name': 'Peas'}, headers=auth_headers_admin)
+
+    response = client.get('/api/items/export/json?format=ndjson', headers=auth_headers_admin)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line)['name'] for line in lines] == ['Ribeye', 'Peas']
+    assert json.loads(lines[0])['category'] == 'Beef'
+
+
+def test_export_json_invalid_format(client, auth_headers_admin):
+    """Test unknown export formats are rejected"""
+    response = client.get('/api/items/export/json?format=xml', headers=auth_headers_admin)
+
+    assert response.status_code == 400
+
+
+def test_export_json_round_trips_through_import(client, auth_headers_admin):
+    """Test a streamed JSON export can be re-imported"""
+    import io
+
+    client.post('/api/items/', json={'name': 'Ribeye', 'category_id': 1, 'qr_code': 'RND001'}, headers=auth_headers_admin)
+    exported = client.get('/api/items/export/json?pretty=false', headers=auth_headers_admin).get_data()
+
+    client.delete('/api/items/1', headers=auth_headers_admin)
+    response = client.post('/api/items/import/json',
+        data={'file': (io.BytesIO(exported), 'export.json')},
+        headers=auth_headers_admin,
+        content_type='multipart/form-data'
+    )
+
+    assert response.json['imported'] == 1
+    items = client.get('/api/items/', headers=auth_headers_admin).json
+    assert items[0]['qr_code'] == 'RND001'
+    assert items[0]['category_name'] == 'Beef'
+
+
+@pytest.mark.parametrize('url', [
+    '/api/items/',
+    '/api/items/?limit=10',
+    '/api/items/expiring-soon',
+    '/api/items/oldest',
+])
+def test_list_endpoints_conditional_get(client, auth_headers_admin, url):
+    """Test item lists return 304 until an item is added, changed or deleted"""
+    expiration = (datetime.utcnow() + timedelta(days=5)).isoformat()
+
+    def create(name):
+        return client.post('/api/items/', json={'name': name, 'expiration_date': expiration},
+            headers=auth_headers_admin).json
+
+    def revalidate(etag):
+        return client.get(url, headers={**auth_headers_admin, 'If-None-Match': f'"{etag}"'})
+
+    first = create('First')
+    create('Second')
+
+    response = client.get(url, headers=auth_headers_admin)
+    etag = response.get_etag()[0]
+    assert response.status_code == 200 and etag
+    assert response.cache_control.no_cache
+
+    response = revalidate(etag)
+    assert response.status_code == 304
+    assert response.get_etag()[0] == etag
+
+    # Update
+    client.put(f"/api/items/{first['id']}", json={'notes': 'Changed'}, headers=auth_headers_admin)
+    response = revalidate(etag)
+    assert response.status_code == 200
+    etag = response.get_etag()[0]
+
+    # Insert
+    third = create('Third')
+    response = revalidate(etag)
+    assert response.status_code == 200
+    etag = response.get_etag()[0]
+
+    # Delete
+    client.delete(f"/api/items/{third['id']}", headers=auth_headers_admin)
+    response = revalidate(etag)
+    assert response.status_code == 200
+    assert 'Third' not in [item['name'] for item in (response.json if isinstance(response.json, list) else response.json['items'])]
+
+
+def test_list_etag_changes_when_delete_leaves_max_and_count(app, client, auth_headers_admin):
+    """Test a delete plus an older insert can't reuse a stale validator"""
+    from models import db, Item
+
+    old = client.post('/api/items/', json={'name': 'Old'}, headers=auth_headers_admin).json
+    client.post('/api/items/', json={'name': 'Newest'}, headers=auth_headers_admin)
+
+    etag = client.get('/api/items/', headers=auth_headers_admin).get_etag()[0]
+
+    # Replace 'Old' with a row carrying the same updated_at: max and count match
+    with app.app_context():
+        updated_at = db.session.get(Item, old['id']).updated_at
+    client.delete(f"/api/items/{old['id']}", headers=auth_headers_admin)
+    with app.app_context():
+        db.session.add(Item(qr_code='ABC123', name='Replacement', updated_at=updated_at))
+        db.session.commit()
+
+    response = client.get('/api/items/', headers={**auth_headers_admin, 'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 200
+    assert 'Replacement' in [item['name'] for item in response.json]
+
+
+def test_paginated_etag_does_not_scan_filtered_set(client, auth_headers_admin, count_statements):
+    """Test a page is validated from its own rows rather than max/count over every match"""
+    for i in range(5):
+        client.post('/api/items/', json={'name': f'Item {i}'}, headers=auth_headers_admin)
+
+    with count_statements() as statements:
+        response = client.get('/api/items/?limit=2', headers=auth_headers_admin)
+
+    assert response.status_code == 200 and response.get_etag()[0]
+    assert not [s for s in statements if 'count(' in s.lower() or 'max(' in s.lower()]
+    assert len([s for s in statements if 'FROM items' in s]) == 1
+
+
+def test_list_etag_reflects_user_rename(client, auth_headers_admin):
+    """Test renaming the user who added items changes the validator of lists showing them"""
+    client.post('/api/items/', json={'name': 'Steak'}, headers=auth_headers_admin)
+    etag = client.get('/api/items/', headers=auth_headers_admin).get_etag()[0]
+
+    client.put('/api/auth/users/1', json={'username': 'chef'}, headers=auth_headers_admin)
+
+    response = client.get('/api/items/', headers={**auth_headers_admin, 'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 200
+    assert response.json[0]['added_by_username'] == 'chef'
+
+
+def test_list_etag_reflects_category_rename(client, auth_headers_admin):
+    """Test renaming a category changes the validator of lists showing it"""
+    client.post('/api/items/', json={'name': 'Steak', 'category_id': 1}, headers=auth_headers_admin)
+    etag = client.get('/api/items/', headers=auth_headers_admin).get_etag()[0]
+
+    client.put('/api/categories/1', json={'name': 'Cow'}, headers=auth_headers_admin)
+
+    response = client.get('/api/items/', headers={**auth_headers_admin, 'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 200
+    assert response.json[0]['category_name'] == 'Cow'
+
+
+def test_batch_status_update(app, client, auth_headers_admin):
+    """Test several items can be consumed in one request, by id or QR code"""
+    first = client.post('/api/items/', json={'name': 'First'}, headers=auth_headers_admin).json
+    second = client.post('/api/items/', json={'name': 'Second'}, headers=auth_headers_admin).json
+    untouched = client.post('/api/items/', json={'name': 'Untouched'}, headers=auth_headers_admin).json
+
+    response = client.put('/api/items/status', json={
+        'status': 'consumed',
+        'item_ids': [first['id'], 9999],
+        'qr_codes': [second['qr_code'], 'NOPE00']
+    }, headers=auth_headers_admin)
+
+    assert response.status_code == 200
+    assert response.json['updated'] == 2
+    assert response.json['results'] == [
+        {'id': first['id'], 'qr_code': first['qr_code'], 'status': 'consumed'},
+        {'id': 9999, 'error': 'Item not found'},
+        {'id': second['id'], 'qr_code': second['qr_code'], 'status': 'consumed'},
+        {'qr_code': 'NOPE00', 'error': 'Item not found'},
+    ]
+
+    for item in (first, second):
+        updated = client.get(f"/api/items/{item['id']}", headers=auth_headers_admin).json
+        assert updated['status'] == 'consumed'
+        assert updated['removed_date'] is not None
+        assert updated['updated_at'] > item['updated_at']
+    assert client.get(f"/api/items/{untouched['id']}", headers=auth_headers_admin).json['status'] == 'in_freezer'
+
+    # Returning to the freezer clears removed_date, as update_item_status does
+    client.put('/api/items/status', json={'status': 'in_freezer', 'item_ids': [first['id']]},
+        headers=auth_headers_admin)
+    assert client.get(f"/api/items/{first['id']}", headers=auth_headers_admin).json['removed_date'] is None
+
+
+def test_batch_status_update_single_statement(client, auth_headers_admin, count_statements):
+    """Test the batch update issues one UPDATE however many items it touches"""
+    ids = [client.post('/api/items/', json={'name': f'Item {i}'}, headers=auth_headers_admin).json['id']
+           for i in range(5)]
+
+    with count_statements() as statements:
+        response = client.put('/api/items/status', json={'status': 'thrown_out', 'item_ids': ids},
+            headers=auth_headers_admin)
+
+    assert response.json['updated'] == 5
+    assert len([s for s in statements if s.startswith('UPDATE items')]) == 1
+
+
+@pytest.mark.parametrize('body', [
+    {'status': 'eaten', 'item_ids': [1]},
+    {'status': 'consumed'},
+    {'status': 'consumed', 'item_ids': 'all'},
+    {'status': 'consumed', 'item_ids': ['1']},
+    {'status': 'consumed', 'item_ids': [True]},
+    {'status': 'consumed', 'qr_codes': [1]},
+    {'status': 'consumed', 'qr_codes': [['ABC123']]},
+])
+def test_batch_status_update_invalid(client, auth_headers_admin, body):
+    """Test bad batch status requests are rejected"""
+    response = client.put('/api/items/status', json=body, headers=auth_headers_admin)
+    assert response.status_code == 400
+
+
+def test_batch_create_from_template(client, auth_headers_admin):
+    """Test a template plus quantity creates that many items with their own QR codes"""
+    response = client.post('/api/items/batch', json={
+        'item': {'name': 'Chicken Breast', 'category_id': 2, 'weight': 1.5, 'source': 'Costco'},
+        'quantity': 6
+    }, headers=auth_headers_admin)
+
+    assert response.status_code == 201
+    items = response.json['items']
+    assert len(items) == 6
+    assert len({item['qr_code'] for item in items}) == 6
+    assert all(item['name'] == 'Chicken Breast' and item['category_name'] == 'Chicken' for item in items)
+    # Default expiration comes from the category, as for single creates
+    assert all(item['expiration_date'] for item in items)
+    assert 'labels_pdf' not in response.json
+
+    listed = client.get('/api/items/', headers=auth_headers_admin).json
+    assert len(listed) == 6
+
+
+def test_batch_create_from_list(client, auth_headers_admin):
+    """Test a list of item bodies is created in order, keeping provided QR codes"""
+    response = client.post('/api/items/batch', json={
+        'items': [{'name': 'Steak', 'qr_code': 'STK001'}, {'name': 'Roast'}]
+    }, headers=auth_headers_admin)
+
+    assert response.status_code == 201
+    assert [item['name'] for item in response.json['items']] == ['Steak', 'Roast']
+    assert response.json['items'][0]['qr_code'] == 'STK001'
+
+
+def test_batch_create_with_labels(client, auth_headers_admin):
+    """Test a label PDF for the new items can be returned in the same response"""
+    import base64
+
+    response = client.post('/api/items/batch', json={
+        'item': {'name': 'Pork Chops'}, 'quantity': 3, 'labels': {'show_name': True}
+    }, headers=auth_headers_admin)
+
+    assert response.status_code == 201
+    assert base64.b64decode(response.json['labels_pdf']).startswith(b'%PDF')
+
+
+@pytest.mark.parametrize('body, message', [
+    ({'item': {'name': 'Fish'}}, 'quantity'),
+    ({'item': {'name': 'Fish'}, 'quantity': 0}, 'quantity'),
+    ({'item': {'name': 'Fish', 'qr_code': 'FSH001'}, 'quantity': 2}, 'template'),
+    ({'items': []}, 'non-empty'),
+    ({'items': [{'name': 'Fish'}, {'notes': 'no name'}]}, 'Item 2'),
+    ({'items': [{'name': 'A', 'qr_code': 'DUP001'}, {'name': 'B', 'qr_code': 'DUP001'}]}, 'Duplicate'),
+    ({'item': {'name': 'Fish'}, 'quantity': 1000}, 'At most'),
+    ({'item': {'name': 'Fish'}, 'quantity': True}, 'quantity'),
+    ({'item': [1], 'quantity': 2}, 'item must be an object'),
+    ([{'name': 'Fish'}], 'JSON object'),
+])
+def test_batch_create_invalid(client, auth_headers_admin, body, message):
+    """Test invalid batch creates are rejected without creating anything"""
+    response = client.post('/api/items/batch', json=body, headers=auth_headers_admin)
+
+    assert response.status_code == 400
+    assert message in response.json['error']
+    assert client.get('/api/items/', headers=auth_headers_admin).json == []
+
+
+def test_batch_create_existing_qr_code(client, auth_headers_admin, sample_item):
+    """Test a batch reusing an existing QR code is rejected as a whole"""
+    response = client.post('/api/items/batch', json={
+        'items': [{'name': 'New'}, {'name': 'Clash', 'qr_code': sample_item['qr_code']}]
+    }, headers=auth_headers_admin)
+
+    assert response.status_code == 400
+    assert len(client.get('/api/items/', headers=auth_headers_admin).json) == 1
+
+
+def test_batch_create_constant_query_count(client, auth_headers_admin, monkeypatch, count_statements):
+    """Test creating more items doesn't add lookups, QR checks or commits.
+
+    (SQLite gets one INSERT per row, within the same transaction; PostgreSQL
+    batches them.)
+    """
+    import cache_versions
+    monkeypatch.setattr(cache_versions, 'CACHE_VERSION_CHECK_INTERVAL', 60)
+
+    def create(quantity):
+        with count_statements() as statements:
+            response = client.post('/api/items/batch', json={
+                'item': {'name': 'Burger', 'category_id': 1}, 'quantity': quantity
+            }, headers=auth_headers_admin)
+
+        assert response.status_code == 201
+        return len([s for s in statements if not s.startswith('INSERT INTO items ')])
+
+    create(1)
+    assert create(20) == create(2)
@@ -0,0 +1,119 @@
+"""
+Tests for printable QR code labels
+"""
+import pytest
+
+import labels
+from labels import qr_matrix, draw_qr_matrix
+from models import db, Item
+
+
+class RecordingPath:
+    def __init__(self):
+        self.rects = []
+
+    def rect(self, x, y, width, height):
+        self.rects.append((x, y, width, height))
+
+
+class RecordingCanvas:
+    """Just enough of a reportlab canvas to capture drawn QR modules"""
+
+    def __init__(self):
+        self.paths = []
+
+    def beginPath(self):
+        return RecordingPath()
+
+    def drawPath(self, path, stroke=1, fill=0):
+        self.paths.append((path, stroke, fill))
+
+    def saveState(self):
+        pass
+
+    def restoreState(self):
+        pass
+
+    def setFillColorRGB(self, r, g, b):
+        pass
+
+
+def test_draw_qr_matrix_reproduces_modules():
+    """Test the drawn rectangles cover exactly the dark modules"""
+    matrix = qr_matrix('https://thefreezer.xyz/item/ABC123')
+    canvas = RecordingCanvas()
+    size = len(matrix) * 2.0
+
+    draw_qr_matrix(canvas, matrix, 10, 20, size)
+
+    assert len(canvas.paths) == 1
+    path, stroke, fill = canvas.paths[0]
+    assert (stroke, fill) == (0, 1)
+
+    drawn = [[False] * len(matrix) for _ in matrix]
+    for x, y, width, height in path.rects:
+        assert height == 2.0
+        row = int(round((20 + size - y) / 2.0)) - 1
+        for col in range(int(round((x - 10) / 2.0)), int(round((x - 10 + width) / 2.0))):
+            assert not drawn[row][col]
+            drawn[row][col] = True
+
+    assert drawn == matrix
+    # Runs are merged, so there are fewer rectangles than dark modules
+    assert len(path.rects) < sum(map(sum, matrix))
+
+
+def test_print_labels_vector_pdf(app, client, auth_headers_admin):
+    """Test labels are drawn without embedding raster images"""
+    with app.app_context():
+        items = [Item(qr_code=f'LBL{i:03d}', name=f'Item {i}', added_by_user_id=1) for i in range(30)]
+        db.session.add_all(items)
+        db.session.commit()
+        item_ids = [item.id for item in items]
+
+    response = client.post('/api/items/print-labels',
+        json={'item_ids': item_ids, 'show_name': True},
+        headers=auth_headers_admin
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/pdf'
+    assert response.data.startswith(b'%PDF')
+    assert b'/Subtype /Image' not in response.data
+    # 20 labels per page
+    assert response.data.count(b'/Type /Page\n') == 2
+
+
+def test_print_labels_requires_item_ids(client, auth_headers_admin):
+    """Test print_labels validates its input"""
+    response = client.post('/api/items/print-labels', json={}, headers=auth_headers_admin)
+    assert response.status_code == 400
+
+    response = client.post('/api/items/print-labels', json={'item_ids': [999]}, headers=auth_headers_admin)
+    assert response.status_code == 404
+
+
+def test_compute_qr_matrices_in_process_pool(monkeypatch):
+    """Test pooled QR computation returns the same matrices, in order"""
+    monkeypatch.setattr(labels, 'PARALLEL_LABEL_THRESHOLD', 10)
+    monkeypatch.setattr(labels, '_pools', {})
+    data = [f'https://thefreezer.xyz/item/P{i:05d}' for i in range(45)]
+
+    try:
+        pooled = labels.compute_qr_matrices(data, workers=2)
+    finally:
+        for pool in labels._pools.values():
+            pool.shutdown()
+
+    assert list(labels._pools) == [2]
+    assert pooled == [qr_matrix(text) for text in data]
+
+
+def test_render_labels_pdf_pages():
+    """Test labels are laid out 20 to a page"""
+    label_list = [{'qr_code': f'PG{i:04d}', 'qr_data': f'PG{i:04d}', 'weight': '2 lb'} for i in range(41)]
+
+    pdf = labels.render_labels_pdf(label_list, workers=0)
+
+    assert labels.labels_per_page() == 20
+    assert pdf.count(b'/Type /Page\n') == 3
@@ -0,0 +1,75 @@
+"""
+Tests for the QR code allocator
+"""
+import io
+import re
+
+import qr_codes
+from models import db, Item
+
+CODE_FORMAT = re.compile(r'^[A-Z]{3}[0-9]{3}$')
+
+
+def test_permutation_is_one_to_one(monkeypatch):
+    """Test every position maps to a different code (checked exhaustively on a small space)"""
+    monkeypatch.setattr(qr_codes, 'QR_LETTER_CODES', 26)
+    monkeypatch.setattr(qr_codes, 'QR_DIGIT_CODES', 10)
+
+    assert sorted(qr_codes.permute_qr_index(index) for index in range(260)) == list(range(260))
+
+
+def test_codes_are_distinct_and_well_formed():
+    """Test consecutive positions give distinct codes in the usual format"""
+    codes = [qr_codes.qr_code_for_index(index) for index in range(5000)]
+
+    assert len(set(codes)) == len(codes)
+    assert all(CODE_FORMAT.match(code) for code in codes)
+    assert qr_codes.format_qr_code(0) == 'AAA000'
+    assert qr_codes.format_qr_code(qr_codes.QR_CODE_SPACE - 1) == 'ZZZ999'
+
+
+def test_allocation_skips_taken_codes(app):
+    """Test codes issued some other way are skipped rather than reused"""
+    with app.app_context():
+        db.session.add(Item(qr_code=qr_codes.qr_code_for_index(0), name='Legacy', added_by_user_id=1))
+        db.session.commit()
+
+        codes = qr_codes.allocate_qr_codes(2)
+
+    assert codes == [qr_codes.qr_code_for_index(1), qr_codes.qr_code_for_index(2)]
+
+
+def test_rolled_back_codes_are_reused(app):
+    """Test a failed transaction doesn't use up codes"""
+    with app.app_context():
+        first = qr_codes.allocate_qr_codes(3)
+        db.session.rollback()
+
+        assert qr_codes.allocate_qr_codes(3) == first
+
+
+def test_items_get_allocated_codes(client, auth_headers_admin):
+    """Test created, batch created and imported items draw from the same sequence"""
+    single = client.post('/api/items/', json={'name': 'Steak'}, headers=auth_headers_admin).json
+    batch = client.post('/api/items/batch', json={'item': {'name': 'Burger'}, 'quantity': 3},
+        headers=auth_headers_admin).json
+    client.post('/api/items/import/csv', headers=auth_headers_admin,
+        data={'file': (io.BytesIO(b'name\nRoast\nRibs\n'), 'items.csv')})
+    items = client.get('/api/items/', headers=auth_headers_admin).json
+
+    codes = {item['qr_code'] for item in items}
+    assert len(codes) == 6
+    assert single['qr_code'] == qr_codes.qr_code_for_index(0)
+    assert [item['qr_code'] for item in batch['items']] == [qr_codes.qr_code_for_index(i) for i in range(1, 4)]
+    assert all(CODE_FORMAT.match(code) for code in codes)
+
+
+def test_allocation_works_without_returning(app, count_statements):
+    """Test allocation doesn't rely on UPDATE ... RETURNING (SQLite 3.35+)"""
+    with app.app_context():
+        qr_codes.allocate_qr_codes(1)
+        with count_statements() as statements:
+            codes = qr_codes.allocate_qr_codes(2)
+
+    assert codes == [qr_codes.qr_code_for_index(1), qr_codes.qr_code_for_index(2)]
+    assert not [s for s in statements if 'RETURNING' in s]
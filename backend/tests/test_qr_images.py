@@ -0,0 +1,88 @@
+"""
+Tests for the QR code image endpoint and its cache
+"""
+import os
+
+import pytest
+
+import qr_images
+from qr_images import QRImageCache, qr_image_key
+
+
+@pytest.fixture
+def render_calls(monkeypatch):
+    """Count QR renders while still producing real PNGs"""
+    calls = []
+    render = qr_images.render_qr_png
+
+    def counting_render(data):
+        calls.append(data)
+        return render(data)
+
+    monkeypatch.setattr(qr_images, 'render_qr_png', counting_render)
+    monkeypatch.setattr(qr_images, '_caches', {})
+    return calls
+
+
+def test_qr_image_cached_with_etag(client, render_calls):
+    """Test the PNG is rendered once and served with cache headers"""
+    first = client.get('/api/items/qr/ABC123/image')
+    second = client.get('/api/items/qr/ABC123/image')
+
+    assert first.status_code == 200
+    assert first.mimetype == 'image/png'
+    assert first.data.startswith(b'\x89PNG')
+    assert second.data == first.data
+    assert len(render_calls) == 1
+    assert render_calls[0].endswith('/item/ABC123')
+
+    etag, weak = first.get_etag()
+    assert not weak
+    assert etag == qr_image_key(render_calls[0])
+    assert first.cache_control.public
+    assert first.cache_control.max_age == 365 * 24 * 60 * 60
+    assert first.cache_control.immutable
+
+
+def test_qr_image_not_modified(client, render_calls):
+    """Test a matching If-None-Match is answered without rendering"""
+    etag = client.get('/api/items/qr/ABC123/image').get_etag()[0]
+    render_calls.clear()
+
+    response = client.get('/api/items/qr/ABC123/image', headers={'If-None-Match': f'"{etag}"'})
+
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.get_etag() == (etag, False)
+    assert render_calls == []
+
+    other = client.get('/api/items/qr/XYZ789/image', headers={'If-None-Match': f'"{etag}"'})
+    assert other.status_code == 200
+    assert other.get_etag()[0] != etag
+
+
+def test_qr_image_cache_evicts_least_recently_used(render_calls):
+    """Test the in-memory cache stays within its size limit"""
+    cache = QRImageCache(max_entries=2)
+
+    cache.get('a')
+    cache.get('b')
+    cache.get('a')
+    cache.get('c')  # evicts 'b'
+    cache.get('a')
+    cache.get('b')
+
+    assert render_calls == ['a', 'b', 'c', 'b']
+    assert len(cache._images) == 2
+
+
+def test_qr_image_disk_cache(tmp_path, render_calls):
+    """Test PNGs written to disk are reused by a fresh cache"""
+    png, key = QRImageCache(cache_dir=str(tmp_path)).get('https://thefreezer.xyz/item/ABC123')
+
+    assert (tmp_path / key[:2] / f'{key}.png').read_bytes() == png
+    assert not [name for name in os.listdir(tmp_path / key[:2]) if name.endswith('.tmp')]
+
+    other_worker = QRImageCache(cache_dir=str(tmp_path))
+    assert other_worker.get('https://thefreezer.xyz/item/ABC123') == (png, key)
+    assert len(render_calls) == 1
@@ -0,0 +1,112 @@
+"""
+Tests for full-text item search
+"""
+import io
+import json
+import pytest
+from sqlalchemy import text
+
+from models import db
+
+
+def search(client, headers, term, **params):
+    response = client.get('/api/items/', query_string={'search': term, 'status': 'all', **params},
+                          headers=headers)
+    assert response.status_code == 200
+    return [item['name'] for item in response.json]
+
+
+def test_search_uses_fts_index(app):
+    """Test the FTS5 table is created alongside the items table"""
+    with app.app_context():
+        row = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'items_fts'")
+        ).first()
+
+    assert row is not None
+
+
+def test_search_prefix_and_multiple_words(client, auth_headers_admin):
+    """Test partially typed words match and every word must match"""
+    client.post('/api/items/', json={'name': 'Ribeye Steak', 'source': 'Costco'}, headers=auth_headers_admin)
+    client.post('/api/items/', json={'name': 'Chicken Breast', 'source': 'Walmart'}, headers=auth_headers_admin)
+    client.post('/api/items/', json={'name': 'Chicken Thighs', 'notes': 'Bone-in'}, headers=auth_headers_admin)
+
+    assert search(client, auth_headers_admin, 'rib') == ['Ribeye Steak']
+    assert search(client, auth_headers_admin, 'cost') == ['Ribeye Steak']
+    assert sorted(search(client, auth_headers_admin, 'chick')) == ['Chicken Breast', 'Chicken Thighs']
+    assert search(client, auth_headers_admin, 'chicken bone') == ['Chicken Thighs']
+    assert search(client, auth_headers_admin, 'pork') == []
+
+
+def test_search_relevance_ranking(client, auth_headers_admin):
+    """Test name matches rank above notes matches with sort_by=relevance"""
+    client.post('/api/items/', json={'name': 'Stew Meat', 'notes': 'for brisket chili'}, headers=auth_headers_admin)
+    client.post('/api/items/', json={'name': 'Brisket'}, headers=auth_headers_admin)
+
+    assert search(client, auth_headers_admin, 'brisket', sort_by='relevance') == ['Brisket', 'Stew Meat']
+
+
+def test_search_index_follows_updates_and_deletes(client, auth_headers_admin):
+    """Test renames and deletes are reflected in search results"""
+    item = client.post('/api/items/', json={'name': 'Pork Chops'}, headers=auth_headers_admin).json
+
+    client.put(f"/api/items/{item['id']}", json={'name': 'Lamb Chops'}, headers=auth_headers_admin)
+    assert search(client, auth_headers_admin, 'pork') == []
+    assert search(client, auth_headers_admin, 'lamb') == ['Lamb Chops']
+
+    client.delete(f"/api/items/{item['id']}", headers=auth_headers_admin)
+    assert search(client, auth_headers_admin, 'lamb') == []
+
+
+def test_search_index_follows_imports(client, auth_headers_admin):
+    """Test imported items are searchable"""
+    payload = json.dumps({'items': [{'name': 'Imported Salmon Fillet', 'qr_code': 'IMP001'}]})
+    response = client.post('/api/items/import/json',
+        data={'file': (io.BytesIO(payload.encode('utf-8')), 'items.json')},
+        headers=auth_headers_admin,
+        content_type='multipart/form-data'
+    )
+    assert response.json['imported'] == 1
+
+    assert search(client, auth_headers_admin, 'salmon') == ['Imported Salmon Fillet']
+
+
+def test_search_index_check_is_cached(client, auth_headers_admin, count_statements):
+    """Test only the first search in a worker looks the FTS table up"""
+    client.post('/api/items/', json={'name': 'Ribeye Steak'}, headers=auth_headers_admin)
+
+    with count_statements() as statements:
+        assert search(client, auth_headers_admin, 'rib') == ['Ribeye Steak']
+        assert search(client, auth_headers_admin, 'steak') == ['Ribeye Steak']
+
+    assert len([s for s in statements if 'sqlite_master' in s]) == 1
+
+
+def test_search_falls_back_without_fts_table(app, client, auth_headers_admin):
+    """Test search still works on a database without the FTS table"""
+    client.post('/api/items/', json={'name': 'Ribeye Steak'}, headers=auth_headers_admin)
+
+    with app.app_context():
+        for trigger in ('items_fts_ai', 'items_fts_ad', 'items_fts_au'):
+            db.session.execute(text(f'DROP TRIGGER {trigger}'))
+        db.session.execute(text('DROP TABLE items_fts'))
+        db.session.commit()
+
+    # LIKE fallback also matches mid-word substrings
+    assert search(client, auth_headers_admin, 'eye') == ['Ribeye Steak']
+
+
+def test_migration_indexes_existing_rows(app, client, auth_headers_admin):
+    """Test the migration script creates the index and indexes existing items"""
+    from migrate_add_item_search import migrate
+
+    client.post('/api/items/', json={'name': 'Ribeye Steak'}, headers=auth_headers_admin)
+    with app.app_context():
+        for trigger in ('items_fts_ai', 'items_fts_ad', 'items_fts_au'):
+            db.session.execute(text(f'DROP TRIGGER {trigger}'))
+        db.session.execute(text('DROP TABLE items_fts'))
+        db.session.commit()
+
+    assert migrate(app) is True
+    assert search(client, auth_headers_admin, 'ribeye') == ['Ribeye Steak']
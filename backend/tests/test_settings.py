@@ -167,3 +167,61 @@ def test_download_backup_as_user(client, auth_headers_user):
     response = client.get('/api/settings/backup/download', headers=auth_headers_user)
 
     assert response.status_code == 403
+
+
+def _settings_queries(client, count_statements, url, headers):
+    """Issue a GET and return the number of SQL statements reading settings or their version"""
+    with count_statements(with_parameters=True) as statements:
+        client.get(url, headers=headers)
+
+    return len([
+        s for s, params in statements
+        if 'FROM settings' in s or ('FROM cache_versions' in s and 'settings' in params)
+    ])
+
+
+def test_settings_are_cached(client, auth_headers_admin, monkeypatch, count_statements):
+    """Test get_items doesn't read track_history from the database every time"""
+    import cache_versions
+    monkeypatch.setattr(cache_versions, 'CACHE_VERSION_CHECK_INTERVAL', 60)
+
+    assert _settings_queries(client, count_statements, '/api/items/', auth_headers_admin) > 0
+    assert _settings_queries(client, count_statements, '/api/items/', auth_headers_admin) == 0
+
+
+def test_settings_update_invalidates_cache(client, auth_headers_admin, monkeypatch):
+    """Test a settings change takes effect on the next request"""
+    import cache_versions
+    monkeypatch.setattr(cache_versions, 'CACHE_VERSION_CHECK_INTERVAL', 60)
+
+    item_id = client.post('/api/items/', json={'name': 'Eaten'}, headers=auth_headers_admin).json['id']
+    client.put(f'/api/items/{item_id}/status', json={'status': 'consumed'}, headers=auth_headers_admin)
+    assert len(client.get('/api/items/?status=all', headers=auth_headers_admin).json) == 1
+
+    client.put('/api/settings/', json={'track_history': 'false'}, headers=auth_headers_admin)
+
+    assert client.get('/api/items/?status=all', headers=auth_headers_admin).json == []
+
+
+def test_settings_change_from_another_worker(app, client, auth_headers_admin, monkeypatch):
+    """Test a change committed elsewhere is picked up once the version is re-checked"""
+    import cache_versions
+    from models import db, Setting
+    from settings_cache import mark_settings_changed
+
+    monkeypatch.setattr(cache_versions, 'CACHE_VERSION_CHECK_INTERVAL', 60)
+    monkeypatch.setenv('FLASK_ENV', 'development')
+    assert client.get('/api/auth/quick-login-status').json == {'enabled': False}
+
+    # Another worker turns on no-auth mode: only the database changes
+    with app.app_context():
+        db.session.add(Setting(user_id=None, setting_name='no_auth_mode', setting_value='true'))
+        mark_settings_changed()
+        db.session.commit()
+
+    # Still cached until the version is re-checked
+    assert client.get('/api/auth/quick-login-status').json == {'enabled': False}
+
+    with app.app_context():
+        cache_versions.get_cache('settings').check_interval = 0
+    assert client.get('/api/auth/quick-login-status').json == {'enabled': True}
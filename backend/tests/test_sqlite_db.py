@@ -0,0 +1,145 @@
+"""
+Tests for SQLite connection tuning and WAL-safe backup/restore
+"""
+import io
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from models import db
+
+
+@pytest.fixture
+def database_uri(tmp_path):
+    """WAL and the backup API need a real database file"""
+    return f"sqlite:///{tmp_path / 'inventory.db'}"
+
+
+def item_names(database):
+    """Item names in a database file or downloaded backup"""
+    with sqlite3.connect(database) as connection:
+        return sorted(name for name, in connection.execute('SELECT name FROM items'))
+
+
+def test_connections_are_tuned(app):
+    """Test every connection gets the configured PRAGMAs"""
+    with app.app_context():
+        pragma = lambda name: db.session.execute(db.text(f'PRAGMA {name}')).scalar()
+
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('busy_timeout') == 5000
+        assert pragma('synchronous') == 1  # NORMAL
+        assert pragma('temp_store') == 2  # MEMORY
+        assert pragma('cache_size') == -16 * 1024
+
+
+def test_download_includes_recent_commits(client, auth_headers_admin, tmp_path):
+    """Test the backup is a snapshot including commits still in the -wal file"""
+    client.post('/api/items/', json={'name': 'Steak'}, headers=auth_headers_admin)
+
+    response = client.get('/api/settings/backup/download', headers=auth_headers_admin)
+
+    assert response.status_code == 200
+    backup = tmp_path / 'download.db'
+    backup.write_bytes(response.data)
+    assert item_names(backup) == ['Steak']
+
+
+def test_restore_replaces_live_database(client, auth_headers_admin, tmp_path):
+    """Test a restore is visible to open connections and keeps a copy of the old data"""
+    client.post('/api/items/', json={'name': 'Steak'}, headers=auth_headers_admin)
+    backup = client.get('/api/settings/backup/download', headers=auth_headers_admin).data
+    client.post('/api/items/', json={'name': 'Burger'}, headers=auth_headers_admin)
+
+    response = client.post('/api/settings/backup/restore', headers=auth_headers_admin,
+        data={'file': (io.BytesIO(backup), 'backup.db')})
+
+    assert response.status_code == 200
+    items = client.get('/api/items/', headers=auth_headers_admin).json
+    assert [item['name'] for item in items] == ['Steak']
+    [previous] = tmp_path.glob('inventory.db.backup_*')
+    assert item_names(previous) == ['Burger', 'Steak']
+
+
+def test_restore_rejects_invalid_file(client, auth_headers_admin):
+    """Test an invalid upload leaves the live database untouched"""
+    client.post('/api/items/', json={'name': 'Steak'}, headers=auth_headers_admin)
+
+    response = client.post('/api/settings/backup/restore', headers=auth_headers_admin,
+        data={'file': (io.BytesIO(b'not a database'), 'backup.db')})
+
+    assert response.status_code == 400
+    items = client.get('/api/items/', headers=auth_headers_admin).json
+    assert [item['name'] for item in items] == ['Steak']
+
+
+def test_restore_moves_cache_versions_forward(app, client, auth_headers_admin):
+    """Test every cache version ends up past both its pre-restore and its restored value"""
+    from cache_versions import bump_cache_version, read_cache_versions
+
+    with app.app_context():
+        bump_cache_version('settings')
+        db.session.commit()
+    backup = client.get('/api/settings/backup/download', headers=auth_headers_admin).data
+
+    # After the backup, other workers bump versions this worker has no cache for
+    with app.app_context():
+        for _ in range(3):
+            bump_cache_version('settings')
+            bump_cache_version('categories')
+        db.session.commit()
+        before = read_cache_versions()
+
+    response = client.post('/api/settings/backup/restore', headers=auth_headers_admin,
+        data={'file': (io.BytesIO(backup), 'backup.db')})
+
+    assert response.status_code == 200
+    with app.app_context():
+        after = read_cache_versions()
+    assert after['settings'] > before['settings'] == 4
+    assert after['categories'] > before['categories']
+
+
+def test_restoring_same_backup_twice_resets_cursors(client, auth_headers_admin):
+    """Test the reset generation never repeats, so cursors from the first restore resync after the second"""
+    client.post('/api/items/', json={'name': 'Steak'}, headers=auth_headers_admin)
+    backup = client.get('/api/settings/backup/download', headers=auth_headers_admin).data
+
+    def restore():
+        response = client.post('/api/settings/backup/restore', headers=auth_headers_admin,
+            data={'file': (io.BytesIO(backup), 'backup.db')})
+        assert response.status_code == 200
+
+    restore()
+    cursor = client.get('/api/items/changes', headers=auth_headers_admin).json['cursor']
+    restore()
+
+    delta = client.get(f'/api/items/changes?since={cursor}', headers=auth_headers_admin).json
+    assert delta['reset'] is True
+
+
+def test_search_after_restoring_backup_without_fts(client, auth_headers_admin, tmp_path):
+    """Test a worker that saw the FTS table falls back to LIKE once a backup without it is restored"""
+    client.post('/api/items/', json={'name': 'Ribeye Steak'}, headers=auth_headers_admin)
+    backup = tmp_path / 'old.db'
+    backup.write_bytes(client.get('/api/settings/backup/download', headers=auth_headers_admin).data)
+    # Closing the connection checkpoints the change into the file
+    with closing(sqlite3.connect(backup)) as connection:
+        for trigger in ('items_fts_ai', 'items_fts_ad', 'items_fts_au'):
+            connection.execute(f'DROP TRIGGER {trigger}')
+        connection.execute('DROP TABLE items_fts')
+
+    def search(term):
+        response = client.get('/api/items/', query_string={'search': term}, headers=auth_headers_admin)
+        assert response.status_code == 200
+        return [item['name'] for item in response.json]
+
+    assert search('rib') == ['Ribeye Steak']
+
+    response = client.post('/api/settings/backup/restore', headers=auth_headers_admin,
+        data={'file': (io.BytesIO(backup.read_bytes()), 'backup.db')})
+    assert response.status_code == 200
+
+    # LIKE matching also finds mid-word substrings
+    assert search('eye') == ['Ribeye Steak']
@@ -0,0 +1,224 @@
+"""
+Tests for UPC lookups against local stub provider servers
+"""
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import upc_lookup
+from models import db, UpcLookupCache
+
+UPC = '012345678905'
+
+
+@pytest.fixture
+def upcitemdb(stub_server, monkeypatch):
+    provider = stub_server(body={'code': 'OK', 'total': 0, 'items': []})
+    monkeypatch.setattr(upc_lookup, 'UPCITEMDB_URL', f'{provider.url}/prod/trial/lookup')
+    # UPCDatabase.org is only queried when the upcdatabase fixture is used
+    monkeypatch.delenv('UPC_API_KEY', raising=False)
+    return provider
+
+
+@pytest.fixture
+def upcdatabase(stub_server, monkeypatch):
+    provider = stub_server(status=404, body={'success': False})
+    monkeypatch.setattr(upc_lookup, 'UPCDATABASE_URL', f'{provider.url}/product/{{upc}}')
+    monkeypatch.setenv('UPC_API_KEY', 'test-key')
+    return provider
+
+
+def lookup(client, headers, upc=UPC):
+    response = client.get(f'/api/items/lookup-upc/{upc}', headers=headers)
+    assert response.status_code == 200
+    return response.json
+
+
+def test_lookup_found_is_cached(client, auth_headers_admin, upcitemdb):
+    """Test a found product is served from the cache on the next scan"""
+    upcitemdb.body = {'code': 'OK', 'items': [{
+        'title': 'Frozen Peas', 'brand': 'Green Co', 'category': 'Vegetables',
+        'images': ['https://img.example/peas.jpg'],
+    }]}
+
+    first = lookup(client, auth_headers_admin)
+    second = lookup(client, auth_headers_admin)
+
+    assert first['found'] is True
+    assert first['source'] == 'upcitemdb'
+    assert first['data'] == {
+        'name': 'Frozen Peas', 'brand': 'Green Co', 'category': 'Vegetables',
+        'notes': '', 'upc': UPC, 'image_url': 'https://img.example/peas.jpg',
+    }
+    assert 'cached' not in first
+    assert second == dict(first, cached=True)
+    assert upcitemdb.requests == [f'/prod/trial/lookup?upc={UPC}']
+
+
+def test_lookup_not_found_is_negatively_cached(app, client, auth_headers_admin, upcitemdb, upcdatabase):
+    """Test a UPC every provider reports unknown is cached with the short TTL"""
+    first = lookup(client, auth_headers_admin)
+    second = lookup(client, auth_headers_admin)
+
+    assert first['found'] is False
+    assert first['message'] == 'UPC not found in database. Please enter item details manually.'
+    assert second['found'] is False
+    assert second['cached'] is True
+    assert len(upcitemdb.requests) == 1
+    assert upcdatabase.requests == [f'/product/{UPC}']
+
+    with app.app_context():
+        entry = db.session.get(UpcLookupCache, UPC)
+        assert entry.found is False
+        ttl = entry.expires_at - entry.fetched_at
+        assert ttl == upc_lookup.UPC_NEGATIVE_CACHE_TTL
+        assert ttl < upc_lookup.UPC_CACHE_TTL
+
+
+def test_lookup_errors_are_not_cached(app, client, auth_headers_admin, upcitemdb, upcdatabase):
+    """Test rate limiting and provider errors are retried on the next scan"""
+    upcitemdb.status = 429
+    upcdatabase.status = 500
+
+    first = lookup(client, auth_headers_admin)
+    second = lookup(client, auth_headers_admin)
+
+    assert first['found'] is False
+    assert first['message'] == 'UPC lookup failed. Please enter item details manually.'
+    assert 'cached' not in second
+    assert len(upcitemdb.requests) == 2
+    assert len(upcdatabase.requests) == 2
+
+    with app.app_context():
+        assert db.session.get(UpcLookupCache, UPC) is None
+
+
+def test_lookup_long_upc_is_not_cached(app, client, auth_headers_admin, upcitemdb):
+    """Test a scan too long for the cache key is still answered, just not cached"""
+    upc = '9' * 40
+
+    assert lookup(client, auth_headers_admin, upc)['found'] is False
+
+    with app.app_context():
+        assert db.session.get(UpcLookupCache, upc) is None
+
+
+def test_lookup_survives_cache_write_failure(app, client, auth_headers_admin, upcitemdb, monkeypatch):
+    """Test a database error while caching doesn't fail the lookup"""
+    from sqlalchemy.exc import OperationalError
+
+    def fail_commit():
+        raise OperationalError('INSERT INTO upc_lookup_cache', {}, Exception('disk I/O error'))
+
+    with app.app_context():
+        monkeypatch.setattr(db.session, 'commit', fail_commit)
+        response = client.get(f'/api/items/lookup-upc/{UPC}', headers=auth_headers_admin)
+
+    assert response.status_code == 200
+    assert response.json['found'] is False
+
+
+def test_lookup_second_provider(client, auth_headers_admin, upcitemdb, upcdatabase):
+    """Test UPCDatabase.org's answer is used when UPC Item DB doesn't know the UPC"""
+    upcdatabase.status = 200
+    upcdatabase.body = {'title': 'Ice Cream', 'brand': 'Dairy Co', 'category': 'Ice Cream',
+                        'images': ['https://img.example/ice.jpg']}
+
+    result = lookup(client, auth_headers_admin)
+
+    assert result['found'] is True
+    assert result['source'] == 'upcdatabase'
+    assert result['data']['name'] == 'Ice Cream'
+
+
+def test_lookup_expired_cache_entry(app, client, auth_headers_admin, upcitemdb):
+    """Test expired entries are looked up again and replaced"""
+    with app.app_context():
+        db.session.add(UpcLookupCache(
+            upc=UPC, found=False, response=json.dumps({'found': False}),
+            fetched_at=datetime.utcnow() - timedelta(days=2),
+            expires_at=datetime.utcnow() - timedelta(days=1)
+        ))
+        db.session.commit()
+
+    result = lookup(client, auth_headers_admin)
+
+    assert 'cached' not in result
+    assert len(upcitemdb.requests) == 1
+    with app.app_context():
+        assert db.session.get(UpcLookupCache, UPC).expires_at > datetime.utcnow()
+
+
+def test_lookup_local_item_wins(client, auth_headers_admin, sample_item, upcitemdb):
+    """Test items already in the inventory are returned without any API call"""
+    client.put(f"/api/items/{sample_item['id']}", json={'upc': UPC}, headers=auth_headers_admin)
+
+    result = lookup(client, auth_headers_admin)
+
+    assert result['source'] == 'local'
+    assert upcitemdb.requests == []
+
+
+FOUND_BODY = {'code': 'OK', 'items': [{'title': 'Chicken Breasts', 'brand': 'Farm', 'category': 'Chicken',
+                                      'images': ['https://img.example/chicken.jpg']}]}
+
+
+def test_lookup_queries_providers_concurrently(client, auth_headers_admin, upcitemdb, upcdatabase):
+    """Test slow providers are waited on in parallel, not one after the other"""
+    upcitemdb.delay = 0.6
+    upcdatabase.delay = 0.6
+
+    start = time.monotonic()
+    result = lookup(client, auth_headers_admin)
+    elapsed = time.monotonic() - start
+
+    assert result['message'] == 'UPC not found in database. Please enter item details manually.'
+    assert len(upcitemdb.requests) == 1
+    assert len(upcdatabase.requests) == 1
+    assert elapsed < 1.1
+
+
+def test_lookup_first_found_wins(client, auth_headers_admin, upcitemdb, upcdatabase):
+    """Test a quick find doesn't wait for a slower provider"""
+    upcitemdb.delay = 2
+    upcdatabase.status = 200
+    upcdatabase.body = {'title': 'Chicken Thighs', 'brand': 'Farm', 'category': 'Chicken',
+                        'images': ['https://img.example/thighs.jpg']}
+
+    start = time.monotonic()
+    result = lookup(client, auth_headers_admin)
+
+    assert time.monotonic() - start < 1.5
+    assert result['source'] == 'upcdatabase'
+    assert result['data']['name'] == 'Chicken Thighs'
+
+
+def test_lookup_deadline(app, client, auth_headers_admin, upcitemdb, upcdatabase, monkeypatch):
+    """Test the lookup gives up at the deadline and doesn't cache the miss"""
+    monkeypatch.setattr(upc_lookup, 'UPC_LOOKUP_DEADLINE', 0.3)
+    upcitemdb.delay = 1.5
+    upcitemdb.body = FOUND_BODY
+    upcdatabase.delay = 1.5
+
+    start = time.monotonic()
+    result = lookup(client, auth_headers_admin)
+
+    assert time.monotonic() - start < 1
+    assert result['found'] is False
+    assert result['source'] == 'error'
+    with app.app_context():
+        assert db.session.get(UpcLookupCache, UPC) is None
+
+
+def test_lookup_provider_results_in_priority_order(upcitemdb, upcdatabase):
+    """Test results are listed in provider priority order, not completion order"""
+    upcitemdb.delay = 0.3
+
+    results = upc_lookup.lookup_upc_providers(UPC, deadline=time.monotonic() + 5)
+
+    assert results == [
+        upc_lookup.ProviderResult('upcitemdb', upc_lookup.NOT_FOUND, None),
+        upc_lookup.ProviderResult('upcdatabase', upc_lookup.NOT_FOUND, None),
+    ]
@@ -0,0 +1,227 @@
+"""
+External UPC lookups and their persistent cache.
+
+Each provider query is reduced to a ProviderResult saying whether the
+product was found, definitively not found, or the provider couldn't
+answer. Providers are queried concurrently and the first one to find the
+product wins, so a slow or failing provider no longer delays the others;
+the whole lookup is bounded by UPC_LOOKUP_DEADLINE seconds.
+
+Lookup responses are cached in the upc_lookup_cache table: found products
+for UPC_CACHE_TTL_DAYS, and UPCs every provider reported as unknown for
+the shorter UPC_NEGATIVE_CACHE_TTL_HOURS. Provider errors, timeouts and
+rate limiting are never cached.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
+
+import requests
+from sqlalchemy.exc import SQLAlchemyError
+
+from http_client import http_get
+from models import db, UpcLookupCache
+
+UPCITEMDB_URL = 'https://api.upcitemdb.com/prod/trial/lookup'
+UPCDATABASE_URL = 'https://api.upcdatabase.org/product/{upc}'
+
+# Overall time budget for a lookup, including the Pexels image fallback
+UPC_LOOKUP_DEADLINE = float(os.environ.get('UPC_LOOKUP_DEADLINE', '6'))
+
+UPC_CACHE_TTL = timedelta(days=int(os.environ.get('UPC_CACHE_TTL_DAYS', '30')))
+UPC_NEGATIVE_CACHE_TTL = timedelta(hours=int(os.environ.get('UPC_NEGATIVE_CACHE_TTL_HOURS', '24')))
+
+# ProviderResult.status values
+FOUND = 'found'
+NOT_FOUND = 'not_found'
+FAILED = 'failed'  # Provider answered with an unexpected HTTP status
+UNAVAILABLE = 'unavailable'  # Request failed (timeout, connection error, bad body)
+
+# product is a dict with name, brand, category and image_url when found
+ProviderResult = namedtuple('ProviderResult', 'source status product')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Get the shared provider query thread pool, creating it on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='upc-lookup')
+        return _executor
+
+
+def query_upcitemdb(upc):
+    """Look up a UPC with UPC Item DB (trial endpoint, no key required)"""
+    try:
+        response = http_get('upcitemdb', UPCITEMDB_URL, params={'upc': upc})
+
+        if response.status_code == 404:
+            return ProviderResult('upcitemdb', NOT_FOUND, None)
+        if response.status_code != 200:
+            logging.warning(f"UPC Item DB lookup returned HTTP {response.status_code}")
+            return ProviderResult('upcitemdb', FAILED, None)
+
+        api_data = response.json()
+
+        # Log the response for debugging
+        logging.info(f"UPC Item DB Response: {api_data}")
+
+    except (requests.RequestException, ValueError) as e:
+        logging.warning(f"UPC Item DB lookup failed: {e}")
+        return ProviderResult('upcitemdb', UNAVAILABLE, None)
+
+    # Check if product was found
+    if api_data.get('code') != 'OK' or not api_data.get('items'):
+        return ProviderResult('upcitemdb', NOT_FOUND, None)
+
+    product_data = api_data['items'][0]
+    return ProviderResult('upcitemdb', FOUND, {
+        'name': product_data.get('title', ''),
+        'brand': product_data.get('brand', ''),
+        'category': product_data.get('category', ''),
+        # Use first image from array
+        'image_url': product_data['images'][0] if product_data.get('images') else None,
+    })
+
+
+def query_upcdatabase(upc, api_key):
+    """Look up a UPC with UPCDatabase.org (requires UPC_API_KEY)"""
+    try:
+        response = http_get(
+            'upcdatabase',
+            UPCDATABASE_URL.format(upc=upc),
+            headers={'Authorization': f'Bearer {api_key}'}
+        )
+
+        if response.status_code == 404:
+            return ProviderResult('upcdatabase', NOT_FOUND, None)
+        if response.status_code != 200:
+            logging.warning(f"UPCDatabase.org lookup returned HTTP {response.status_code}")
+            return ProviderResult('upcdatabase', FAILED, None)
+
+        api_data = response.json()
+
+        # Log the response for debugging
+        logging.info(f"UPCDatabase.org Response: {api_data}")
+
+    except (requests.RequestException, ValueError) as e:
+        logging.warning(f"UPCDatabase.org lookup failed: {e}")
+        return ProviderResult('upcdatabase', UNAVAILABLE, None)
+
+    # Handle both direct fields and nested 'items' array structure
+    if 'items' in api_data and len(api_data['items']) > 0:
+        product_data = api_data['items'][0]
+    else:
+        product_data = api_data
+
+    return ProviderResult('upcdatabase', FOUND, {
+        'name': product_data.get('title') or product_data.get('description', '') or product_data.get('brand', '') + ' ' + product_data.get('category', ''),
+        'brand': product_data.get('brand', ''),
+        'category': product_data.get('category', ''),
+        'image_url': product_data.get('images', [None])[0] if product_data.get('images') else None,
+    })
+
+
+def lookup_deadline():
+    """time.monotonic() value by which a lookup starting now must finish"""
+    return time.monotonic() + UPC_LOOKUP_DEADLINE
+
+
+def lookup_upc_providers(upc, deadline=None):
+    """Query the external providers concurrently.
+
+    Returns as soon as any provider finds the UPC, once every provider has
+    answered, or at the deadline, whichever comes first. Providers still
+    running at that point are reported as UNAVAILABLE.
+
+    Providers: UPC Item DB (free, good images) and UPCDatabase.org (only
+    when UPC_API_KEY is set). If both have found the UPC by the time we
+    return, UPC Item DB's answer is listed first.
+
+    Args:
+        upc: UPC to look up
+        deadline: time.monotonic() value to give up at (default
+            UPC_LOOKUP_DEADLINE seconds from now)
+
+    Returns:
+        list: ProviderResult for each provider, in priority order
+    """
+    if deadline is None:
+        deadline = lookup_deadline()
+
+    executor = get_executor()
+    futures = {'upcitemdb': executor.submit(query_upcitemdb, upc)}
+
+    api_key = os.environ.get('UPC_API_KEY')
+    if api_key:
+        futures['upcdatabase'] = executor.submit(query_upcdatabase, upc, api_key)
+
+    pending = set(futures.values())
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        if any(future.result().status == FOUND for future in done):
+            break
+
+    results = []
+    for source, future in futures.items():
+        if future.done():
+            results.append(future.result())
+        else:
+            logging.warning(f"UPC lookup via {source} did not answer before the deadline")
+            results.append(ProviderResult(source, UNAVAILABLE, None))
+
+    return results
+
+
+def upc_cache_ttl(results):
+    """How long a lookup with these provider results may be cached, or None"""
+    if any(result.status == FOUND for result in results):
+        return UPC_CACHE_TTL
+    if results and all(result.status == NOT_FOUND for result in results):
+        return UPC_NEGATIVE_CACHE_TTL
+    return None
+
+
+def get_cached_upc_lookup(upc):
+    """Get the cached lookup response for a UPC, or None if missing or expired"""
+    entry = db.session.get(UpcLookupCache, upc)
+    if entry is None or entry.expires_at <= datetime.utcnow():
+        return None
+    return json.loads(entry.response)
+
+
+def cache_upc_lookup(upc, response, ttl):
+    """Store (or replace) the cached lookup response for a UPC.
+
+    Best effort: UPCs too long for the cache key are skipped, and a failed
+    write is logged rather than failing the lookup.
+    """
+    if len(upc) > UpcLookupCache.upc.type.length:
+        return
+
+    now = datetime.utcnow()
+    try:
+        db.session.merge(UpcLookupCache(
+            upc=upc,
+            found=bool(response.get('found')),
+            response=json.dumps(response),
+            fetched_at=now,
+            expires_at=now + ttl
+        ))
+        db.session.commit()
+    except SQLAlchemyError:
+        # e.g. another worker cached the same UPC at the same moment
+        db.session.rollback()
+        logging.warning("Could not cache UPC lookup for %r", upc, exc_info=True)
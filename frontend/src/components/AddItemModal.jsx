@@ -17,6 +17,7 @@ function AddItemModal({ item, categories, onClose, onSave, onCategoryCreated })
     expiration_date: '',
     notes: '',
   });
+  const [quantity, setQuantity] = useState(1);
   const [error, setError] = useState('');
   const [loading, setLoading] = useState(false);
   const [upcLookupLoading, setUpcLookupLoading] = useState(false);
@@ -309,6 +310,13 @@ function AddItemModal({ item, categories, onClose, onSave, onCategoryCreated })
       if (item && item.id) {
         // Update existing item
         await itemsAPI.updateItem(item.id, submitData);
+      } else if (quantity > 1) {
+        // Create several identical items (e.g. a multi-pack), each with its own code
+        const { qr_code, ...template } = submitData;
+        const response = await itemsAPI.createItems({ item: template, quantity });
+
+        // Add to session for print prompt
+        response.data.items.forEach((created) => addItemToSession(created.id));
       } else {
         // Create new item
         const response = await itemsAPI.createItem(submitData);
@@ -338,6 +346,7 @@ function AddItemModal({ item, categories, onClose, onSave, onCategoryCreated })
           expiration_date: savedCategoryExpiration,
           notes: '',
         });
+        setQuantity(1);
         setUpcMessage('');
 
         // Trigger a soft refresh to update the items list in the background
@@ -708,6 +717,21 @@ function AddItemModal({ item, categories, onClose, onSave, onCategoryCreated })
             </div>
           </div>
 
+          {!item?.id && (
+            <div className="form-group">
+              <label htmlFor="quantity">Quantity</label>
+              <input
+                type="number"
+                id="quantity"
+                name="quantity"
+                value={quantity}
+                onChange={(e) => setQuantity(Math.max(1, parseInt(e.target.value) || 1))}
+                min="1"
+                max="200"
+              />
+            </div>
+          )}
+
           <div className="form-row form-row-2">
             <div className="form-group">
               <label htmlFor="added_date">Date Added</label>
@@ -9,6 +9,7 @@ function ImportExport() {
   const [error, setError] = useState('');
   const [success, setSuccess] = useState('');
   const [importResult, setImportResult] = useState(null);
+  const [importProgress, setImportProgress] = useState(null);
 
   const handleExportCSV = async () => {
     try {
@@ -41,6 +42,22 @@ function ImportExport() {
     }
   };
 
+  // Poll a background import job until it finishes
+  const waitForImportJob = async (jobId) => {
+    for (;;) {
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      const { data: job } = await itemsAPI.getImportJob(jobId);
+      setImportProgress(job.rows_processed);
+
+      if (job.status === 'completed') {
+        return job;
+      }
+      if (job.status === 'failed') {
+        throw new Error(job.message || 'Import failed');
+      }
+    }
+  };
+
   const handleImport = async () => {
     if (!importFile) {
       setError('Please select a file to import');
@@ -53,7 +70,7 @@ function ImportExport() {
       setError('Please select a CSV file');
       return;
     }
-    if (importFormat === 'json' && fileExt !== 'json') {
+    if (importFormat === 'json' && !['json', 'ndjson', 'jsonl'].includes(fileExt)) {
       setError('Please select a JSON file');
       return;
     }
@@ -64,11 +81,15 @@ function ImportExport() {
       setSuccess('');
       setImportResult(null);
 
+      setImportProgress(null);
+
       const response = importFormat === 'csv'
-        ? await itemsAPI.importCSV(importFile)
-        : await itemsAPI.importJSON(importFile);
+        ? await itemsAPI.importCSV(importFile, { background: true })
+        : await itemsAPI.importJSON(importFile, { background: true });
 
-      const result = response.data;
+      const result = response.status === 202
+        ? await waitForImportJob(response.data.id)
+        : response.data;
       setImportResult(result);
 
       if (result.imported > 0) {
@@ -85,6 +106,7 @@ function ImportExport() {
       setError('Failed to import file: ' + (err.response?.data?.error || err.message));
     } finally {
       setImporting(false);
+      setImportProgress(null);
     }
   };
 
@@ -181,7 +203,7 @@ function ImportExport() {
           <input
             type="file"
             id="import-file"
-            accept={importFormat === 'csv' ? '.csv' : '.json'}
+            accept={importFormat === 'csv' ? '.csv' : '.json,.ndjson,.jsonl'}
             onChange={handleFileSelect}
             disabled={importing}
           />
@@ -197,7 +219,9 @@ function ImportExport() {
           className="btn btn-primary"
           disabled={!importFile || importing}
         >
-          {importing ? 'Importing...' : '📤 Import Items'}
+          {importing
+            ? (importProgress ? `Importing... (${importProgress} rows processed)` : 'Importing...')
+            : '📤 Import Items'}
         </button>
 
         {importResult && (
@@ -255,6 +279,9 @@ function ImportExport() {
   ]
 }`}
         </pre>
+        <p style={{ marginTop: '0.5rem', fontSize: '0.9rem' }}>
+          Large inventories can also be imported as .ndjson, with one item object per line.
+        </p>
       </div>
     </div>
   );
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useSearchParams } from 'react-router-dom';
 import { itemsAPI, categoriesAPI } from '../services/api';
 import ItemCard from '../components/ItemCard';
@@ -50,6 +50,10 @@ function Inventory() {
     loadItems();
   }, [search, categoryFilter, statusFilter, sortBy, sortOrder]);
 
+  // Apply other household members' changes as they happen
+  const itemEventHandler = useRef(null);
+  useEffect(() => itemsAPI.subscribeToChanges((event) => itemEventHandler.current(event)), []);
+
   // Listen for session changes to update the banner
   useEffect(() => {
     const handleStorageChange = () => {
@@ -69,8 +73,10 @@ function Inventory() {
     }
   };
 
-  const loadItems = async () => {
-    setLoading(true);
+  const loadItems = async ({ quiet = false } = {}) => {
+    if (!quiet) {
+      setLoading(true);
+    }
     setError('');
 
     try {
@@ -95,6 +101,44 @@ function Inventory() {
     }
   };
 
+  const applyItemEvent = (event) => {
+    if (event.action === 'deleted') {
+      const removed = new Set(event.item_ids);
+      setItems((current) => current.filter((item) => !removed.has(item.id)));
+      return;
+    }
+
+    if (event.changes) {
+      // Batch status update: only the changed fields are sent
+      const changes = new Map(event.changes.map((change) => [change.id, change]));
+      setItems((current) => current
+        .map((item) => (changes.has(item.id) && changes.get(item.id).updated_at >= item.updated_at
+          ? { ...item, ...changes.get(item.id) }
+          : item))
+        .filter((item) => statusFilter === 'all' || item.status === statusFilter));
+      return;
+    }
+
+    const changed = event.item;
+    const existing = changed && items.find((item) => item.id === changed.id);
+    if (existing) {
+      // Events can arrive twice; never go back to an older copy
+      if (existing.updated_at > changed.updated_at) return;
+
+      const filteredOut = (statusFilter !== 'all' && changed.status !== statusFilter)
+        || (categoryFilter && String(changed.category_id) !== String(categoryFilter));
+      setItems((current) => (filteredOut
+        ? current.filter((item) => item.id !== changed.id)
+        : current.map((item) => (item.id === changed.id ? changed : item))));
+      return;
+    }
+
+    // New items, items that may now match the filters, and bulk changes
+    // (cheap: unchanged lists come back as 304 Not Modified)
+    loadItems({ quiet: true });
+  };
+  itemEventHandler.current = applyItemEvent;
+
   const handleAddItem = () => {
     setEditingItem(null);
     setShowAddModal(true);
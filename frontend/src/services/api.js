@@ -67,6 +67,9 @@ export const itemsAPI = {
   createItem: (data) =>
     api.post('/items/', data),
 
+  createItems: (data) =>
+    api.post('/items/batch', data),
+
   updateItem: (id, data) =>
     api.put(`/items/${id}`, data),
 
@@ -91,6 +94,80 @@ export const itemsAPI = {
   getQRImage: (qrCode) =>
     `/api/items/qr/${qrCode}/image`,
 
+  // Live item changes (Server-Sent Events). EventSource can't send the
+  // Authorization header, so the stream is read with fetch. Reconnects
+  // with Last-Event-ID to pick up missed events; returns an unsubscribe
+  // function.
+  subscribeToChanges: (onEvent) => {
+    let lastEventId = null;
+    let retryMs = 3000;
+    let stopped = false;
+    let controller = null;
+
+    const handleBlock = (block) => {
+      let data = null;
+      for (const line of block.split('\n')) {
+        if (line.startsWith('id: ')) {
+          lastEventId = line.slice(4);
+        } else if (line.startsWith('retry: ')) {
+          retryMs = Number(line.slice(7)) || retryMs;
+        } else if (line.startsWith('data: ')) {
+          data = line.slice(6);
+        }
+      }
+      if (data) {
+        onEvent(JSON.parse(data));
+      }
+    };
+
+    const connect = async () => {
+      while (!stopped) {
+        controller = new AbortController();
+        try {
+          const headers = { 'Authorization': `Bearer ${localStorage.getItem('token')}` };
+          if (lastEventId !== null) {
+            headers['Last-Event-ID'] = lastEventId;
+          }
+
+          const response = await fetch('/api/items/events', { headers, signal: controller.signal });
+          if (response.status === 401 || response.status === 422) {
+            // Logged out or token expired; the next login resubscribes
+            return;
+          }
+
+          if (response.ok && response.body) {
+            const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+            let buffer = '';
+            for (;;) {
+              const { value, done } = await reader.read();
+              if (done) break;
+
+              buffer += value;
+              let end;
+              while ((end = buffer.indexOf('\n\n')) !== -1) {
+                handleBlock(buffer.slice(0, end));
+                buffer = buffer.slice(end + 2);
+              }
+            }
+          }
+        } catch (err) {
+          if (stopped) return;
+          console.error('Live updates disconnected:', err);
+        }
+
+        if (!stopped) {
+          await new Promise((resolve) => setTimeout(resolve, retryMs));
+        }
+      }
+    };
+
+    connect();
+    return () => {
+      stopped = true;
+      controller?.abort();
+    };
+  },
+
   lookupUPC: (upc) =>
     api.get(`/items/lookup-upc/${upc}`),
 
@@ -177,9 +254,13 @@ export const itemsAPI = {
     document.body.removeChild(a);
   },
 
-  importCSV: (file) => {
+  // With background: true the server replies 202 with an import job to poll
+  importCSV: (file, { background = false } = {}) => {
     const formData = new FormData();
     formData.append('file', file);
+    if (background) {
+      formData.append('background', 'true');
+    }
     return api.post('/items/import/csv', formData, {
       headers: {
         'Content-Type': 'multipart/form-data',
@@ -187,15 +268,21 @@ export const itemsAPI = {
     });
   },
 
-  importJSON: (file) => {
+  importJSON: (file, { background = false } = {}) => {
     const formData = new FormData();
     formData.append('file', file);
+    if (background) {
+      formData.append('background', 'true');
+    }
     return api.post('/items/import/json', formData, {
       headers: {
         'Content-Type': 'multipart/form-data',
       },
     });
   },
+
+  getImportJob: (jobId) =>
+    api.get(`/items/import/jobs/${jobId}`),
 };
 
 // Categories API
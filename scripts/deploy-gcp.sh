@@ -39,7 +39,9 @@ echo -e "${GREEN}Step 1: Creating database backup...${NC}"
 mkdir -p backups
 if [ -f backend/instance/freezer_inventory.db ]; then
     BACKUP_FILE="backups/freezer_inventory_$(date +%Y%m%d_%H%M%S).db"
-    cp backend/instance/freezer_inventory.db "$BACKUP_FILE"
+    # SQLite's backup API also picks up commits still in the -wal file
+    python3 -c 'import sqlite3, sys; sqlite3.connect(sys.argv[1]).backup(sqlite3.connect(sys.argv[2]))' \
+        backend/instance/freezer_inventory.db "$BACKUP_FILE"
     echo -e "${GREEN}✓ Backup created: $BACKUP_FILE${NC}"
 else
     echo -e "${YELLOW}⚠ No database found, skipping backup${NC}"
@@ -120,8 +122,11 @@ if [ "$HEALTH_CHECK_PASSED" = false ]; then
     echo "Rolling back to previous backup..."
 
     if [ -n "$BACKUP_FILE" ] && [ -f "$BACKUP_FILE" ]; then
+        # Stop first so the old -wal file isn't replayed over the restored database
+        sudo systemctl stop $BACKEND_SERVICE
+        rm -f backend/instance/freezer_inventory.db-wal backend/instance/freezer_inventory.db-shm
         cp "$BACKUP_FILE" backend/instance/freezer_inventory.db
-        sudo systemctl restart $BACKEND_SERVICE
+        sudo systemctl start $BACKEND_SERVICE
         echo -e "${GREEN}✓ Rolled back to: $BACKUP_FILE${NC}"
     else
         echo -e "${YELLOW}⚠ No backup available for rollback${NC}"
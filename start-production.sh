@@ -61,6 +61,8 @@ mkdir -p logs
 
 # Start Gunicorn
 # --workers: Number of worker processes (recommend 2-4 workers for small deployments)
+# --worker-class gthread / --threads: Threads per worker, so open live-update
+#   streams (/api/items/events) don't block other requests
 # --bind: Address and port to bind to
 # --timeout: Request timeout in seconds
 # --access-logfile: Access log location
@@ -70,6 +72,8 @@ mkdir -p logs
 echo "Starting Gunicorn WSGI server..."
 gunicorn \
     --workers 2 \
+    --worker-class gthread \
+    --threads 8 \
     --bind 0.0.0.0:5001 \
     --timeout 120 \
     --access-logfile logs/access.log \
@@ -32,7 +32,7 @@ source venv/bin/activate
 pip install -r requirements.txt > /dev/null 2>&1
 
 # Start backend in background with gunicorn
-gunicorn "app:create_app()" --bind 0.0.0.0:5001 --workers 2 --access-logfile - &
+gunicorn "app:create_app()" --bind 0.0.0.0:5001 --workers 2 --worker-class gthread --threads 8 --access-logfile - &
 BACKEND_PID=$!
 echo "Backend started (PID: $BACKEND_PID)"
 